@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Crawl benchmark against a local fixture site with thousands of markets
+Usage:
+  python benchmark_crawler.py [--markets 3000] [--pages 10] [--batch 50] [--overlap 20]
+                              [--concurrency 1 3] [--output results.json]
+"""
+
+import sys
+import os
+import argparse
+import json
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from scrapers.polymarket_scraper import PolymarketScraper
+from scrapers.browser_pool import BrowserPool
+from scrapers.api_client import request_key
+from utils.fixture_server import FixtureServer
+
+# A listing page with Polymarket-style cards that render `batch` at a time as the page is scrolled
+PAGE_TEMPLATE = """<!DOCTYPE html>
+<html><head><style>.market-card {{ display: block; height: 48px; }}</style></head>
+<body>
+<h1>Markets, page {page}</h1>
+<div id="list"></div>
+<nav class="pagination" aria-label="Pagination">{links}</nav>
+<script>
+var markets = {markets};
+var shown = 0;
+function more() {{
+    var list = document.getElementById('list');
+    var end = Math.min(shown + {batch}, markets.length);
+    for (; shown < end; shown++) {{
+        var a = document.createElement('a');
+        a.className = 'market-card';
+        a.href = markets[shown][0];
+        a.innerText = markets[shown][1];
+        list.appendChild(a);
+    }}
+}}
+more();
+window.addEventListener('scroll', function () {{
+    if (window.innerHeight + window.scrollY >= document.body.scrollHeight - 10) setTimeout(more, {delay});
+}});
+</script>
+</body></html>"""
+
+
+def page_path(page):
+    return request_key("/markets", {"page": page} if page > 1 else None)
+
+
+def build_site(markets, pages, batch, overlap, delay_ms=50):
+    """Listing pages keyed for FixtureServer; each page repeats the last `overlap` markets of the one before"""
+    per_page = -(-markets // pages)
+    fixtures = {}
+    for page in range(1, pages + 1):
+        first = max(0, (page - 1) * per_page - overlap)
+        rows = [
+            (f"/event/market-{i}", f"Will market {i} resolve yes by {2027 + i % 3}?\n{i % 97 + 1}%\n${i % 50 + 1}m Vol.")
+            for i in range(first, min(markets, page * per_page))
+        ]
+        links = [f'<a href="{page_path(p)}">{p}</a>' for p in range(1, pages + 1) if p != page]
+        if page < pages:
+            links.append(f'<a rel="next" href="{page_path(page + 1)}">Next</a>')
+        fixtures[page_path(page)] = PAGE_TEMPLATE.format(
+            page=page, links=" ".join(links), markets=json.dumps(rows), batch=batch, delay=delay_ms
+        )
+    return fixtures
+
+
+def run(fixtures, expected, concurrency):
+    """Crawl the site once with up to `concurrency` tabs and check every market was found once"""
+    pool = BrowserPool(concurrency)
+    pool.warm()
+    try:
+        with FixtureServer(fixtures) as server:
+            scraper = PolymarketScraper(pool, page_url=f"{server.url}/markets", concurrency=concurrency)
+            start = time.perf_counter()
+            data = scraper.fetch_data()
+            seconds = time.perf_counter() - start
+    finally:
+        pool.close()
+
+    urls = [record["url"] for record in data]
+    stats = scraper.crawler.stats() if scraper.crawler else {}
+    return {
+        "concurrency": concurrency,
+        "seconds": round(seconds, 3),
+        "markets": len(data),
+        "unique_urls": len(set(urls)),
+        "missing": expected - len(set(urls)),
+        "markets_per_second": round(len(data) / seconds, 1) if seconds else 0.0,
+        "crawl": stats,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Crawl a local fixture site and report coverage and throughput")
+    parser.add_argument("--markets", type=int, default=3000, help="Distinct markets on the site")
+    parser.add_argument("--pages", type=int, default=10, help="Listing pages they are split over")
+    parser.add_argument("--batch", type=int, default=50, help="Markets each scroll loads")
+    parser.add_argument("--overlap", type=int, default=20, help="Markets each page repeats from the one before")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 3], help="Tab counts to compare")
+    parser.add_argument("--output", help="Write the JSON results here instead of stdout")
+    args = parser.parse_args()
+
+    fixtures = build_site(args.markets, args.pages, args.batch, args.overlap)
+    results = {"created": int(time.time()), "markets": args.markets, "pages": args.pages, "runs": []}
+    for concurrency in args.concurrency:
+        print(f"\nCrawling {args.pages} pages of {args.markets} markets with {concurrency} tabs...")
+        results["runs"].append(run(fixtures, args.markets, concurrency))
+
+    print("\n" + "=" * 60)
+    for r in results["runs"]:
+        print(f"tabs={r['concurrency']:<3} {r['seconds']:8.1f}s  markets={r['markets']}  "
+              f"missing={r['missing']}  {r['markets_per_second']:.1f} markets/s")
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output)
+        print(f"Results written to {args.output}")
+    else:
+        print(output)
+
+    # Non-zero exit when a crawl missed or repeated markets, so CI catches coverage regressions
+    if any(r["missing"] or r["markets"] != args.markets for r in results["runs"]):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Offline record/replay benchmark for the Selenium scrapers
+Usage:
+  python benchmark_scrapers.py record [--fixtures scraper_fixtures.json]
+  python benchmark_scrapers.py run [--fixtures scraper_fixtures.json] [--runs 3] [--output results.json]
+                                   [--baseline baseline.json] [--tolerance 0.25]
+"""
+
+import sys
+import os
+import argparse
+import json
+import random
+import statistics
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from scrapers.polymarket_scraper import PolymarketScraper
+from scrapers.kalshi_scraper import KalshiScraper
+from scrapers.prediction_market_scraper import PredictionMarketScraper
+from scrapers.browser_pool import BrowserPool, new_driver
+from scrapers.page_readiness import PageReadiness
+from utils.fixture_server import FixtureServer
+
+DEFAULT_FIXTURES = "scraper_fixtures.json"
+PHASES = ["driver_start", "navigation", "readiness", "extraction", "parsing"]
+
+# Live pages recorded for each site, replayed at /<site>/<n>
+SITES = {
+    "polymarket": ([PolymarketScraper.PAGE_URL], PolymarketScraper.SELECTORS),
+    "kalshi": ([KalshiScraper.PAGE_URL], KalshiScraper.SELECTORS),
+    "predictionmarket": (PredictionMarketScraper.PAGE_URLS, PredictionMarketScraper.SELECTORS),
+}
+
+# Freeze the rendered page: no scripts or external resources, links made absolute,
+# so replays are deterministic and never touch the network
+SNAPSHOT_JS = """
+document.querySelectorAll('a[href]').forEach(function (a) { a.setAttribute('href', a.href); });
+document.querySelectorAll('script, noscript, link, iframe, source').forEach(function (el) { el.remove(); });
+document.querySelectorAll('[src], [srcset]').forEach(function (el) {
+    el.removeAttribute('src');
+    el.removeAttribute('srcset');
+});
+return '<!DOCTYPE html>' + document.documentElement.outerHTML;
+"""
+
+
+def record(fixtures_path):
+    """Render each site's live pages once and save the snapshots"""
+    fixtures = {}
+    driver = new_driver()
+    try:
+        for site, (urls, selectors) in SITES.items():
+            readiness = PageReadiness(selectors)
+            for i, url in enumerate(urls):
+                print(f"Recording {site} page {i}: {url}")
+                try:
+                    driver.get(url)
+                    readiness.wait(driver, url)
+                    fixtures[f"/{site}/{i}"] = driver.execute_script(SNAPSHOT_JS)
+                except Exception as e:
+                    print(f"Failed to record {url}: {e}")
+    finally:
+        driver.quit()
+
+    with open(fixtures_path, "w", encoding="utf-8") as f:
+        json.dump(fixtures, f)
+    print(f"Recorded {len(fixtures)} pages to {fixtures_path}")
+
+
+def make_scraper(site, base_url, pool=None):
+    if site == "polymarket":
+        return PolymarketScraper(pool, page_url=f"{base_url}/polymarket/0")
+    if site == "kalshi":
+        return KalshiScraper(pool, page_url=f"{base_url}/kalshi/0")
+    urls = SITES[site][0]
+    return PredictionMarketScraper(pool, page_urls=[f"{base_url}/{site}/{i}" for i in range(len(urls))])
+
+
+def summarize(values):
+    return {
+        "median": round(statistics.median(values), 4),
+        "min": round(min(values), 4),
+        "max": round(max(values), 4),
+    }
+
+
+def run(fixtures_path, runs, pool_size=0):
+    """Scrape the replayed snapshots `runs` times per site and summarize each phase"""
+    results = {"created": int(time.time()), "runs": runs, "browser_pool": pool_size, "sites": {}}
+    pool = BrowserPool(pool_size) if pool_size else None
+
+    with FixtureServer(fixtures_path) as server:
+        for site in SITES:
+            # Same random market sample on every run and every machine
+            random.seed(0)
+            phases = {phase: [] for phase in PHASES + ["total"]}
+            items = []
+            for _ in range(runs):
+                scraper = make_scraper(site, server.url, pool)
+                start = time.perf_counter()
+                data = scraper.fetch_data()
+                phases["total"].append(time.perf_counter() - start)
+                timings = scraper.timings.as_dict()
+                for phase in PHASES:
+                    phases[phase].append(timings.get(phase, 0.0))
+                items.append(len(data))
+            results["sites"][site] = {
+                "items": items,
+                "phases": {phase: summarize(values) for phase, values in phases.items()},
+            }
+
+    if pool is not None:
+        pool.report()
+        pool.close()
+    return results
+
+
+def compare(results, baseline, tolerance, min_delta=0.05):
+    """Phases whose median got slower than the baseline by more than the tolerance"""
+    regressions = []
+    for site, current in results["sites"].items():
+        previous = baseline.get("sites", {}).get(site)
+        if not previous:
+            continue
+        for phase, stats in current["phases"].items():
+            before = previous["phases"].get(phase, {}).get("median")
+            after = stats["median"]
+            if before is None:
+                continue
+            if after > before * (1 + tolerance) and after - before > min_delta:
+                regressions.append({"site": site, "phase": phase, "baseline": before, "current": after})
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline scraper benchmark")
+    parser.add_argument("mode", choices=["record", "run"])
+    parser.add_argument("--fixtures", default=DEFAULT_FIXTURES, help="Recorded page snapshots")
+    parser.add_argument("--runs", type=int, default=3, help="Scrapes per site")
+    parser.add_argument("--browser-pool", type=int, default=0, help="Warm browser sessions to lease (0 starts one per scrape)")
+    parser.add_argument("--output", help="Write the JSON results here instead of stdout")
+    parser.add_argument("--baseline", help="Earlier JSON results to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown of a phase median, as a fraction")
+    args = parser.parse_args()
+
+    if args.mode == "record":
+        record(args.fixtures)
+        return
+
+    results = run(args.fixtures, args.runs, args.browser_pool)
+
+    print("\n" + "=" * 60)
+    for site, summary in results["sites"].items():
+        medians = "  ".join(f"{phase}={stats['median']:.2f}s" for phase, stats in summary["phases"].items())
+        print(f"{site:<17} items={summary['items']}  {medians}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            results["regressions"] = compare(results, json.load(f), args.tolerance)
+        for r in results["regressions"]:
+            print(f"REGRESSION {r['site']} {r['phase']}: {r['baseline']:.2f}s -> {r['current']:.2f}s")
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output)
+        print(f"Results written to {args.output}")
+    else:
+        print(output)
+
+    # Non-zero exit so CI can fail the build on a latency regression
+    if results.get("regressions"):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
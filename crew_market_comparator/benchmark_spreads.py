@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the cross-venue spread analysis
+Usage: python benchmark_spreads.py [--groups 100000] [--min-spread 0.1] [--output results.json]
+"""
+
+import sys
+import os
+import argparse
+import json
+import time
+import random
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from utils.spread_analyzer import SpreadAnalyzer
+
+
+def make_groups(size, seed=42):
+    """Unified groups listed on one to three venues, some entries without a parsed probability"""
+    rng = random.Random(seed)
+    sites = ["Polymarket", "Kalshi", "PredictionMarket"]
+    unified = []
+    for g in range(size):
+        entries = []
+        for site in rng.sample(sites, rng.randint(1, 3)):
+            for _ in range(rng.randint(1, 2)):
+                if rng.random() < 0.2:
+                    entries.append({"site": site, "product": f"Market {g}", "price": f"{rng.randint(1, 99)}%"})
+                else:
+                    entries.append({"site": site, "product": f"Market {g}", "price": "N/A",
+                                    "probability": rng.random()})
+        unified.append({"product": f"Market {g}", "cluster_id": g + 1, "entries": entries, "confidence": 1.0})
+    return unified
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time the cross-venue spread analysis over generated groups")
+    parser.add_argument("--groups", type=int, default=100000, help="Unified groups to analyze")
+    parser.add_argument("--min-spread", type=float, default=0.1, help="Only rank groups with at least this spread")
+    parser.add_argument("--output", help="Also write the JSON results here")
+    args = parser.parse_args()
+    size = args.groups
+    min_spread = args.min_spread
+
+    unified = make_groups(size)
+    entries = sum(len(u["entries"]) for u in unified)
+    print(f"Analyzing {size} groups ({entries} entries)")
+    print("=" * 50)
+
+    analyzer = SpreadAnalyzer(min_spread=min_spread)
+    timings = []
+    for _ in range(3):
+        start = time.perf_counter()
+        table = analyzer.analyze(unified)
+        rows = analyzer.rows(unified, table, analyzer.rank(table))
+        timings.append(time.perf_counter() - start)
+
+    print(f"Best of 3: {min(timings):.3f}s")
+    print(f"Groups with a spread of at least {min_spread:g}: {len(rows)}")
+    print(f"Arbitrage flags: {int(table['arbitrage'].sum())}")
+    analyzer.report(rows, 5)
+
+    if args.output:
+        results = {"created": int(time.time()), "groups": size, "entries": entries, "min_spread": min_spread,
+                   "seconds": round(min(timings), 4), "ranked": len(rows),
+                   "arbitrage": int(table["arbitrage"].sum())}
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(json.dumps(results, indent=2))
+        print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
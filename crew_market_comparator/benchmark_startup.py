@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Cold-start benchmark for the search CLI
+Usage: python benchmark_startup.py [--runs 10] [--budget-ms 200] [--query bitcoin] [--output results.json]
+"""
+
+import sys
+import os
+import argparse
+import csv
+import json
+import statistics
+import subprocess
+import tempfile
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from utils.search_index import SearchIndex
+
+MAIN = os.path.join(os.path.dirname(os.path.abspath(__file__)), "main.py")
+
+# Modules only the scrape pipeline needs; loading any of them makes --search slow again
+HEAVY_MODULES = ["pandas", "numpy", "scipy", "pyarrow", "selenium", "webdriver_manager", "requests"]
+
+
+def make_snapshot(directory, rows=500):
+    """A small unified_products CSV and a search index over it, so every search mode has data"""
+    path = os.path.join(directory, "unified_products_1.csv")
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["Product", "Confidence", "Total_Entries", "Kalshi_Price", "Polymarket_Price"])
+        for i in range(rows):
+            writer.writerow([f"Will bitcoin close above ${100 + i}k on day {i}?", 1.0, 2, f"{i % 100}%", f"{i % 97}¢"])
+
+    cwd = os.getcwd()
+    os.chdir(directory)
+    try:
+        index = SearchIndex("search_index.db")
+        index.update()
+        index.close()
+    finally:
+        os.chdir(cwd)
+
+
+def search_command(query, mode, importtime=False):
+    command = [sys.executable]
+    if importtime:
+        command += ["-X", "importtime"]
+    # A missing index path makes main.py fall back to scanning the CSV snapshots
+    index_path = "search_index.db" if mode == "index" else "missing_index.db"
+    return command + [MAIN, "--search", query, "--index-path", index_path]
+
+
+def time_command(command, cwd, runs):
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(command, cwd=cwd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def imported_modules(command, cwd):
+    """Top-level packages the command imports and their cumulative import time in ms, from -X importtime"""
+    result = subprocess.run(command, cwd=cwd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True, check=True)
+    modules = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if name.startswith("  ") or not cumulative.strip().isdigit():
+            continue  # nested imports are counted in their parent's cumulative time
+        modules[name.strip()] = int(cumulative) / 1000
+    return modules
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cold-start benchmark for main.py --search")
+    parser.add_argument("--runs", type=int, default=10, help="Cold starts timed per search mode")
+    parser.add_argument("--budget-ms", type=float, default=200,
+                        help="Allowed median start-up cost of a search on top of a bare interpreter")
+    parser.add_argument("--query", default="bitcoin", help="Search query")
+    parser.add_argument("--output", help="Write the JSON results here")
+    args = parser.parse_args()
+
+    failures = []
+    results = {"runs": args.runs, "budget_ms": args.budget_ms, "modes": {}}
+    with tempfile.TemporaryDirectory() as directory:
+        make_snapshot(directory)
+        interpreter = time_command([sys.executable, "-c", "pass"], directory, args.runs)
+        # Modules every interpreter loads at start-up are not the CLI's cost
+        startup_modules = imported_modules([sys.executable, "-X", "importtime", "-c", "pass"], directory)
+        results["interpreter_ms"] = round(interpreter * 1000, 1)
+        print(f"Bare interpreter start: {interpreter * 1000:.0f} ms (median of {args.runs})")
+        print("=" * 60)
+
+        for mode in ["index", "csv"]:
+            elapsed = time_command(search_command(args.query, mode), directory, args.runs)
+            modules = imported_modules(search_command(args.query, mode, importtime=True), directory)
+            modules = {name: ms for name, ms in modules.items() if name not in startup_modules}
+            overhead = (elapsed - interpreter) * 1000
+            heavy = sorted(name for name in modules if name.split(".")[0] in HEAVY_MODULES)
+            slowest = sorted(modules.items(), key=lambda item: item[1], reverse=True)[:5]
+
+            results["modes"][mode] = {
+                "median_ms": round(elapsed * 1000, 1),
+                "overhead_ms": round(overhead, 1),
+                "heavy_modules": heavy,
+                "slowest_imports_ms": dict(slowest),
+            }
+            print(f"--search ({mode}): {elapsed * 1000:.0f} ms, {overhead:.0f} ms over the interpreter")
+            print("  Slowest imports: " + ", ".join(f"{name} {ms:.0f} ms" for name, ms in slowest))
+            if heavy:
+                failures.append(f"--search ({mode}) imports {', '.join(heavy)}")
+            if overhead > args.budget_ms:
+                failures.append(f"--search ({mode}) takes {overhead:.0f} ms, over the {args.budget_ms:.0f} ms budget")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.output}")
+
+    if failures:
+        print("\nStart-up budget exceeded:")
+        for failure in failures:
+            print(f"  {failure}")
+        sys.exit(1)
+    print("\nWithin the start-up budget")
+
+
+if __name__ == "__main__":
+    main()
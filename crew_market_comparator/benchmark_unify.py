@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Scaling benchmark for parallel product unification
+Usage: python benchmark_unify.py [--items 20000] [--workers 1 2 4 8] [--output results.json]
+"""
+
+import sys
+import os
+import argparse
+import json
+import time
+import random
+import string
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from utils.semantic_matcher import SemanticMatcher
+
+
+def make_corpus(size, seed=42):
+    """Build a reproducible set of market titles with near-duplicates across sites"""
+    rng = random.Random(seed)
+    words = ["".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(3, 9))) for _ in range(5000)]
+    templates = [
+        " ".join(rng.choice(words) for _ in range(rng.randint(2, 4))) + " {} {} {}?"
+        for _ in range(2000)
+    ]
+    bases = [
+        rng.choice(templates).format(*(rng.choice(words).capitalize() for _ in range(3)))
+        for _ in range(size // 3)
+    ]
+
+    sites = ["Polymarket", "Kalshi", "PredictionMarket"]
+    data = [[] for _ in sites]
+    for _ in range(size):
+        title = list(rng.choice(bases))
+        # A couple of character edits, like the same market listed on another site
+        for _ in range(rng.randint(0, 2)):
+            title[rng.randrange(len(title))] = rng.choice(string.ascii_lowercase)
+        site = rng.randrange(len(sites))
+        data[site].append({"site": sites[site], "product": "".join(title), "price": "N/A"})
+    return data
+
+
+def signature(unified):
+    return [(u["product"], [e["product"] for e in u["entries"]], u["confidence"]) for u in unified]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Unify a generated corpus with different worker counts")
+    parser.add_argument("--items", type=int, default=20000, help="Scraped items to unify")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8], help="Worker counts to compare")
+    parser.add_argument("--output", help="Also write the JSON results here")
+    args = parser.parse_args()
+    size = args.items
+
+    data = make_corpus(size)
+    print(f"Unifying {size} items on {os.cpu_count()} CPUs")
+    print("=" * 50)
+
+    results = {"created": int(time.time()), "items": size, "cpus": os.cpu_count(), "runs": []}
+    baseline = None
+    reference = None
+    for workers in args.workers:
+        start = time.perf_counter()
+        unified = SemanticMatcher(workers=workers).unify(data)
+        elapsed = time.perf_counter() - start
+
+        if baseline is None:
+            baseline = elapsed
+            reference = signature(unified)
+        identical = signature(unified) == reference
+
+        print(f"workers={workers:<2}  {elapsed:7.2f}s  speedup {baseline / elapsed:5.2f}x  "
+              f"groups={len(unified)}  identical={identical}")
+        results["runs"].append({"workers": workers, "seconds": round(elapsed, 3),
+                                "speedup": round(baseline / elapsed, 2), "groups": len(unified),
+                                "identical": identical})
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(json.dumps(results, indent=2))
+        print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
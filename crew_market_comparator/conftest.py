@@ -0,0 +1,8 @@
+import os
+import sys
+
+# Modules import each other as top-level packages (from utils.x import ...), as the scripts run them
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# A manual script for trying the live scrapers one at a time, not a test module
+collect_ignore = ["test_scraper.py"]
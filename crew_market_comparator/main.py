@@ -1,69 +1,93 @@
 import argparse
-import pandas as pd
+import os
 import random
 import time
-import re
-from scrapers.mock_scraper import MockScraper
-from scrapers.polymarket_scraper import PolymarketScraper
-from scrapers.kalshi_scraper import KalshiScraper
-from scrapers.prediction_market_scraper import PredictionMarketScraper
-from utils.semantic_matcher import SemanticMatcher
-from utils.csv_writer import CSVWriter
-
-def search_markets(query, csv_files=None):
+# Only what --search and --index need is imported here; selenium, pandas and the
+# scrapers are imported by the pipeline functions, so lookups start fast
+from utils.search_index import SearchIndex, DEFAULT_INDEX_PATH
+from utils.match_scorer import BatchScorer, top_matches
+from utils.snapshot_reader import scan_snapshots, collapse_latest
+from utils.metrics import RunMetrics, peak_rss_mb
+from utils.history_store import HistoryStore, DEFAULT_HISTORY_PATH, product_key
+
+# Shared so per-snapshot product tokens survive between searches in one process
+scorer = BatchScorer()
+
+def search_markets(query, csv_files=None, index_path=DEFAULT_INDEX_PATH, store_dir="snapshots", show_history=False):
     """Search for markets matching a specific query"""
     print(f"Searching for: '{query}'")
     print("=" * 60)
     
-    if not csv_files:
+    # The token index answers queries without opening any snapshot
+    use_index = not csv_files and os.path.exists(index_path)
+    
+    if not csv_files and not use_index:
         # Find all CSV files in current directory
         import glob
         csv_files = glob.glob("unified_products_*.csv")
         csv_files.sort(reverse=True)  # Most recent first
     
-    if not csv_files:
+    # Parquet snapshots (--format parquet) live in a separate date-partitioned store
+    use_store = os.path.isdir(store_dir)
+    
+    if not csv_files and not use_index and not use_store:
         print("No CSV files found. Run the scraper first with --live flag.")
         return
     
-    print(f"Searching in {len(csv_files)} CSV files...")
-    
     all_results = []
-    query_lower = query.lower()
-    
-    for csv_file in csv_files:
-        try:
-            df = pd.read_csv(csv_file)
-            print(f"Searching {csv_file} ({len(df)} markets)...")
-            
-            # Search in Product column
-            matches = df[df['Product'].str.lower().str.contains(query_lower, na=False)]
-            
-            for _, row in matches.iterrows():
-                result = {
-                    'file': csv_file,
-                    'product': row['Product'],
-                    'confidence': row['Confidence'],
-                    'total_entries': row.get('Total_Entries', 'N/A'),
-                    'kalshi_price': row.get('Kalshi_Price', 'N/A'),
-                    'polymarket_price': row.get('Polymarket_Price', 'N/A'),
-                    'match_score': calculate_match_score(query, row['Product'])
-                }
-                all_results.append(result)
-                
-        except Exception as e:
-            print(f"Error reading {csv_file}: {e}")
-    
-    if not all_results:
+    index_results = []
+    total = 0
+    matched_rows = 0
+    
+    if use_index:
+        # Answer from the token index's postings without opening any CSV; snapshots written
+        # since it was built (or deleted since) are found by diffing the glob with one query
+        print(f"Searching index {index_path}...")
+        index = SearchIndex(index_path)
+        index.update(verify=False)
+        # Matching, scoring, collapsing and the top 10 all happen in SQL
+        index_results, total, matched_rows = index.search(query, k=10, history=show_history)
+    else:
+        print(f"Searching in {len(csv_files)} CSV files...")
+        # Files are read in parallel, and each one is parsed only once per mtime and size
+        results, rows = scan_snapshots(query, csv_files)
+        print(f"Scanned {rows} markets")
+        all_results.extend(results)
+    
+    if use_store:
+        # Column-pruned, predicate-filtered scan over the memory-mapped Parquet files
+        from utils.columnar_store import search_snapshots
+        print(f"Searching snapshot store {store_dir}...")
+        all_results.extend(search_snapshots(query, store_dir))
+    
+    # A market appears once per snapshot it is in; keep its newest row
+    matched_rows += len(all_results)
+    others = collapse_latest(all_results)
+    total += len(others)
+    if use_index:
+        # Markets the index also holds are counted once, with their indexed snapshots merged in
+        top_keys = {product_key(result['product']) for result in index_results}
+        keys = [product_key(result['product']) for result in others]
+        known = index.lookup([key for key in keys if key not in top_keys], history=show_history)
+        total -= len(known) + sum(1 for key in keys if key in top_keys)
+        index.close()
+        others = collapse_latest(index_results + list(known.values()) + others)
+    
+    if not others:
         print(f"No markets found matching '{query}'")
         return
     
-    # Sort by match score (best matches first)
-    all_results.sort(key=lambda x: x['match_score'], reverse=True)
+    scores = scorer.score(query, [result['product'] for result in others])
+    for result, score in zip(others, scores):
+        result['match_score'] = score
     
-    print(f"\nFound {len(all_results)} matching markets:")
+    # Best matches first; a bounded heap instead of sorting every hit
+    top_results = top_matches(others, 10)
+    
+    print(f"\nFound {total} matching markets ({matched_rows} rows across snapshots):")
     print("=" * 80)
     
-    for i, result in enumerate(all_results[:10]):  # Show top 10
+    for i, result in enumerate(top_results):  # Show top 10
         print(f"\n Match {i+1} (Score: {result['match_score']:.2f})")
         print(f" Product: {result['product']}")
         print(f"Confidence: {result['confidence']}")
@@ -71,33 +95,102 @@ def search_markets(query, csv_files=None):
         print(f"Kalshi Price: {result['kalshi_price']}")
         print(f"Polymarket Price: {result['polymarket_price']}")
         print(f"Source: {result['file']}")
+        if result['snapshots'] > 1:
+            print(f"Seen in {result['snapshots']} snapshots")
+        if show_history:
+            for seen in result['history']:
+                print(f"   {seen['file']}: Kalshi {seen['kalshi_price']}, Polymarket {seen['polymarket_price']}")
         print("-" * 40)
     
-    if len(all_results) > 10:
-        print(f"\n... and {len(all_results) - 10} more matches")
+    if total > 10:
+        print(f"\n... and {total - 10} more matches")
     
-    return all_results
+    return top_results
 
-def calculate_match_score(query, product_text):
-    """Calculate how well a product matches the search query"""
-    query_words = set(re.findall(r'\w+', query.lower()))
-    product_words = set(re.findall(r'\w+', product_text.lower()))
-    
-    # Exact word matches
-    exact_matches = query_words.intersection(product_words)
-    
-    # Partial matches (e.g., "bitcoin" matches "Bitcoin")
-    partial_matches = sum(1 for qw in query_words 
-                         for pw in product_words 
-                         if qw in pw or pw in qw)
-    
-    # Length bonus for longer queries
-    length_bonus = len(query_words) * 0.1
-    
-    score = len(exact_matches) * 2 + partial_matches * 0.5 + length_bonus
-    return score
+def fuzzy_search_markets(query, index_path=DEFAULT_INDEX_PATH, cutoff=0.3, limit=10):
+    """Typo-tolerant search over the token index, e.g. 'bitcon' finds Bitcoin markets"""
+    print(f"Fuzzy searching for: '{query}' (similarity cutoff {cutoff:g})")
+    print("=" * 60)
+
+    # Fuzzy matching needs the index's vocabulary, so it is built or refreshed from the snapshots first
+    index = SearchIndex(index_path)
+    index.update(verify=False)
+    start = time.perf_counter()
+    top_results, total = index.fuzzy_search(query, cutoff=cutoff, k=limit)
+    elapsed = time.perf_counter() - start
+    index.close()
+
+    if not top_results:
+        print(f"No markets found matching '{query}'")
+        return
+
+    # Like --search, each market is shown once, from the newest snapshot listing it
+    print(f"\nFound {total} matching markets in {elapsed * 1000:.1f} ms:")
+    print("=" * 80)
+
+    for i, result in enumerate(top_results):
+        print(f"\n Match {i+1} (Similarity: {result['similarity']:.2f})")
+        print(f" Product: {result['product']}")
+        print(f"Confidence: {result['confidence']}")
+        print(f"Total Entries: {result['total_entries']}")
+        print(f"Kalshi Price: {result['kalshi_price']}")
+        print(f"Polymarket Price: {result['polymarket_price']}")
+        print(f"Source: {result['file']}")
+        if result['snapshots'] > 1:
+            print(f"Seen in {result['snapshots']} snapshots")
+        print("-" * 40)
+
+    if total > limit:
+        print(f"\n... and {total - limit} more matches")
+
+    return top_results
 
-def run_pipeline(use_mock: bool):
+def price_history(product, history_path=DEFAULT_HISTORY_PATH, days=30):
+    """Print how one product's prices moved over the last `days` days"""
+    if not os.path.exists(history_path):
+        print(f"No history store at {history_path}. Run the pipeline with --history-db first.")
+        return []
+    store = HistoryStore(history_path)
+    start = time.perf_counter()
+    rows = store.price_history(product, since=time.time() - days * 86400)
+    elapsed = time.perf_counter() - start
+    store.close()
+
+    print(f"Price history for '{product}' over the last {days:g} days ({len(rows)} observations, "
+          f"{elapsed * 1000:.1f} ms)")
+    print("=" * 80)
+    for row in rows:
+        taken = time.strftime("%Y-%m-%d %H:%M", time.localtime(row["taken_at"]))
+        probability = f"{row['probability']:.3f}" if row["probability"] is not None else "N/A"
+        change = f"{row['change_bps']:+.0f} bps" if row["change_bps"] is not None else ""
+        print(f"{taken}  {row['site']:<18} {probability:>6}  {change:>9}  {row['price'] or 'N/A'}")
+    if not rows:
+        print("No observations; the product name must match the unified product title")
+    return rows
+
+def save_recordings(scrapers, record_dir):
+    """Write each API scraper's recorded payloads to <record_dir>/<site>.json for offline replay"""
+    if not record_dir:
+        return
+    from scrapers.api_client import save_recording
+    for scraper in scrapers:
+        recording = getattr(scraper, "recording", None)
+        if recording:
+            site = scraper.__class__.__name__.replace("Scraper", "").lower()
+            path = os.path.join(record_dir, f"{site}.json")
+            save_recording(recording, path)
+            print(f"Recorded {len(recording)} API responses to {path}")
+
+def run_pipeline(use_mock: bool, matcher_name: str = "difflib", state_path: str = None,
+                 sim_cache_path: str = None, workers: int = 1, index_path: str = DEFAULT_INDEX_PATH,
+                 output_format: str = "csv", store_dir: str = "snapshots", concurrent: bool = False,
+                 scraper_timeout: float = None, deadline: float = None, mock_delays=None,
+                 browser_pool: int = 0, fetch_mode: str = "browser", stream: bool = False,
+                 max_clusters: int = 20000, min_spread: float = 0.0, history_path: str = None,
+                 changes_path: str = None, crawl_concurrency: int = 3, blocking: bool = False,
+                 record_dir: str = None, metrics: RunMetrics = None):
+    # A throwaway recorder keeps the stage timing below unconditional
+    metrics = metrics if metrics is not None else RunMetrics()
     print("Starting prediction market data collection pipeline...")
     print(f"Mode: {'Mock Data' if use_mock else 'Live Scraping'}")
     print("=" * 60)
@@ -108,33 +201,87 @@ def run_pipeline(use_mock: bool):
         print(f"Random seed: {random.randint(1000, 9999)}")
     
     # Step 1: Collect data
+    pool = None
     if use_mock:
+        from scrapers.mock_scraper import MockScraper
         print("Using mock data for testing...")
-        scrapers = [MockScraper("Polymarket"), MockScraper("Kalshi"), MockScraper("PredictionMarket")]
+        delays = mock_delays or [0]
+        sites = ["Polymarket", "Kalshi", "PredictionMarket"]
+        scrapers = [MockScraper(site, delays[i % len(delays)]) for i, site in enumerate(sites)]
     else:
+        from scrapers.polymarket_scraper import PolymarketScraper
+        from scrapers.kalshi_scraper import KalshiScraper
+        from scrapers.prediction_market_scraper import PredictionMarketScraper
+        from scrapers.browser_pool import BrowserPool
         print("Using live scrapers...")
         # Randomize the order of scrapers to get different results
-        scrapers = [PolymarketScraper(), KalshiScraper(), PredictionMarketScraper()]
+        if browser_pool:
+            # Warm sessions shared by all scrapers instead of a cold Chrome start per site
+            pool = BrowserPool(browser_pool)
+            pool.warm()
+        # Each API scraper keeps its payloads in its own dict when the run is recorded
+        scrapers = [PolymarketScraper(pool, fetch_mode=fetch_mode, concurrency=crawl_concurrency,
+                                      recording={} if record_dir else None),
+                    KalshiScraper(pool, fetch_mode=fetch_mode, concurrency=crawl_concurrency,
+                                  recording={} if record_dir else None),
+                    PredictionMarketScraper(pool)]
         random.shuffle(scrapers)
         print("Scraper order randomized for variety")
 
+    if stream:
+        stream_pipeline(scrapers, sim_cache_path=sim_cache_path, deadline=deadline,
+                        max_clusters=max_clusters, pool=pool, metrics=metrics)
+        save_recordings(scrapers, record_dir)
+        return
+
+    from utils.scrape_runner import run_scrapers
+    from utils.semantic_matcher import SemanticMatcher
+    from utils.similarity_cache import SimilarityCache
+    from utils.csv_writer import CSVWriter
+
+    changes = None
+    if changes_path:
+        # Records that hash the same as last run are dropped by the scrapers themselves
+        from utils.change_detector import ChangeDetector
+        changes = ChangeDetector(changes_path)
+        for scraper in scrapers:
+            scraper.changes = changes
+
+    metrics.begin("scrape")
     all_data = []
     successful_scrapers = 0
     
-    for i, scraper in enumerate(scrapers):
-        print(f"\n{'='*20} Scraper {i+1}/{len(scrapers)} {'='*20}")
-        try:
-            site_data = scraper.fetch_data()
-            if site_data:
-                print(f"Data from {scraper.__class__.__name__}: {len(site_data)} items")
-                print(f"Sample: {site_data[0] if site_data else 'None'}")
-                successful_scrapers += 1
-            else:
-                print(f"No data returned from {scraper.__class__.__name__}")
-            all_data.append(site_data)
-        except Exception as e:
-            print(f"Error fetching from {scraper.__class__.__name__}: {e}")
-            all_data.append([])
+    if concurrent:
+        # All scrapers at once: wall time tracks the slowest one, bounded by the timeouts
+        print(f"\nRunning {len(scrapers)} scrapers concurrently...")
+        all_data, outcomes = run_scrapers(scrapers, timeout=scraper_timeout, deadline=deadline)
+        successful_scrapers = outcomes.count("ok")
+    else:
+        for i, scraper in enumerate(scrapers):
+            print(f"\n{'='*20} Scraper {i+1}/{len(scrapers)} {'='*20}")
+            try:
+                site_data = scraper.fetch_data()
+                if site_data:
+                    print(f"Data from {scraper.__class__.__name__}: {len(site_data)} items")
+                    print(f"Sample: {site_data[0] if site_data else 'None'}")
+                    successful_scrapers += 1
+                else:
+                    print(f"No data returned from {scraper.__class__.__name__}")
+                all_data.append(site_data)
+            except Exception as e:
+                print(f"Error fetching from {scraper.__class__.__name__}: {e}")
+                all_data.append([])
+    metrics.end("scrape")
+    save_recordings(scrapers, record_dir)
+
+    if pool is not None:
+        pool.report()
+        pool.close()
+    for scraper in scrapers:
+        readiness = getattr(scraper, "readiness", None)
+        if readiness is not None and readiness.timings:
+            print(f"{scraper.__class__.__name__} page readiness: median {readiness.median():.1f}s "
+                  f"over {len(readiness.timings)} pages")
 
     print(f"\n{'='*60}")
     print(f"Total data collected: {len(all_data)} sites, {sum(len(data) for data in all_data)} total items")
@@ -142,6 +289,17 @@ def run_pipeline(use_mock: bool):
     
     # Check if we have any data to process
     total_items = sum(len(data) for data in all_data)
+    metrics.count("items", total_items)
+    metrics.count("successful_scrapers", successful_scrapers)
+    metrics.set("scrapers", len(scrapers))
+    if changes is not None:
+        changes.report()
+        metrics.count("records_processed", changes.processed)
+        metrics.count("records_skipped", changes.skipped)
+        if total_items == 0 and changes.skipped:
+            print("No changes since the last run")
+            changes.save()
+            return
     if total_items == 0:
         print("No data collected from any scraper!")
         if not use_mock:
@@ -151,39 +309,313 @@ def run_pipeline(use_mock: bool):
     
     # Step 2: Semantic product unification
     print(f"\nStarting semantic product unification...")
-    matcher = SemanticMatcher()
+    metrics.begin("unify")
+    if matcher_name == "tfidf":
+        # scipy is only needed for this backend, so import it on demand
+        from utils.tfidf_matcher import TfidfMatcher
+        matcher = TfidfMatcher()
+    else:
+        # The similarity cache keeps an in-process LRU and, with a path, a SQLite layer
+        cache = SimilarityCache(path=sim_cache_path) if sim_cache_path else None
+        matcher = SemanticMatcher(cache=cache, workers=workers, blocking=blocking)
+        if state_path:
+            # Reuse last run's clusters so only new items need scoring
+            matcher.load_state(state_path)
+    print(f"Matcher: {matcher.__class__.__name__}")
     unified_products = matcher.unify(all_data)
+    if state_path and hasattr(matcher, "save_state"):
+        matcher.save_state(state_path)
+    if getattr(matcher, "cache", None) is not None:
+        matcher.cache.report()
+        matcher.cache.close()
+    metrics.end("unify")
+    metrics.count("pairs_scored", matcher.pairs_scored)
+    metrics.count("groups", len(unified_products))
     
     print(f"Unified products: {len(unified_products)} groups")
 
-    # Step 3: Export to CSV with timestamp
-    print(f"\nExporting to CSV...")
+    # Step 3: Export to CSV (or the Parquet snapshot store) with timestamp
+    metrics.begin("write")
     timestamp = int(time.time())
-    filename = f"unified_products_{timestamp}.csv"
-    writer = CSVWriter(filename)
+    if changes is not None:
+        # Only the delta is written; unchanged markets stay as they were in earlier snapshots.
+        # The full snapshot, the price history, the search index and the spreads file are
+        # all built from complete runs, so a changes run skips every one of them.
+        from utils.change_detector import write_changes
+        filename = f"changes_{timestamp}.csv"
+        rows = write_changes(filename, unified_products)
+        changes.save()
+        metrics.end("write")
+        print(f"Changes since the last run written to {filename} ({rows} records)")
+        print("Snapshot, price history, search index and spreads are not written in --changes mode")
+        return
+    if output_format == "parquet":
+        # pyarrow is only needed for the columnar store, so import it on demand
+        from utils.columnar_store import ParquetWriter
+        print(f"\nExporting to Parquet...")
+        writer = ParquetWriter(store_dir, timestamp)
+        filename = writer.filename
+    else:
+        print(f"\nExporting to CSV...")
+        filename = f"unified_products_{timestamp}.csv"
+        writer = CSVWriter(filename, index_path=index_path, history_path=history_path)
     writer.write(unified_products)
+    metrics.end("write")
 
     print("Unified product board generated: " + filename)
     print(f"File location: {writer.filename}")
     print(f"Total unified products: {len(unified_products)}")
     print(f"Timestamp: {timestamp}")
 
+    # Step 4: Cross-venue spreads over all groups at once
+    from utils.spread_analyzer import SpreadAnalyzer
+    metrics.begin("analyze")
+    analyzer = SpreadAnalyzer(min_spread=min_spread)
+    table = analyzer.analyze(unified_products)
+    spreads = analyzer.rows(unified_products, table, analyzer.rank(table))
+    metrics.end("analyze")
+    metrics.count("arbitrage", int(table["arbitrage"].sum()))
+    if spreads:
+        spreads_file = f"spreads_{timestamp}.csv"
+        analyzer.write(spreads_file, spreads)
+        print(f"\nCross-venue spreads of at least {min_spread:g} ({len(spreads)} groups, widest first):")
+        analyzer.report(spreads)
+        print(f"Spreads written to {spreads_file}")
+    else:
+        print(f"\nNo groups quoted on two or more venues with a spread of at least {min_spread:g}")
+
+def stream_pipeline(scrapers, sim_cache_path: str = None, deadline: float = None,
+                    max_clusters: int = 20000, pool=None, metrics: RunMetrics = None):
+    """Match and write each record as the scrapers produce it, holding only a bounded set of clusters"""
+    from utils.scrape_runner import stream_scrapers
+    from utils.similarity_cache import SimilarityCache
+    from utils.online_matcher import OnlineMatcher
+    from utils.csv_writer import StreamingCSVWriter
+
+    start = time.perf_counter()
+    print(f"\nStreaming {len(scrapers)} scrapers through the online matcher...")
+
+    cache = SimilarityCache(path=sim_cache_path) if sim_cache_path else None
+    matcher = OnlineMatcher(max_clusters=max_clusters, cache=cache)
+    filename = f"streamed_products_{int(time.time())}.csv"
+    writer = StreamingCSVWriter(filename)
+    if metrics is not None:
+        metrics.begin("stream")
+    try:
+        for match in matcher.stream(stream_scrapers(scrapers, deadline=deadline)):
+            writer.write(match)
+    finally:
+        writer.close()
+        if pool is not None:
+            pool.report()
+            pool.close()
+        if cache is not None:
+            cache.report()
+            cache.close()
+
+    stats = matcher.stats()
+    elapsed = time.perf_counter() - start
+    if metrics is not None:
+        metrics.end("stream")
+        metrics.count("items", stats["records"])
+        metrics.count("pairs_scored", stats["pairs_scored"])
+        metrics.count("groups", stats["clusters"])
+        metrics.set("evicted_clusters", stats["evicted"])
+        if writer.first_row_at is not None:
+            metrics.set("time_to_first_row_seconds", round(writer.first_row_at - start, 4))
+    print(f"\n{'='*60}")
+    print(f"Streamed {stats['records']} records into {stats['clusters']} clusters "
+          f"({stats['live_clusters']} live, {stats['evicted']} evicted)")
+    if writer.first_row_at is not None:
+        print(f"Time to first row: {writer.first_row_at - start:.2f}s")
+    else:
+        print("No rows written")
+    print(f"Total time: {elapsed:.2f}s")
+    peak = peak_rss_mb()
+    if peak is not None:
+        print(f"Peak RSS: {peak:.1f} MB")
+    print(f"File location: {filename}")
+
+def serve_markets(use_mock: bool, refresh_intervals=None, port: int = 8765, socket_path: str = None,
+                  sim_cache_path: str = None, browser_pool: int = 0, fetch_mode: str = "browser",
+                  mock_delays=None, crawl_concurrency: int = 3):
+    """Keep scrapers and the unified markets warm and answer queries until interrupted"""
+    from utils.market_service import MarketService
+    from utils.semantic_matcher import SemanticMatcher
+    from utils.similarity_cache import SimilarityCache
+
+    print("Starting prediction market service...")
+    print(f"Mode: {'Mock Data' if use_mock else 'Live Scraping'}")
+    print("=" * 60)
+
+    pool = None
+    if use_mock:
+        from scrapers.mock_scraper import MockScraper
+        delays = mock_delays or [0]
+        sites = ["Polymarket", "Kalshi", "PredictionMarket"]
+        scrapers = [MockScraper(site, delays[i % len(delays)]) for i, site in enumerate(sites)]
+    else:
+        from scrapers.polymarket_scraper import PolymarketScraper
+        from scrapers.kalshi_scraper import KalshiScraper
+        from scrapers.prediction_market_scraper import PredictionMarketScraper
+        from scrapers.browser_pool import BrowserPool
+        # Warm sessions live as long as the service; every site can refresh at once by default
+        pool = BrowserPool(browser_pool or 3)
+        pool.warm()
+        scrapers = [PolymarketScraper(pool, fetch_mode=fetch_mode, concurrency=crawl_concurrency),
+                    KalshiScraper(pool, fetch_mode=fetch_mode, concurrency=crawl_concurrency),
+                    PredictionMarketScraper(pool)]
+
+    cache = SimilarityCache(path=sim_cache_path) if sim_cache_path else None
+    service = MarketService(scrapers, refresh_intervals or [300], matcher=SemanticMatcher(cache=cache),
+                            port=port, socket_path=socket_path)
+    for name, site in service.sites.items():
+        print(f"Refreshing {name} every {site['interval']:g}s")
+    try:
+        service.serve_forever()
+    finally:
+        service.report()
+        if pool is not None:
+            pool.report()
+            pool.close()
+        if cache is not None:
+            cache.close()
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Prediction Market Data Collection Pipeline")
     parser.add_argument("--mock", action="store_true", help="Run with mock data instead of live scraping")
     parser.add_argument("--live", action="store_true", help="Run with live data scraping")
     parser.add_argument("--search", type=str, help="Search for specific markets (e.g., 'bitcoin price')")
+    parser.add_argument("--fuzzy", action="store_true",
+                        help="With --search, tolerate typos by matching words on trigram similarity (uses the index)")
+    parser.add_argument("--cutoff", type=float, default=0.3,
+                        help="Minimum trigram similarity of each query word for --fuzzy (0-1)")
+    parser.add_argument("--history", action="store_true",
+                        help="With --search, list every snapshot each market was found in, not just the newest")
+    parser.add_argument("--index", action="store_true", help="Build or refresh the search index from existing CSV files")
+    parser.add_argument("--index-path", type=str, default=DEFAULT_INDEX_PATH, help="Search index database file")
+    parser.add_argument("--format", choices=["csv", "parquet"], default="csv",
+                        help="Output format; parquet appends to a date-partitioned columnar snapshot store")
+    parser.add_argument("--store-dir", type=str, default="snapshots", help="Root of the Parquet snapshot store")
+    parser.add_argument("--matcher", choices=["difflib", "tfidf"], default="difflib",
+                        help="Product unification backend (tfidf uses sparse char n-gram vectors)")
+    parser.add_argument("--blocking", action="store_true",
+                        help="Only compare titles sharing character shingles (difflib matcher); much faster "
+                             "on large runs, but may miss a few matches the exhaustive scan finds")
+    parser.add_argument("--state", type=str,
+                        help="Matcher state file for incremental unification across runs (difflib only)")
+    parser.add_argument("--sim-cache", type=str,
+                        help="SQLite file that memoizes pairwise similarity scores across runs (difflib only)")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Worker processes for product unification (difflib only)")
+    parser.add_argument("--concurrent", action="store_true",
+                        help="Run all scrapers at the same time instead of one after another")
+    parser.add_argument("--scraper-timeout", type=float,
+                        help="Seconds each scraper may run in --concurrent mode before it is dropped")
+    parser.add_argument("--deadline", type=float,
+                        help="Seconds after which --concurrent mode continues with whatever data has arrived")
+    parser.add_argument("--mock-delay", type=float, nargs="+",
+                        help="Simulated fetch time per mock scraper in seconds (one value, or one per site)")
+    parser.add_argument("--browser-pool", type=int, default=0,
+                        help="Number of warm browser sessions shared by the live scrapers (0 starts one per scraper)")
+    parser.add_argument("--crawl-concurrency", type=int, default=3,
+                        help="Listing pages the Polymarket and Kalshi browser crawls load at once (capped by --browser-pool)")
+    parser.add_argument("--fetch-mode", choices=["browser", "api"], default="browser",
+                        help="How Polymarket and Kalshi are fetched; api reads their JSON APIs and falls back to the browser")
+    parser.add_argument("--record", type=str, metavar="DIR",
+                        help="With --live --fetch-mode api, save every API response under DIR as <site>.json "
+                             "fixtures that FixtureServer replays offline")
+    parser.add_argument("--stream", action="store_true",
+                        help="Match and write records as they arrive instead of after all scrapers finish")
+    parser.add_argument("--max-clusters", type=int, default=20000,
+                        help="Cluster representatives kept in memory in --stream mode")
+    parser.add_argument("--min-spread", type=float, default=0.0,
+                        help="Only list groups whose cross-venue probability spread is at least this (0-1)")
+    parser.add_argument("--history-db", type=str,
+                        help="Also append every CSV snapshot to this SQLite price history store")
+    parser.add_argument("--price-history", type=str,
+                        help="Print the price history of one product from the --history-db store")
+    parser.add_argument("--days", type=float, default=30, help="How far back --price-history looks")
+    parser.add_argument("--changes", type=str, nargs="?", const="change_hashes.json",
+                        help="Skip records unchanged since the last run and write only the changes to changes_<ts>.csv "
+             "(hash file, default change_hashes.json). Needs --state so cluster ids match across runs; "
+             "no CSV or Parquet snapshot, --history-db rows, search index update or spreads file is written")
+    parser.add_argument("--serve", action="store_true",
+                        help="Run as a service that refreshes each site on a schedule and answers queries over HTTP")
+    parser.add_argument("--port", type=int, default=8765, help="Local HTTP port for --serve")
+    parser.add_argument("--socket", type=str, help="Serve on this Unix socket instead of the HTTP port")
+    parser.add_argument("--refresh-interval", type=float, nargs="+",
+                        help="Seconds between refreshes of each site in --serve mode (one value, or one per site)")
+    parser.add_argument("--metrics", type=str,
+                        help="Write per-stage timings and counters to this file (.json for JSON, otherwise Prometheus text)")
+    parser.add_argument("--profile", type=str,
+                        help="Run the pipeline under cProfile and write the stats to this file")
+    parser.add_argument("--trace-memory", action="store_true",
+                        help="Track Python allocations with tracemalloc and report the traced peak")
     args = parser.parse_args()
+    if args.stream and args.changes:
+        parser.error("--changes is not supported with --stream: streamed runs write every record")
+    if args.changes and (not args.state or args.matcher != "difflib"):
+        # Without persisted clusters a changed record gets a fresh Cluster_ID every run
+        parser.error("--changes needs --state (difflib matcher) so Cluster_IDs in the changes file are stable across runs")
+    if args.record and (args.fetch_mode != "api" or not args.live or args.serve):
+        parser.error("--record needs --live --fetch-mode api (pipeline runs only)")
 
-    if args.search:
+    metrics = RunMetrics(profile=bool(args.profile), trace_memory=args.trace_memory)
+    metrics.start()
+
+    if args.serve:
+        # Service mode
+        serve_markets(use_mock=args.mock, refresh_intervals=args.refresh_interval, port=args.port,
+                      socket_path=args.socket, sim_cache_path=args.sim_cache,
+                      browser_pool=args.browser_pool, fetch_mode=args.fetch_mode, mock_delays=args.mock_delay,
+                      crawl_concurrency=args.crawl_concurrency)
+    elif args.price_history:
+        # History mode
+        price_history(args.price_history, args.history_db or DEFAULT_HISTORY_PATH, days=args.days)
+    elif args.index:
+        # Index mode
+        index = SearchIndex(args.index_path)
+        indexed = index.update()
+        index.close()
+        print(f"Search index {args.index_path}: {indexed} new rows indexed")
+    elif args.search and args.fuzzy:
+        # Fuzzy search mode
+        fuzzy_search_markets(args.search, index_path=args.index_path, cutoff=args.cutoff)
+    elif args.search:
         # Search mode
-        search_markets(args.search)
+        search_markets(args.search, index_path=args.index_path, store_dir=args.store_dir,
+                       show_history=args.history)
     elif not args.mock and not args.live:
         # Default to mock if no arguments provided
         print("No mode specified. Use --mock for testing, --live for production, or --search to find markets.")
         print("Running with mock data for safety...")
         args.mock = True
-        run_pipeline(use_mock=args.mock)
+        run_pipeline(use_mock=args.mock, matcher_name=args.matcher, state_path=args.state,
+                     sim_cache_path=args.sim_cache, workers=args.workers,
+                     index_path=args.index_path, output_format=args.format, store_dir=args.store_dir,
+                     concurrent=args.concurrent, scraper_timeout=args.scraper_timeout,
+                     deadline=args.deadline, mock_delays=args.mock_delay, browser_pool=args.browser_pool,
+                     fetch_mode=args.fetch_mode, stream=args.stream, max_clusters=args.max_clusters,
+                     min_spread=args.min_spread, history_path=args.history_db, changes_path=args.changes,
+                     crawl_concurrency=args.crawl_concurrency, blocking=args.blocking,
+                     record_dir=args.record, metrics=metrics)
     else:
         # Normal pipeline mode
-        run_pipeline(use_mock=args.mock)
+        run_pipeline(use_mock=args.mock, matcher_name=args.matcher, state_path=args.state,
+                     sim_cache_path=args.sim_cache, workers=args.workers,
+                     index_path=args.index_path, output_format=args.format, store_dir=args.store_dir,
+                     concurrent=args.concurrent, scraper_timeout=args.scraper_timeout,
+                     deadline=args.deadline, mock_delays=args.mock_delay, browser_pool=args.browser_pool,
+                     fetch_mode=args.fetch_mode, stream=args.stream, max_clusters=args.max_clusters,
+                     min_spread=args.min_spread, history_path=args.history_db, changes_path=args.changes,
+                     crawl_concurrency=args.crawl_concurrency, blocking=args.blocking,
+                     record_dir=args.record, metrics=metrics)
+
+    metrics.stop()
+    if args.profile:
+        metrics.dump_profile(args.profile)
+    if (args.mock or args.live) and not args.serve:
+        metrics.report()
+    if args.metrics:
+        metrics.export(args.metrics)
@@ -0,0 +1,68 @@
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlencode
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+def request_key(path, params=None):
+    """Canonical path and query for a request, shared by the recorder and the fixture server"""
+    query = urlencode(sorted((params or {}).items()))
+    return f"{path}?{query}" if query else path
+
+
+def save_recording(recording, filename):
+    """Write recorded payloads as a fixture file that FixtureServer replays"""
+    os.makedirs(os.path.dirname(filename) or ".", exist_ok=True)
+    with open(filename, "w", encoding="utf-8") as f:
+        json.dump(recording, f)
+
+
+class ApiClient:
+    """Keep-alive JSON client with a bounded connection pool, used by the API fetch modes"""
+
+    def __init__(self, base_url, pool_size=8, timeout=10, retries=2, recording=None):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.pool_size = pool_size
+
+        self.session = requests.Session()
+        self.session.headers.update({
+            "Accept": "application/json",
+            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+        })
+        adapter = HTTPAdapter(
+            pool_connections=pool_size,
+            pool_maxsize=pool_size,
+            max_retries=Retry(total=retries, backoff_factor=0.5, status_forcelist=[429, 500, 502, 503, 504]),
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        # With a dict, every payload is kept under its request key so a run can be replayed offline
+        self.recording = recording
+        self.lock = threading.Lock()
+
+    def get_json(self, path, params=None):
+        response = self.session.get(self.base_url + path, params=params, timeout=self.timeout)
+        response.raise_for_status()
+        payload = response.json()
+        if self.recording is not None:
+            with self.lock:
+                self.recording[request_key(path, params)] = payload
+        return payload
+
+    def iter_many(self, path, params_list):
+        """
+        Fetch several pages of one endpoint concurrently over the pooled connections, yielding
+        each page in order as soon as it and the ones before it arrived
+        """
+        with ThreadPoolExecutor(max_workers=min(self.pool_size, max(1, len(params_list)))) as executor:
+            yield from executor.map(lambda params: self.get_json(path, params), params_list)
+
+    def close(self):
+        self.session.close()
@@ -0,0 +1,256 @@
+from selenium import webdriver
+from selenium.webdriver.chrome.service import Service
+from selenium.webdriver.chrome.options import Options
+from webdriver_manager.chrome import ChromeDriverManager
+from contextlib import contextmanager
+import os
+import threading
+import time
+
+DEFAULT_DRIVER_CACHE = ".chromedriver_path"
+
+# Longest a lease waits for a free session before giving up, rather than hanging a scraper forever
+LEASE_TIMEOUT = 300.0
+
+_driver_path = None
+_driver_path_lock = threading.Lock()
+
+
+def driver_path(cache_file=DEFAULT_DRIVER_CACHE):
+    """Resolve the chromedriver binary once and remember it, in-process and across runs"""
+    global _driver_path
+    with _driver_path_lock:
+        if _driver_path and os.path.exists(_driver_path):
+            return _driver_path
+
+        if cache_file and os.path.exists(cache_file):
+            with open(cache_file) as f:
+                cached = f.read().strip()
+            if cached and os.path.exists(cached):
+                _driver_path = cached
+                return _driver_path
+
+        _driver_path = ChromeDriverManager().install()
+        if cache_file:
+            with open(cache_file, "w") as f:
+                f.write(_driver_path)
+        return _driver_path
+
+
+def chrome_options():
+    """Options shared by every scraper session"""
+    chrome_options = Options()
+    chrome_options.add_argument("--no-sandbox")
+    chrome_options.add_argument("--disable-dev-shm-usage")
+    chrome_options.add_argument("--disable-gpu")
+    chrome_options.add_argument("--window-size=1920,1080")
+    chrome_options.add_argument("--disable-cache")  # Disable caching
+    chrome_options.add_argument("--disable-application-cache")
+    chrome_options.add_argument("--disable-offline-load-stale-cache")
+    chrome_options.add_argument("--disk-cache-size=0")
+    chrome_options.add_argument("--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36")
+    return chrome_options
+
+
+def new_driver(options=None):
+    service = Service(driver_path())
+    return webdriver.Chrome(service=service, options=options or chrome_options())
+
+
+def open_driver(pool=None, options=None):
+    """A leased session from the pool, or a fresh browser when there is no pool"""
+    if pool is not None:
+        return pool.acquire()
+    return new_driver(options)
+
+
+def close_driver(driver, pool=None):
+    """Hand a session back to its pool, or quit it when it was not leased"""
+    if pool is not None:
+        pool.release(driver)
+    else:
+        driver.quit()
+
+
+def abandon_driver(driver, pool=None):
+    """Give a session up from another thread while it may still be in use: quit it, and free its pool slot now"""
+    if pool is not None:
+        pool.discard(driver)
+    else:
+        try:
+            driver.quit()
+        except Exception:
+            pass
+
+
+class BrowserPool:
+    """Keeps up to `size` warm Chrome sessions that scrapers lease and hand back with state reset"""
+
+    def __init__(self, size=2):
+        self.size = size
+        self.idle = []
+        # Sessions handed out and not yet released or discarded
+        self.leased = set()
+        self.uses = {}
+        self.created = 0
+        self.closed = False
+        self.condition = threading.Condition()
+
+        self.leases = 0
+        self.reuses = 0
+        self.discarded = 0
+        self.wait_times = []
+
+    def warm(self):
+        """Start every session up front so the first leases do not pay for a cold start"""
+        while True:
+            with self.condition:
+                if self.created >= self.size:
+                    return
+                self.created += 1
+            driver = self._start()
+            if driver is not None:
+                with self.condition:
+                    self.idle.append(driver)
+                    self.condition.notify()
+
+    def acquire(self, timeout=LEASE_TIMEOUT):
+        start = time.perf_counter()
+        with self.condition:
+            while not self.closed and not self.idle and self.created >= self.size:
+                if not self.condition.wait(timeout=timeout):
+                    raise TimeoutError(f"No browser session free after {timeout}s")
+            if self.closed:
+                raise RuntimeError("Browser pool is closed")
+            if self.idle:
+                driver = self.idle.pop()
+            else:
+                # Reserve the slot before starting Chrome outside the lock
+                self.created += 1
+                driver = None
+
+        if driver is None:
+            driver = self._start()
+            if driver is None:
+                raise RuntimeError("Could not start a browser session")
+
+        with self.condition:
+            closed = self.closed
+            if not closed:
+                self.leased.add(driver)
+        if closed:
+            # The pool was closed while this session started, so nothing would ever quit it
+            self._quit(driver)
+            raise RuntimeError("Browser pool is closed")
+
+        with self.condition:
+            self.leases += 1
+            if self.uses.get(id(driver)):
+                self.reuses += 1
+            self.uses[id(driver)] = self.uses.get(id(driver), 0) + 1
+            self.wait_times.append(time.perf_counter() - start)
+        return driver
+
+    def release(self, driver):
+        with self.condition:
+            if driver not in self.leased:
+                # Discarded while its holder was still using it
+                return
+            self.leased.discard(driver)
+            closed = self.closed
+        if closed:
+            self._quit(driver)
+            return
+        try:
+            self._reset(driver)
+        except Exception as e:
+            # A session that cannot be reset (crashed, or quit by a timeout) is replaced later
+            print(f"Discarding browser session: {e}")
+            self._discard(driver)
+            return
+        with self.condition:
+            self.idle.append(driver)
+            self.condition.notify()
+
+    def discard(self, driver):
+        """Quit a leased session for good, e.g. one an abandoned scraper is stuck on, and free its slot at once"""
+        with self.condition:
+            if driver not in self.leased:
+                return
+            self.leased.discard(driver)
+        self._discard(driver)
+
+    @contextmanager
+    def lease(self, timeout=LEASE_TIMEOUT):
+        driver = self.acquire(timeout)
+        try:
+            yield driver
+        finally:
+            self.release(driver)
+
+    def close(self):
+        """Quit every session, including ones still leased to scrapers the runner gave up on"""
+        with self.condition:
+            self.closed = True
+            drivers = self.idle + list(self.leased)
+            self.idle = []
+            self.leased.clear()
+            self.condition.notify_all()
+        for driver in drivers:
+            self._quit(driver)
+
+    def stats(self):
+        waits = self.wait_times
+        return {
+            "sessions": self.created,
+            "leases": self.leases,
+            "reuses": self.reuses,
+            "discarded": self.discarded,
+            "wait_avg": round(sum(waits) / len(waits), 4) if waits else 0.0,
+            "wait_max": round(max(waits), 4) if waits else 0.0,
+        }
+
+    def report(self):
+        stats = self.stats()
+        print(f"Browser pool: {stats['sessions']} sessions, {stats['leases']} leases, {stats['reuses']} reuses, "
+              f"{stats['discarded']} discarded, lease wait avg {stats['wait_avg']:.2f}s max {stats['wait_max']:.2f}s")
+
+    def _start(self):
+        try:
+            return new_driver()
+        except Exception as e:
+            print(f"Failed to start browser session: {e}")
+            with self.condition:
+                self.created -= 1
+                self.condition.notify()
+            return None
+
+    def _quit(self, driver):
+        try:
+            driver.quit()
+        except Exception:
+            pass
+
+    def _discard(self, driver):
+        self._quit(driver)
+        with self.condition:
+            self.uses.pop(id(driver), None)
+            self.created -= 1
+            self.discarded += 1
+            self.condition.notify()
+
+    def _reset(self, driver):
+        """Leave the session as a fresh one would be: one blank tab, no cookies, storage or cache"""
+        handles = driver.window_handles
+        for handle in handles[1:]:
+            driver.switch_to.window(handle)
+            driver.close()
+        driver.switch_to.window(handles[0])
+        driver.execute_script("try { localStorage.clear(); sessionStorage.clear(); } catch (e) {}")
+        try:
+            # Every domain, not only the current page's as delete_all_cookies would
+            driver.execute_cdp_cmd("Network.clearBrowserCookies", {})
+            driver.execute_cdp_cmd("Network.clearBrowserCache", {})
+        except Exception:
+            driver.delete_all_cookies()
+        driver.get("about:blank")
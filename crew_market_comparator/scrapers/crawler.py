@@ -0,0 +1,272 @@
+from scrapers.browser_pool import open_driver, close_driver, abandon_driver
+from scrapers.dom_extract import extract_elements
+from scrapers.page_readiness import PageReadiness
+from utils.metrics import PhaseTimer
+from collections import deque
+from urllib.parse import urldefrag, urlsplit
+import threading
+import time
+
+# Links to further listing pages: "next" buttons and numbered page links
+NEXT_SELECTORS = [
+    "a[rel='next']",
+    "link[rel='next']",
+    "[aria-label*='next' i]",
+    ".pagination a",
+    "nav[aria-label*='pagination' i] a",
+]
+
+# One round trip after each scroll: how tall the page is and how many listing elements it holds
+SCROLL_JS = """
+var selectors = arguments[0];
+window.scrollTo(0, document.body.scrollHeight);
+var count = 0;
+for (var i = 0; i < selectors.length; i++) {
+    try { count += document.querySelectorAll(selectors[i]).length; } catch (e) {}
+}
+return {height: document.body.scrollHeight, count: count};
+"""
+
+NEXT_JS = """
+var selectors = arguments[0];
+var links = [];
+for (var i = 0; i < selectors.length; i++) {
+    var elements;
+    try { elements = document.querySelectorAll(selectors[i]); } catch (e) { continue; }
+    for (var n = 0; n < elements.length; n++) {
+        var href = elements[n].href;
+        if (typeof href === 'string' && href) links.push(href);
+    }
+}
+return links;
+"""
+
+
+def normalize_url(url):
+    """Dedup key for a link: the URL without its fragment or a trailing slash"""
+    url = urldefrag(url)[0]
+    return url[:-1] if url.endswith("/") and urlsplit(url).path not in ("", "/") else url
+
+
+class MarketCrawler:
+    """
+    Deterministic full crawl of a market listing.
+
+    Every listing page is scrolled until no new elements load, pagination links are followed
+    to every page on the same host, and up to `concurrency` pages load at once, each in a
+    browser session leased from the pool. A worker hands its session back whenever the queue
+    is empty, so crawlers sharing a pool never wait on each other's idle sessions. Markets are
+    deduplicated by URL.
+
+    Pages finish in whatever order the network allows, so the result is ordered afterwards:
+    pages in breadth-first order of the links found, markets in page order. The same site
+    gives the same markets in the same order on every run.
+    """
+
+    def __init__(self, stages, pool=None, concurrency=3, readiness=None, next_selectors=None,
+                 max_pages=500, max_scrolls=100, scroll_cap=5.0):
+        self.stages = stages
+        self.pool = pool
+        # A pool never hands out more sessions than it holds, so more workers would only wait
+        self.concurrency = max(1, min(concurrency, pool.size) if pool is not None else concurrency)
+        self.readiness = readiness or PageReadiness([s for stage in stages for s in stage["selectors"]])
+        self.next_selectors = list(next_selectors or NEXT_SELECTORS)
+        self.max_pages = max_pages
+        self.max_scrolls = max_scrolls
+        self.scroll_cap = scroll_cap
+        self.reset()
+
+    def reset(self):
+        self.frontier = deque()
+        self.queued = set()
+        self.pages = {}
+        self.links = {}
+        self.errors = {}
+        self.in_flight = 0
+        self.condition = threading.Condition()
+        # Sessions the workers are using, so cancel() can quit them
+        self.drivers = []
+        self.cancelled = False
+        self.hosts = set()
+        self.markets = []
+        self.duplicates = 0
+        self.seconds = 0.0
+        # Seconds per phase summed over the workers, so they add up to more than the wall time
+        self.timings = PhaseTimer()
+
+    def crawl(self, start_urls):
+        """Markets on every listing page reachable from the start URLs, as [{"text", "href"}]"""
+        self.reset()
+        start_urls = [normalize_url(url) for url in start_urls]
+        self.hosts = {urlsplit(url).netloc for url in start_urls}
+        for url in start_urls:
+            self._enqueue(url)
+
+        start = time.perf_counter()
+        workers = [threading.Thread(target=self._work, daemon=True) for _ in range(self.concurrency)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        self.seconds = time.perf_counter() - start
+
+        self.markets = self._collect(start_urls)
+        return self.markets
+
+    def cancel(self):
+        """
+        Stop the crawl: no further pages load, and the sessions in use are quit and dropped
+        from the pool at once, so their slots are free even while a worker is still stuck.
+        """
+        with self.condition:
+            self.cancelled = True
+            self.frontier.clear()
+            drivers, self.drivers = self.drivers, []
+            self.condition.notify_all()
+        for driver in drivers:
+            abandon_driver(driver, self.pool)
+
+    def _enqueue(self, url):
+        """Queue a listing page unless it was seen before; the caller holds the condition or is alone"""
+        if self.cancelled or url in self.queued or len(self.queued) >= self.max_pages:
+            return
+        self.queued.add(url)
+        self.frontier.append(url)
+
+    def _next_url(self, block=True):
+        """The next page to load, or None once nothing is queued or loading (or right away unless `block`)"""
+        with self.condition:
+            while block and not self.frontier and self.in_flight and not self.cancelled:
+                self.condition.wait()
+            if not self.frontier:
+                return None
+            self.in_flight += 1
+            return self.frontier.popleft()
+
+    def _work(self):
+        driver = None
+        timer = PhaseTimer()
+        try:
+            while True:
+                # A pooled session is never held while waiting for other pages to yield links:
+                # another crawler on the same pool may need it to make progress
+                url = self._next_url(block=driver is None or self.pool is None)
+                if url is None and driver is not None and self.pool is not None:
+                    self._release(driver)
+                    driver = None
+                    continue
+                if url is None:
+                    return
+                timer.skip()
+                items, links = [], []
+                try:
+                    if driver is None:
+                        driver = open_driver(self.pool)
+                        with self.condition:
+                            self.drivers.append(driver)
+                        if self.cancelled:
+                            raise RuntimeError("crawl cancelled")
+                        timer.lap("driver_start")
+                    items, links = self._load(driver, url, timer)
+                except Exception as e:
+                    self.errors[url] = str(e)
+                    print(f" Crawl of {url} failed: {e}")
+                with self.condition:
+                    self.pages[url] = items
+                    self.links[url] = links
+                    for link in links:
+                        self._enqueue(link)
+                    self.in_flight -= 1
+                    self.condition.notify_all()
+        finally:
+            if driver is not None:
+                self._release(driver)
+            with self.condition:
+                self.timings.merge(timer)
+
+    def _release(self, driver):
+        """Hand a worker's session back unless cancel() already gave it up"""
+        with self.condition:
+            if driver not in self.drivers:
+                return
+            self.drivers.remove(driver)
+        close_driver(driver, self.pool)
+
+    def _load(self, driver, url, timer):
+        """Open one listing page, scroll it to the end and return its markets and listing links"""
+        driver.get(url)
+        timer.lap("navigation")
+        self.readiness.wait(driver, url)
+        timer.lap("readiness")
+
+        selectors = self.stages[0]["selectors"]
+        items = {}
+        last = None
+        scrolls = 0
+        while True:
+            # Extract after every scroll: long lists may drop rows that scrolled out of view
+            for item in extract_elements(driver, self.stages)[3]:
+                items.setdefault(normalize_url(item["href"]) if item["href"] else item["text"], item)
+            if scrolls >= self.max_scrolls:
+                break
+            state = driver.execute_script(SCROLL_JS, selectors)
+            timer.lap("extraction")
+            if state == last:
+                # Neither taller nor more elements since the last scroll: the list is complete
+                break
+            last = state
+            scrolls += 1
+            self.readiness.wait(driver, f"{url} (scrolled)", cap=self.scroll_cap)
+            timer.lap("readiness")
+
+        links = []
+        for href in driver.execute_script(NEXT_JS, self.next_selectors) or []:
+            link = normalize_url(href)
+            if urlsplit(link).netloc in self.hosts and link != url and link not in links:
+                links.append(link)
+        timer.lap("extraction")
+        return list(items.values()), links
+
+    def _collect(self, start_urls):
+        """Crawled pages in breadth-first link order, and their markets with duplicate URLs dropped"""
+        order = []
+        seen_pages = set()
+        queue = deque(url for url in start_urls if url in self.pages)
+        seen_pages.update(queue)
+        while queue:
+            url = queue.popleft()
+            order.append(url)
+            for link in self.links.get(url, []):
+                if link in self.pages and link not in seen_pages:
+                    seen_pages.add(link)
+                    queue.append(link)
+
+        markets = []
+        seen = set()
+        self.duplicates = 0
+        for url in order:
+            for item in self.pages[url]:
+                key = normalize_url(item["href"]) if item["href"] else item["text"]
+                if key in seen:
+                    self.duplicates += 1
+                    continue
+                seen.add(key)
+                markets.append(item)
+        return markets
+
+    def stats(self):
+        return {
+            "pages": len(self.pages),
+            "failed_pages": len(self.errors),
+            "markets": len(self.markets),
+            "duplicates": self.duplicates,
+            "concurrency": self.concurrency,
+            "seconds": round(self.seconds, 3),
+            "markets_per_second": round(len(self.markets) / self.seconds, 1) if self.seconds else 0.0,
+        }
+
+    def report(self):
+        stats = self.stats()
+        print(f" Crawled {stats['pages']} pages ({stats['failed_pages']} failed) with {stats['concurrency']} tabs: "
+              f"{stats['markets']} markets, {stats['duplicates']} duplicates dropped, "
+              f"{stats['markets_per_second']:.1f} markets/s")
@@ -0,0 +1,83 @@
+# Runs a whole selector cascade inside the page and returns only the elements that pass
+# the filters, as plain {text, href} records, so a page costs one WebDriver round trip
+# instead of one per element per attribute
+EXTRACT_JS = """
+var stages = arguments[0];
+
+function hasAny(text, words) {
+    for (var i = 0; i < words.length; i++) {
+        if (text.indexOf(words[i]) !== -1) return true;
+    }
+    return false;
+}
+
+function keep(text, href, f) {
+    if (!text || text.length < f.min_length) return false;
+    var lower = text.toLowerCase();
+    if (f.skip_words.length && hasAny(lower, f.skip_words)) return false;
+    if (f.skip_exact.indexOf(lower) !== -1) return false;
+    if (f.keywords.length && !hasAny(lower, f.keywords)) return false;
+    if (f.require_href && !href) return false;
+    if (f.href_contains && (!href || href.indexOf(f.href_contains) === -1)) return false;
+    if (href) {
+        for (var i = 0; i < f.skip_href_prefixes.length; i++) {
+            if (href.indexOf(f.skip_href_prefixes[i]) === 0) return false;
+        }
+        for (var j = 0; j < f.skip_href_suffixes.length; j++) {
+            var suffix = f.skip_href_suffixes[j];
+            if (href.length >= suffix.length && href.slice(-suffix.length) === suffix) return false;
+        }
+    }
+    return true;
+}
+
+for (var s = 0; s < stages.length; s++) {
+    var stage = stages[s];
+    for (var k = 0; k < stage.selectors.length; k++) {
+        var selector = stage.selectors[k];
+        var elements;
+        try { elements = document.querySelectorAll(selector); } catch (e) { continue; }
+        var items = [];
+        for (var n = 0; n < elements.length; n++) {
+            var el = elements[n];
+            var text = (el.innerText || '').trim();
+            // Same as WebElement.get_attribute("href"): the resolved URL for links, else the raw attribute
+            var href = (typeof el.href === 'string' && el.href) || el.getAttribute('href') || null;
+            if (keep(text, href, stage)) {
+                items.push({text: text, href: href});
+                if (stage.limit && items.length >= stage.limit) break;
+            }
+        }
+        if (items.length) {
+            return {stage: s, selector: selector, found: elements.length, items: items};
+        }
+    }
+}
+return {stage: -1, selector: null, found: 0, items: []};
+"""
+
+
+def stage(selectors, min_length=0, skip_words=(), skip_exact=(), keywords=(), href_contains=None,
+          require_href=False, skip_href_prefixes=(), skip_href_suffixes=(), limit=None):
+    """One step of a selector cascade and the filters its elements must pass (word checks are lowercase)"""
+    return {
+        "selectors": list(selectors),
+        "min_length": min_length,
+        "skip_words": list(skip_words),
+        "skip_exact": list(skip_exact),
+        "keywords": list(keywords),
+        "href_contains": href_contains,
+        "require_href": require_href,
+        "skip_href_prefixes": list(skip_href_prefixes),
+        "skip_href_suffixes": list(skip_href_suffixes),
+        "limit": limit,
+    }
+
+
+def extract_elements(driver, stages):
+    """
+    Try each stage's selectors in order and return the first one with elements passing its filters.
+    Returns (stage index, selector, elements matched, [{"text", "href"}]); stage index is -1 when none matched.
+    """
+    result = driver.execute_script(EXTRACT_JS, stages) or {}
+    return result.get("stage", -1), result.get("selector"), result.get("found", 0), result.get("items", [])
@@ -1,143 +1,175 @@
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from webdriver_manager.chrome import ChromeDriverManager
-import time
-import random
+from scrapers.page_readiness import PageReadiness
+from scrapers.api_client import ApiClient
+from scrapers.crawler import MarketCrawler
+from scrapers.dom_extract import stage
+from utils.metrics import PhaseTimer
+from utils.price_parser import attach_prices, price_text
 import re
 
 
 class KalshiScraper:
-    def __init__(self):
-        self.driver = None
-
-    def _setup_driver(self):
-        """Set up Chrome WebDriver with proper options."""
-        chrome_options = Options()
-        chrome_options.add_argument("--no-sandbox")
-        chrome_options.add_argument("--disable-dev-shm-usage")
-        chrome_options.add_argument("--disable-gpu")
-        chrome_options.add_argument("--start-maximized")
-        chrome_options.add_argument("--window-size=1920,1080")
-        chrome_options.add_argument("--disable-cache")  # Disable caching
-        chrome_options.add_argument("--disable-application-cache")
-        chrome_options.add_argument("--disable-offline-load-stale-cache")
-        chrome_options.add_argument("--disk-cache-size=0")
-        chrome_options.add_argument(
-            "--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-            "AppleWebKit/537.36 (KHTML, like Gecko) "
-            "Chrome/120.0.0.0 Safari/537.36"
-        )
-
-        service = Service(ChromeDriverManager().install())
-        self.driver = webdriver.Chrome(service=service, options=chrome_options)
+    SELECTORS = [
+        "[data-testid*='market']",
+        ".market-item",
+        ".market-card",
+        "[class*='market']",
+        "[class*='event']",
+        "[class*='card']",
+        "[class*='prediction']",
+        "[class*='bet']",
+    ]
+
+    PAGE_URL = "https://kalshi.com/events"
+    API_URL = "https://api.elections.kalshi.com/trade-api/v2"
+    PAGE_SIZE = 200
+
+    def __init__(self, pool=None, fetch_mode="browser", api_url=None, api_pages=5, recording=None, page_url=None,
+                 concurrency=3):
+        self.pool = pool
+        self.readiness = PageReadiness(self.SELECTORS)
+        self.page_url = page_url or self.PAGE_URL
+        # Per-phase seconds of the last browser fetch
+        self.timings = PhaseTimer()
+        self.fetch_mode = fetch_mode
+        self.api_url = api_url or self.API_URL
+        self.api_pages = api_pages
+        self.recording = recording
+        # Listing pages the browser crawl loads at once
+        self.concurrency = concurrency
+        self.crawler = None
+        # Optional ChangeDetector: records unchanged since the last run are dropped before any processing
+        self.changes = None
+        # Markets the API returned in the last fetch, before unchanged ones were dropped
+        self.api_markets = 0
+
+    def close(self):
+        """Stop a browser crawl in progress, e.g. when the run gives up on this scraper"""
+        if self.crawler is not None:
+            self.crawler.cancel()
 
     def fetch_data(self):
+        if self.fetch_mode == "api":
+            results = self.fetch_api()
+            if results or self.api_markets:
+                return results
+            print(" Kalshi API returned no markets, falling back to the browser...")
+        return self.fetch_browser()
+
+    def iter_data(self):
+        """Yield records as they arrive: page by page from the API, or all at once after a browser scrape."""
+        if self.fetch_mode == "api":
+            count = 0
+            try:
+                for record in self.iter_api():
+                    count += 1
+                    yield record
+            except Exception as e:
+                print(f" Kalshi API fetch failed: {e}")
+            if count or self.api_markets:
+                print(f" Kalshi API fetch completed: {count} markets found")
+                return
+            print(" Kalshi API returned no markets, falling back to the browser...")
+        yield from self.fetch_browser()
+
+    def fetch_api(self):
+        """Fetch open markets as JSON from the trade API over one keep-alive connection."""
         try:
-            print(" Starting Kalshi scraping...")
-            self._setup_driver()
-
-            # Add cache-busting parameter to URL
-            cache_buster = random.randint(1000, 9999)
-            url = f"https://kalshi.com/events?cb={cache_buster}"
-            print(f" Navigating to Kalshi with cache buster: {url}")
-            self.driver.get(url)
+            results = list(self.iter_api())
+            print(f" Kalshi API fetch completed: {len(results)} markets found")
+            return results
 
-            # Wait until body loads fully
-            try:
-                WebDriverWait(self.driver, 20).until(
-                    EC.presence_of_element_located((By.TAG_NAME, "body"))
-                )
-                print(" Page loaded successfully")
-            except:
-                print(" Page took too long to load")
-
-            # Random wait time to simulate human behavior
-            wait_time = random.uniform(3, 7)
-            print(f" Waiting {wait_time:.1f} seconds for dynamic content...")
-            time.sleep(wait_time)
-
-            # Try scrolling to trigger dynamic content loading
-            print(" Scrolling to trigger dynamic content...")
-            self.driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-            time.sleep(random.uniform(2, 4))
-            self.driver.execute_script("window.scrollTo(0, 0);")
-            time.sleep(random.uniform(1, 3))
-
-            print(" Searching for market elements...")
-            selectors = [
-                "[data-testid*='market']",
-                ".market-item",
-                ".market-card",
-                "[class*='market']",
-                "[class*='event']",
-                "[class*='card']",
-                "[class*='prediction']",
-                "[class*='bet']",
-            ]
-
-            markets = []
-            for selector in selectors:
-                try:
-                    markets = self.driver.find_elements(By.CSS_SELECTOR, selector)
-                    if markets:
-                        print(f" Found {len(markets)} markets using selector: {selector}")
-                        break
-                except Exception:
-                    continue
+        except Exception as e:
+            print(f" Kalshi API fetch failed: {e}")
+            return []
 
-            # Fallback: get links if no market cards found
-            if not markets:
-                print(" No markets found with selectors, falling back to links...")
-                links = self.driver.find_elements(By.TAG_NAME, "a")
-                markets = [
-                    link for link in links
-                    if link.text.strip() and link.get_attribute("href")
-                    and len(link.text.strip()) > 5
-                    and not any(x in link.text.lower() for x in [
-                        "login", "sign up", "contact", "privacy", "terms"
-                    ])
-                ]
-                print(f" Fallback found {len(markets)} potential market links")
-
-            # Final fallback: grab visible text from <div>
-            if not markets:
-                print(" Trying to fetch market data from divs...")
-                divs = self.driver.find_elements(By.TAG_NAME, "div")
-                markets = [
-                    div for div in divs
-                    if div.text.strip() and len(div.text.strip()) > 10
-                    and any(k in div.text.lower() for k in [
-                        "will", "when", "what", "how", "odds", "probability"
-                    ])
-                ]
-                print(f" Found {len(markets)} market divs")
-
-            # Randomize the order and limit to get different results each time
-            if markets:
-                random.shuffle(markets)
-                # Randomly select between 5-15 markets instead of always 10
-                max_markets = random.randint(5, min(15, len(markets)))
-                markets = markets[:max_markets]
-                print(f" Randomly selected {len(markets)} markets from {len(markets)} found")
+    def iter_api(self):
+        print(" Starting Kalshi API fetch...")
+        self.api_markets = 0
+        client = ApiClient(self.api_url, recording=self.recording)
+        cursor = None
+        try:
+            # Pages are chained by cursor, so they are requested one after another
+            for _ in range(self.api_pages):
+                params = {"status": "open", "limit": self.PAGE_SIZE}
+                if cursor:
+                    params["cursor"] = cursor
+                page = client.get_json("/markets", params)
+                for market in page.get("markets", []):
+                    self.api_markets += 1
+                    record = self.api_record(market)
+                    if record and (self.changes is None or self.changes.keep(record)):
+                        yield record
+                cursor = page.get("cursor")
+                if not cursor:
+                    break
+        finally:
+            client.close()
+
+    def api_record(self, market):
+        """Build the same record the browser path produces from one trade API market."""
+        title = (market.get("title") or "").strip()
+        if not title:
+            return None
+        subtitle = (market.get("yes_sub_title") or "").strip()
+        if subtitle and subtitle not in title:
+            title = f"{title} {subtitle}"
+
+        # Prices are in cents; newer payloads carry dollar strings instead
+        if market.get("last_price") is not None:
+            cents = float(market["last_price"])
+            previous = market.get("previous_price")
+        elif market.get("last_price_dollars") is not None:
+            cents = float(market["last_price_dollars"]) * 100
+            previous = market.get("previous_price_dollars")
+            previous = float(previous) * 100 if previous is not None else None
+        else:
+            cents = previous = None
+        price = f"{round(cents)}¢" if cents is not None else "N/A"
+
+        event_ticker = market.get("event_ticker")
+        return {
+            "site": "Kalshi",
+            "product": title,
+            "price": price,
+            "url": f"https://kalshi.com/markets/{event_ticker.lower()}" if event_ticker else None,
+            "probability": cents / 100 if cents is not None else None,
+            "volume": market.get("volume"),
+            # One cent on a $1 contract is 100 bps of probability
+            "change_bps": round((cents - float(previous)) * 100) if cents is not None and previous is not None else None,
+        }
+
+    def fetch_browser(self):
+        try:
+            print(" Starting Kalshi scraping...")
+            self.timings = PhaseTimer()
+
+            # Every listing page and everything its infinite scroll loads, several pages at once
+            print(f" Crawling Kalshi from {self.page_url}...")
+            nav_words = ["contact", "privacy", "terms", "login", "sign up"]
+            self.crawler = MarketCrawler([
+                # Market cards, then links, then divs with question-like text; the whole cascade
+                # and its filters run in the page in a single round trip
+                stage(self.SELECTORS, min_length=10, skip_words=nav_words),
+                stage(["a"], min_length=10, skip_words=nav_words, require_href=True),
+                stage(["div"], min_length=11, skip_words=nav_words,
+                      keywords=["will", "when", "what", "how", "odds", "probability"]),
+            ], pool=self.pool, concurrency=self.concurrency, readiness=self.readiness)
+            markets = self.crawler.crawl([self.page_url])
+            # Driver start, navigation, readiness and extraction as the crawl's workers timed them
+            self.timings.merge(self.crawler.timings)
+            self.crawler.report()
 
             # Process the results
             results = []
+            texts = []
             for i, market in enumerate(markets):
                 try:
-                    text = market.text.strip()
-                    href = market.get_attribute("href") if market.get_attribute("href") else None
+                    text = market["text"]
+                    href = market["href"]
 
-                    if not text or len(text) < 10:
-                        continue
-
-                    # Skip navigation-related items
-                    if any(skip in text.lower() for skip in [
-                        "contact", "privacy", "terms", "login", "sign up"
-                    ]):
+                    # Markets that look exactly as they did last run are dropped before any processing
+                    status = self.changes.check("Kalshi", href or text, text, href) if self.changes else None
+                    if status == "unchanged":
                         continue
 
                     results.append({
@@ -146,11 +178,18 @@ class KalshiScraper:
                         "price": self.extract_price(text),  # Extract actual price
                         "url": href,
                     })
+                    if status:
+                        results[-1]["change"] = status
+                    texts.append(text)
 
-                    print(f"   Market {i + 1}: {text[:80]}...")
+                    if len(results) <= 10:
+                        print(f"   Market {i + 1}: {text[:80]}...")
                 except Exception:
                     continue
 
+            # Probability, volume and change for every market from one scan of their texts
+            attach_prices(results, texts)
+            self.timings.lap("parsing")
             print(f" Kalshi scraping completed: {len(results)} markets found")
             return results
 
@@ -158,12 +197,10 @@ class KalshiScraper:
             print(f" Kalshi scraping failed: {e}")
             return []
 
-        finally:
-            if self.driver:
-                self.driver.quit()
-
     def extract_price(self, text):
         """Extract price information from market text"""
+        # Numbers in the question itself are not prices
+        text = price_text(text)
         try:
             # Look for percentage patterns (e.g., "28%", "51%")
             percentage_match = re.search(r'(\d+)%', text)
@@ -1,12 +1,34 @@
+import time
+
+
 class MockScraper:
-    def __init__(self, site_name):
+    def __init__(self, site_name, delay=0):
         self.site_name = site_name
+        # Simulated fetch latency, for exercising concurrent runs offline
+        self.delay = delay
+        # Optional ChangeDetector, as on the live scrapers
+        self.changes = None
     
     def fetch_data(self):
+        if self.delay:
+            time.sleep(self.delay)
+        return self._records()
+
+    def _records(self):
         # Mock data for testing
         mock_data = [
-            {"site": self.site_name, "product": f"Mock Product 1 from {self.site_name}", "price": "0.65"},
-            {"site": self.site_name, "product": f"Mock Product 2 from {self.site_name}", "price": "0.32"},
-            {"site": self.site_name, "product": f"Mock Product 3 from {self.site_name}", "price": "0.78"}
+            {"site": self.site_name, "product": f"Mock Product 1 from {self.site_name}", "price": "0.65", "probability": 0.65},
+            {"site": self.site_name, "product": f"Mock Product 2 from {self.site_name}", "price": "0.32", "probability": 0.32},
+            {"site": self.site_name, "product": f"Mock Product 3 from {self.site_name}", "price": "0.78", "probability": 0.78}
         ]
-        return mock_data
\ No newline at end of file
+        if self.changes is not None:
+            mock_data = [record for record in mock_data if self.changes.keep(record)]
+        return mock_data
+
+    def iter_data(self):
+        """Yield the mock records one at a time, spreading the delay between them"""
+        items = self._records()
+        for item in items:
+            if self.delay:
+                time.sleep(self.delay / len(items))
+            yield item
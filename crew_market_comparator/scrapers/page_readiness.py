@@ -0,0 +1,97 @@
+import statistics
+import time
+
+# One round trip per poll: installs a MutationObserver on first use, then reports
+# document state, matching element count, time since the last mutation and resources loaded
+PROBE_JS = """
+var selectors = arguments[0];
+if (!window.__readiness) {
+    window.__readiness = {last: performance.now()};
+    new MutationObserver(function () { window.__readiness.last = performance.now(); })
+        .observe(document, {childList: true, subtree: true, characterData: true});
+}
+var count = 0;
+for (var i = 0; i < selectors.length; i++) {
+    try { count += document.querySelectorAll(selectors[i]).length; } catch (e) {}
+}
+return {
+    state: document.readyState,
+    count: count,
+    quiet: (performance.now() - window.__readiness.last) / 1000,
+    resources: performance.getEntriesByType('resource').length
+};
+"""
+
+
+class PageReadiness:
+    """
+    Waits until a page is ready instead of sleeping a fixed time.
+
+    A page is ready once it has loaded, the count of market elements has stopped changing
+    for `quiet` seconds, and either the DOM or the network has been quiet that long.
+    Pages that never go quiet (live price tickers) are ready once the element count
+    has held for `busy_factor` times as long. Pages with no matching elements fall
+    back to DOM and network quiescence alone.
+    Never waits longer than `cap` seconds.
+    """
+
+    def __init__(self, selectors=None, quiet=0.75, poll=0.1, cap=10.0, busy_factor=3):
+        self.selectors = list(selectors or [])
+        self.quiet = quiet
+        self.busy_factor = busy_factor
+        self.poll = poll
+        self.cap = cap
+        self.timings = []
+
+    def wait(self, driver, label=None, cap=None):
+        """Block until the current page is ready; returns the seconds waited"""
+        cap = self.cap if cap is None else cap
+        start = time.perf_counter()
+        last_count = None
+        count_since = start
+        last_resources = None
+        resources_since = start
+        reason = "cap"
+
+        while True:
+            now = time.perf_counter()
+            try:
+                probe = driver.execute_script(PROBE_JS, self.selectors)
+            except Exception:
+                # Mid-navigation the script can fail; treat it as not ready yet
+                probe = None
+
+            if probe:
+                if probe["count"] != last_count:
+                    last_count, count_since = probe["count"], now
+                if probe["resources"] != last_resources:
+                    last_resources, resources_since = probe["resources"], now
+
+                loaded = probe["state"] == "complete"
+                dom_quiet = probe["quiet"] >= self.quiet
+                network_idle = now - resources_since >= self.quiet
+                count_stable = now - count_since >= self.quiet
+
+                if loaded and (dom_quiet or network_idle):
+                    if last_count and count_stable:
+                        reason = "elements stable"
+                        break
+                    if not last_count and dom_quiet and network_idle:
+                        reason = "dom quiet"
+                        break
+                if loaded and last_count and now - count_since >= self.quiet * self.busy_factor:
+                    reason = "elements stable, page busy"
+                    break
+
+            if now - start >= cap:
+                break
+            time.sleep(self.poll)
+
+        elapsed = time.perf_counter() - start
+        self.timings.append({"page": label, "seconds": round(elapsed, 3), "reason": reason, "elements": last_count})
+        print(f" Page ready in {elapsed:.1f}s ({reason}, {last_count or 0} elements)")
+        return elapsed
+
+    def median(self):
+        seconds = [t["seconds"] for t in self.timings]
+        return statistics.median(seconds) if seconds else 0.0
@@ -1,109 +1,186 @@
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from webdriver_manager.chrome import ChromeDriverManager
-import time
+from scrapers.page_readiness import PageReadiness
+from scrapers.api_client import ApiClient
+from scrapers.crawler import MarketCrawler
+from scrapers.dom_extract import stage
+from utils.metrics import PhaseTimer
+from utils.price_parser import attach_prices, price_text
+import json
 import re
-import random
 
 class PolymarketScraper:
+    # Try multiple selectors for better compatibility
+    SELECTORS = [
+        "a[href*='/event/']",
+        "[data-testid*='market']",
+        ".market-item",
+        ".market-card"
+    ]
+
+    PAGE_URL = "https://polymarket.com/markets"
+    API_URL = "https://gamma-api.polymarket.com"
+    PAGE_SIZE = 100
+
+    def __init__(self, pool=None, fetch_mode="browser", api_url=None, api_pages=5, recording=None, page_url=None,
+                 concurrency=3):
+        self.pool = pool
+        self.readiness = PageReadiness(self.SELECTORS)
+        self.page_url = page_url or self.PAGE_URL
+        # Per-phase seconds of the last browser fetch
+        self.timings = PhaseTimer()
+        self.fetch_mode = fetch_mode
+        self.api_url = api_url or self.API_URL
+        self.api_pages = api_pages
+        self.recording = recording
+        # Listing pages the browser crawl loads at once
+        self.concurrency = concurrency
+        self.crawler = None
+        # Optional ChangeDetector: records unchanged since the last run are dropped before any processing
+        self.changes = None
+        # Markets the API returned in the last fetch, before unchanged ones were dropped
+        self.api_markets = 0
+
+    def close(self):
+        """Stop a browser crawl in progress, e.g. when the run gives up on this scraper"""
+        if self.crawler is not None:
+            self.crawler.cancel()
+
     def fetch_data(self):
+        if self.fetch_mode == "api":
+            results = self.fetch_api()
+            if results or self.api_markets:
+                return results
+            print(" Polymarket API returned no markets, falling back to the browser...")
+        return self.fetch_browser()
+
+    def iter_data(self):
+        """Yield records as they arrive: page by page from the API, or all at once after a browser scrape"""
+        if self.fetch_mode == "api":
+            count = 0
+            try:
+                for record in self.iter_api():
+                    count += 1
+                    yield record
+            except Exception as e:
+                print(f" Polymarket API fetch failed: {e}")
+            if count or self.api_markets:
+                print(f" Polymarket API fetch completed: {count} markets found")
+                return
+            print(" Polymarket API returned no markets, falling back to the browser...")
+        yield from self.fetch_browser()
+
+    def fetch_api(self):
+        """Fetch market listings as JSON from the Gamma API, all pages at once over pooled connections"""
+        try:
+            results = list(self.iter_api())
+            print(f" Polymarket API fetch completed: {len(results)} markets found")
+            return results
+
+        except Exception as e:
+            print(f" Polymarket API fetch failed: {e}")
+            return []
+
+    def iter_api(self):
+        print(" Starting Polymarket API fetch...")
+        self.api_markets = 0
+        client = ApiClient(self.api_url, recording=self.recording)
+        params = [
+            {"active": "true", "closed": "false", "limit": self.PAGE_SIZE, "offset": page * self.PAGE_SIZE}
+            for page in range(self.api_pages)
+        ]
+        try:
+            for page in client.iter_many("/markets", params):
+                for market in page:
+                    self.api_markets += 1
+                    record = self.api_record(market)
+                    if record and (self.changes is None or self.changes.keep(record)):
+                        yield record
+        finally:
+            client.close()
+
+    def api_record(self, market):
+        """Build the same record the browser path produces from one Gamma API market"""
+        question = (market.get("question") or "").strip()
+        if not question:
+            return None
+
+        # Outcome prices arrive as a JSON-encoded list of strings, "Yes" first
+        prices = market.get("outcomePrices")
+        if isinstance(prices, str):
+            prices = json.loads(prices)
+        probability = float(prices[0]) if prices else None
+        price = f"{round(probability * 100)}%" if prices else "N/A"
+        volume = market.get("volumeNum", market.get("volume"))
+        change = market.get("oneDayPriceChange")
+
+        events = market.get("events") or []
+        slug = events[0].get("slug") if events else market.get("slug")
+        return {
+            "site": "Polymarket",
+            "product": question,
+            "price": price,
+            "url": f"https://polymarket.com/event/{slug}" if slug else None,
+            "probability": probability,
+            "volume": float(volume) if volume is not None else None,
+            "change_bps": round(float(change) * 10000) if change is not None else None
+        }
+
+    def fetch_browser(self):
         try:
             print(" Starting Polymarket scraping...")
-            
-            # Set up Chrome options for better compatibility
-            chrome_options = Options()
-            chrome_options.add_argument("--no-sandbox")
-            chrome_options.add_argument("--disable-dev-shm-usage")
-            chrome_options.add_argument("--disable-gpu")
-            chrome_options.add_argument("--window-size=1920,1080")
-            chrome_options.add_argument("--disable-cache")  # Disable caching
-            chrome_options.add_argument("--disable-application-cache")
-            chrome_options.add_argument("--disable-offline-load-stale-cache")
-            chrome_options.add_argument("--disk-cache-size=0")
-            chrome_options.add_argument("--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36")
-            
-            service = Service(ChromeDriverManager().install())
-            driver = webdriver.Chrome(service=service, options=chrome_options)
-            
-            # Add cache-busting parameter to URL
-            cache_buster = random.randint(1000, 9999)
-            url = f"https://polymarket.com/markets?cb={cache_buster}"
-            print(f" Navigating to Polymarket with cache buster: {url}")
-            driver.get(url)
-            
-            # Wait for page to load with random timing
-            wait_time = random.uniform(4, 8)
-            print(f" Waiting {wait_time:.1f} seconds for page to load...")
-            time.sleep(wait_time)
-            
-            print(" Looking for market elements...")
-            
-            # Try multiple selectors for better compatibility
-            selectors = [
-                "a[href*='/event/']",
-                "[data-testid*='market']",
-                ".market-item",
-                ".market-card"
-            ]
-            
-            markets = []
-            for selector in selectors:
-                try:
-                    markets = driver.find_elements(By.CSS_SELECTOR, selector)
-                    if markets:
-                        print(f" Found {len(markets)} markets with selector: {selector}")
-                        break
-                except Exception as e:
-                    print(f" Selector {selector} failed: {e}")
-                    continue
-            
-            if not markets:
-                # Try to get any clickable elements
-                markets = driver.find_elements(By.TAG_NAME, "a")
-                print(f" Fallback: Found {len(markets)} total links")
-            
-            # Randomize the order and limit to get different results each time
-            if markets:
-                random.shuffle(markets)
-                # Randomly select between 8-15 markets instead of always 10
-                max_markets = random.randint(8, min(15, len(markets)))
-                markets = markets[:max_markets]
-                print(f" Randomly selected {len(markets)} markets from {len(markets)} found")
+            self.timings = PhaseTimer()
+            
+            # Every listing page and everything its infinite scroll loads, several pages at once
+            print(f" Crawling Polymarket from {self.page_url}...")
+            # The selector cascade, falling back to any link, is run and filtered in one round trip per scroll
+            market_filter = dict(min_length=6, href_contains='/event/')
+            self.crawler = MarketCrawler([
+                stage(self.SELECTORS, **market_filter),
+                stage(["a"], **market_filter),
+            ], pool=self.pool, concurrency=self.concurrency, readiness=self.readiness)
+            markets = self.crawler.crawl([self.page_url])
+            # Driver start, navigation, readiness and extraction as the crawl's workers timed them
+            self.timings.merge(self.crawler.timings)
+            self.crawler.report()
             
             results = []
+            texts = []
             for i, m in enumerate(markets):
                 try:
-                    text = m.text.strip()
-                    href = m.get_attribute("href")
+                    text = m["text"]
+                    href = m["href"]
+                    
+                    # Markets that look exactly as they did last run are dropped before any cleaning
+                    status = self.changes.check("Polymarket", href or text, text, href) if self.changes else None
+                    if status == "unchanged":
+                        continue
                     
-                    if text and len(text) > 5 and href and '/event/' in href:
-                        # Clean up the product name - extract just the main question/topic
-                        clean_name = self.clean_product_name(text)
-                        
-                        if clean_name:
-                            results.append({
-                                "site": "Polymarket", 
-                                "product": clean_name, 
-                                "price": self.extract_price(text),  # Extract actual price
-                                "url": href
-                            })
+                    # Clean up the product name - extract just the main question/topic
+                    clean_name = self.clean_product_name(text)
+                    
+                    if clean_name:
+                        results.append({
+                            "site": "Polymarket", 
+                            "product": clean_name, 
+                            "price": self.extract_price(text),  # Extract actual price
+                            "url": href
+                        })
+                        if status:
+                            results[-1]["change"] = status
+                        texts.append(text)
+                        if len(results) <= 10:
                             print(f"   Market {i+1}: {clean_name[:50]}...")
                 except Exception as e:
                     print(f" Error processing market {i+1}: {e}")
                     continue
             
+            # Probability, volume and change for every market from one scan of their texts
+            attach_prices(results, texts)
+            self.timings.lap("parsing")
             print(f" Polymarket scraping completed: {len(results)} markets found")
-            driver.quit()
             return results
             
         except Exception as e:
             print(f" Polymarket scraping failed: {e}")
-            if 'driver' in locals():
-                driver.quit()
             return []
     
     def clean_product_name(self, text):
@@ -136,6 +213,8 @@ class PolymarketScraper:
 
     def extract_price(self, text):
         """Extract price information from Polymarket text"""
+        # Numbers in the question itself are not prices
+        text = price_text(text)
         try:
             # Look for percentage patterns
             percentage_match = re.search(r'(\d+)%', text)
@@ -159,4 +238,4 @@ class PolymarketScraper:
             
             return "N/A"
         except:
-            return "N/A"
\ No newline at end of file
+            return "N/A"
@@ -1,76 +1,100 @@
-from selenium import webdriver
 from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from webdriver_manager.chrome import ChromeDriverManager
-import time
+from scrapers.browser_pool import open_driver, close_driver, abandon_driver
+from scrapers.page_readiness import PageReadiness
+from scrapers.dom_extract import stage, extract_elements
+from utils.metrics import PhaseTimer
+from utils.price_parser import attach_prices
 
 class PredictionMarketScraper:
+    # Try multiple selectors for better compatibility
+    SELECTORS = [
+        "[data-testid*='market']",
+        ".market-item",
+        ".market-card",
+        ".event-item",
+        ".series-item",
+        "[class*='market']",
+        "[class*='event']",
+        "a[href*='/market']",
+        "a[href*='/event']",
+        ".market",
+        ".event",
+        "[class*='card']"
+    ]
+
+    # Try different URLs for prediction markets - more realistic ones
+    PAGE_URLS = [
+        "https://manifold.markets/",
+        "https://manifold.markets/markets",
+        "https://www.zeitgeist.pm/",
+        "https://www.zeitgeist.pm/markets"
+    ]
+
+    def __init__(self, pool=None, page_urls=None):
+        self.pool = pool
+        self.readiness = PageReadiness(self.SELECTORS)
+        self.page_urls = page_urls or self.PAGE_URLS
+        # Per-phase seconds of the last fetch
+        self.timings = PhaseTimer()
+        # Optional ChangeDetector: records unchanged since the last run are dropped before any processing
+        self.changes = None
+        # Session of the fetch in progress, so close() can give it up
+        self.driver = None
+
+    def close(self):
+        """Give up the session of a fetch in progress, e.g. when the run gives up on this scraper"""
+        driver, self.driver = self.driver, None
+        if driver is not None:
+            # Quit and dropped from the pool right away; the stuck fetch cannot hand it back
+            abandon_driver(driver, self.pool)
+
+    def _release(self, driver):
+        """Hand the fetch's session back unless close() already gave it up"""
+        if self.driver is driver:
+            self.driver = None
+            close_driver(driver, self.pool)
+
+    def iter_data(self):
+        """Yield records for streaming runs; the page is scraped as a whole, so they arrive together"""
+        yield from self.fetch_data()
+
     def fetch_data(self):
         try:
             print("Starting PredictionMarket scraping...")
+            self.timings = PhaseTimer()
             
-            # Set up Chrome options for better compatibility
-            chrome_options = Options()
-            chrome_options.add_argument("--no-sandbox")
-            chrome_options.add_argument("--disable-dev-shm-usage")
-            chrome_options.add_argument("--disable-gpu")
-            chrome_options.add_argument("--window-size=1920,1080")
-            chrome_options.add_argument("--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36")
-            
-            service = Service(ChromeDriverManager().install())
-            driver = webdriver.Chrome(service=service, options=chrome_options)
+            # Warm session from the shared pool when there is one, otherwise a fresh browser
+            driver = self.driver = open_driver(self.pool)
+            self.timings.lap("driver_start")
             
             print("Navigating to PredictionMarket...")
-            # Try different URLs for prediction markets - more realistic ones
-            urls_to_try = [
-                "https://manifold.markets/",
-                "https://manifold.markets/markets",
-                "https://www.zeitgeist.pm/",
-                "https://www.zeitgeist.pm/markets"
-            ]
+            urls_to_try = self.page_urls
             
             markets = []
             working_url = None
             
+            # Every candidate must pass the same checks, which now run inside the page
+            nav_words = ["support", "help", "contact", "about", "privacy", "terms", "login", "sign up", "cloudflare"]
+            market_filter = dict(min_length=11, skip_words=nav_words)
+            
             for url in urls_to_try:
                 try:
                     print(f"Trying URL: {url}")
                     driver.get(url)
-                    time.sleep(5)  # Wait longer for content to load
+                    self.timings.lap("navigation")
+                    self.readiness.wait(driver, url)  # Until content stops loading, not a fixed 5s
+                    self.timings.lap("readiness")
                     
                     print(f"Page title: {driver.title}")
                     print(f"Current URL: {driver.current_url}")
                     
-                    # Try multiple selectors for better compatibility
-                    selectors = [
-                        "[data-testid*='market']",
-                        ".market-item",
-                        ".market-card",
-                        ".event-item",
-                        ".series-item",
-                        "[class*='market']",
-                        "[class*='event']",
-                        "a[href*='/market']",
-                        "a[href*='/event']",
-                        ".market",
-                        ".event",
-                        "[class*='card']"
-                    ]
-                    
-                    for selector in selectors:
-                        try:
-                            markets = driver.find_elements(By.CSS_SELECTOR, selector)
-                            if markets:
-                                print(f"Found {len(markets)} markets with selector: {selector}")
-                                working_url = url
-                                break
-                        except Exception as e:
-                            continue
-                    
+                    found_stage, selector, found, markets = extract_elements(driver, [
+                        stage(self.SELECTORS, **market_filter),
+                    ])
+                    self.timings.lap("extraction")
                     if markets:
+                        print(f"Found {len(markets)} markets with selector: {selector} ({found} elements)")
+                        working_url = url
                         break
                         
                 except Exception as e:
@@ -78,81 +102,37 @@ class PredictionMarketScraper:
                     continue
             
             if not markets:
-                # Try to get any clickable elements that might be markets
-                markets = driver.find_elements(By.TAG_NAME, "a")
-                print(f"🔍 Fallback: Found {len(markets)} total links")
-                
-                # Show some sample links for debugging
-                for i, m in enumerate(markets[:10]):
-                    try:
-                        text = m.text.strip()
-                        href = m.get_attribute("href")
-                        print(f"  Link {i+1}: '{text}' -> {href}")
-                    except:
-                        pass
-                
-                # Filter out navigation and utility links
-                filtered_markets = []
-                for m in markets:
-                    href = m.get_attribute("href")
-                    text = m.text.strip()
-                    if (href and 
-                        not href.startswith("mailto:") and 
-                        not href.startswith("#") and
-                        not href.endswith("/") and
-                        text and len(text) > 5 and
-                        not text.lower() in ["support", "help", "contact", "about", "privacy", "terms", "login", "sign up", "cloudflare"]):
-                        filtered_markets.append(m)
-                
-                markets = filtered_markets
-                print(f"Filtered to {len(markets)} potential market links")
-            
-            # If still no markets, try looking for div elements with market-like content
-            if not markets:
-                print("Trying to find market content in div elements...")
-                divs = driver.find_elements(By.TAG_NAME, "div")
-                market_divs = []
-                
-                for div in divs:
-                    try:
-                        text = div.text.strip()
-                        if (text and len(text) > 10 and 
-                            any(keyword in text.lower() for keyword in ["market", "event", "prediction", "bet", "odds", "probability", "question", "will", "when", "how"])):
-                            market_divs.append(div)
-                    except:
-                        continue
-                
-                if market_divs:
-                    print(f"Found {len(market_divs)} potential market divs")
-                    markets = market_divs[:10]  # Limit to 10
+                # Links that might be markets, then divs with market-like content, in one round trip
+                print("Trying links and div elements...")
+                found_stage, selector, found, markets = extract_elements(driver, [
+                    stage(["a"], require_href=True, skip_href_prefixes=["mailto:", "#"],
+                          skip_href_suffixes=["/"], **market_filter),
+                    stage(["div"], keywords=["market", "event", "prediction", "bet", "odds", "probability",
+                                             "question", "will", "when", "how"], limit=10, **market_filter),
+                ])
+                self.timings.lap("extraction")
+                if found_stage == 0:
+                    print(f"🔍 Fallback: Filtered to {len(markets)} potential market links out of {found}")
+                    for i, m in enumerate(markets[:10]):
+                        print(f"  Link {i+1}: '{m['text']}' -> {m['href']}")
+                elif found_stage == 1:
+                    print(f"Found {len(markets)} potential market divs")
             
             # If still no markets, try scrolling to trigger lazy loading
             if not markets:
                 print("Trying to scroll page to trigger lazy loading...")
                 driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-                time.sleep(3)
+                self.readiness.wait(driver, "scrolled", cap=5.0)
                 driver.execute_script("window.scrollTo(0, 0);")
-                time.sleep(2)
+                self.timings.lap("readiness")
                 
                 # Try selectors again after scrolling
-                for selector in selectors:
-                    try:
-                        new_markets = driver.find_elements(By.CSS_SELECTOR, selector)
-                        if new_markets:
-                            print(f"Found {len(new_markets)} markets with selector after scrolling: {selector}")
-                            # Filter out empty elements
-                            filtered_new_markets = []
-                            for m in new_markets:
-                                text = m.text.strip()
-                                if text and len(text) > 10:
-                                    filtered_new_markets.append(m)
-                            
-                            if filtered_new_markets:
-                                markets = filtered_new_markets
-                                print(f"Filtered to {len(markets)} non-empty market elements")
-                                break
-                    except:
-                        continue
+                found_stage, selector, found, markets = extract_elements(driver, [
+                    stage(self.SELECTORS, **market_filter),
+                ])
+                self.timings.lap("extraction")
+                if markets:
+                    print(f"Found {len(markets)} non-empty markets with selector after scrolling: {selector}")
             
             # If still no markets, try a different approach - look for text content directly
             if not markets:
@@ -165,62 +145,57 @@ class PredictionMarketScraper:
                     line = line.strip()
                     if (line and len(line) > 20 and 
                         any(keyword in line.lower() for keyword in ["will", "when", "how many", "what", "which", "predict", "forecast", "odds", "probability"]) and
-                        not any(skip in line.lower() for skip in ["cookie", "privacy", "terms", "login", "sign up", "support"])):
+                        not any(skip in line.lower() for skip in ["cookie"] + nav_words)):
                         market_lines.append(line)
                 
                 if market_lines:
                     print(f"Found {len(market_lines)} potential market lines in page text")
-                    # Create mock elements for these text lines
-                    from selenium.webdriver.remote.webelement import WebElement
-                    class MockElement:
-                        def __init__(self, text):
-                            self._text = text
-                        def text(self):
-                            return self._text
-                        def get_attribute(self, attr):
-                            return None if attr == 'href' else ''
-                    
-                    markets = [MockElement(line) for line in market_lines[:10]]
+                    markets = [{"text": line, "href": None} for line in market_lines[:10]]
+                self.timings.lap("extraction")
             
             results = []
+            texts = []
             for i, m in enumerate(markets[:10]):  # limit to 10
                 try:
-                    text = m.text.strip()
-                    href = m.get_attribute("href") if hasattr(m, 'get_attribute') else None
+                    text = m["text"]
+                    href = m["href"]
+                    
+                    # Markets that look exactly as they did last run are dropped before any cleaning
+                    status = self.changes.check("PredictionMarket", href or text, text, href) if self.changes else None
+                    if status == "unchanged":
+                        continue
                     
                     print(f"Processing element {i+1}: text='{text[:100]}...' href='{href}'")
                     
-                    if text and len(text) > 10:  # Increased minimum length
-                        # Skip navigation and utility links
-                        if any(skip in text.lower() for skip in ["support", "help", "contact", "about", "privacy", "terms", "login", "sign up", "cloudflare"]):
-                            print(f"   Skipping navigation link: {text[:50]}...")
-                            continue
-                            
-                        # Clean up the text if it's too long
-                        if len(text) > 200:
-                            text = text[:200] + "..."
-                        
-                        results.append({
-                            "site": "PredictionMarket", 
-                            "product": text, 
-                            "price": None,
-                            "url": href
-                        })
-                        print(f"   Market {i+1}: {text[:50]}...")
-                    else:
-                        print(f"   Skipping element with insufficient text: '{text}' (length: {len(text) if text else 0})")
+                    # Clean up the text if it's too long
+                    if len(text) > 200:
+                        text = text[:200] + "..."
+                    
+                    results.append({
+                        "site": "PredictionMarket", 
+                        "product": text, 
+                        "price": None,
+                        "url": href
+                    })
+                    if status:
+                        results[-1]["change"] = status
+                    texts.append(m["text"])
+                    print(f"   Market {i+1}: {text[:50]}...")
                 except Exception as e:
                     print(f" Error processing market {i+1}: {e}")
                     continue
             
+            # No display price here, but probabilities and volumes shown in the text are still kept
+            attach_prices(results, texts)
+            self.timings.lap("parsing")
             print(f" PredictionMarket scraping completed: {len(results)} markets found")
             if working_url:
                 print(f"Working URL: {working_url}")
-            driver.quit()
+            self._release(driver)
             return results
             
         except Exception as e:
             print(f" PredictionMarket scraping failed: {e}")
             if 'driver' in locals():
-                driver.quit()
-            return []
\ No newline at end of file
+                self._release(driver)
+            return []
@@ -12,14 +12,27 @@ from scrapers.polymarket_scraper import PolymarketScraper
 from scrapers.kalshi_scraper import KalshiScraper
 from scrapers.prediction_market_scraper import PredictionMarketScraper
 from scrapers.mock_scraper import MockScraper
+from utils.fixture_server import FixtureServer
 
-def test_scraper(scraper_name):
+def test_scraper(scraper_name, fixtures=None):
     """Test a specific scraper"""
     print(f"Testing {scraper_name} scraper...")
     print("=" * 50)
     
+    server = None
     try:
-        if scraper_name.lower() == "polymarket":
+        # Replay recorded API payloads from a local server instead of the live APIs
+        api_url = None
+        if fixtures:
+            server = FixtureServer(fixtures).start()
+            api_url = server.url
+            print(f"Replaying {fixtures} from {api_url}")
+        
+        if scraper_name.lower() == "polymarket-api":
+            scraper = PolymarketScraper(fetch_mode="api", api_url=api_url)
+        elif scraper_name.lower() == "kalshi-api":
+            scraper = KalshiScraper(fetch_mode="api", api_url=api_url)
+        elif scraper_name.lower() == "polymarket":
             scraper = PolymarketScraper()
         elif scraper_name.lower() == "kalshi":
             scraper = KalshiScraper()
@@ -48,20 +61,24 @@ def test_scraper(scraper_name):
         print(f"Error testing {scraper_name}: {e}")
         import traceback
         traceback.print_exc()
+    finally:
+        if server is not None:
+            server.stop()
 
 def main():
-    if len(sys.argv) != 2:
-        print("Usage: python test_scraper.py <scraper_name>")
-        print("Available scrapers: polymarket, kalshi, predictionmarket, mock")
+    if len(sys.argv) not in (2, 3):
+        print("Usage: python test_scraper.py <scraper_name> [recorded_payloads.json]")
+        print("Available scrapers: polymarket, kalshi, predictionmarket, mock, polymarket-api, kalshi-api")
         print("\nExamples:")
         print("  python test_scraper.py polymarket")
         print("  python test_scraper.py kalshi")
         print("  python test_scraper.py predictionmarket")
         print("  python test_scraper.py mock")
+        print("  python test_scraper.py kalshi-api kalshi_payloads.json")
         return
     
     scraper_name = sys.argv[1]
-    test_scraper(scraper_name)
+    test_scraper(scraper_name, sys.argv[2] if len(sys.argv) == 3 else None)
 
 if __name__ == "__main__":
     main()
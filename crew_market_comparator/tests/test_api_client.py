@@ -0,0 +1,23 @@
+from scrapers.api_client import request_key, save_recording
+from scrapers.polymarket_scraper import PolymarketScraper
+from utils.fixture_server import FixtureServer
+
+MARKETS = [
+    {"question": "Will Bitcoin hit $100k in 2025?", "outcomePrices": '["0.28", "0.72"]', "volumeNum": 1200.5,
+     "oneDayPriceChange": -0.015, "events": [{"slug": "bitcoin-100k"}]},
+    {"question": "Will the Fed cut rates in March?", "outcomePrices": '["0.61", "0.39"]', "volume": "300",
+     "slug": "fed-march"},
+]
+
+
+def test_recorded_api_run_replays_to_the_same_records(tmp_path):
+    key = request_key("/markets", {"active": "true", "closed": "false", "limit": 100, "offset": 0})
+    with FixtureServer({key: MARKETS}) as live:
+        recorder = PolymarketScraper(fetch_mode="api", api_url=live.url, api_pages=1, recording={})
+        recorded = recorder.fetch_data()
+    assert len(recorded) == 2 and list(recorder.recording) == [key]
+
+    path = str(tmp_path / "record" / "polymarket.json")
+    save_recording(recorder.recording, path)
+    with FixtureServer(path) as replay:
+        assert PolymarketScraper(fetch_mode="api", api_url=replay.url, api_pages=1).fetch_data() == recorded
@@ -0,0 +1,98 @@
+import csv
+import json
+import time
+
+import main
+from utils.change_detector import ChangeDetector, write_changes
+
+
+def record(product, price, site="Kalshi", url=None):
+    return {"site": site, "product": product, "price": price, "url": url}
+
+
+def test_check_classifies_records_against_the_last_run(tmp_path):
+    path = str(tmp_path / "hashes.json")
+    first = ChangeDetector(path)
+    assert first.check("Kalshi", "fed", "Fed cut?", "40%") == "new"
+    assert first.check("Kalshi", "btc", "BTC 100k?", "20%") == "new"
+    first.save()
+
+    second = ChangeDetector(path)
+    assert second.check("Kalshi", "fed", "Fed cut?", "40%") == "unchanged"
+    assert second.check("Kalshi", "btc", "BTC 100k?", "25%") == "changed"
+    assert second.check("Polymarket", "fed", "Fed cut?", "40%") == "new"
+    assert (second.new, second.changed, second.skipped, second.processed) == (1, 1, 1, 2)
+
+
+def test_keep_tags_records_and_drops_unchanged_ones(tmp_path):
+    path = str(tmp_path / "hashes.json")
+    first = ChangeDetector(path)
+    assert first.keep(record("Fed cut?", "40%", url="https://kalshi.com/fed"))
+    first.save()
+
+    second = ChangeDetector(path)
+    same = record("Fed cut?", "40%", url="https://kalshi.com/fed")
+    assert not second.keep(same)
+    assert same["change"] == "unchanged"
+    # The URL is the key, so a retitled market is a change rather than a new record
+    retitled = record("Will the Fed cut?", "40%", url="https://kalshi.com/fed")
+    assert second.keep(retitled)
+    assert retitled["change"] == "changed"
+
+
+def test_save_keeps_unseen_hashes_until_they_expire(tmp_path):
+    path = str(tmp_path / "hashes.json")
+    detector = ChangeDetector(path, max_age_days=1)
+    detector.check("Kalshi", "fed", "40%")
+    detector.check("Kalshi", "btc", "20%")
+    detector.save()
+
+    # Only fed is seen this run; btc survives the save while it is recent
+    detector = ChangeDetector(path, max_age_days=1)
+    detector.check("Kalshi", "fed", "40%")
+    detector.save()
+    with open(path, encoding="utf-8") as f:
+        hashes = json.load(f)["hashes"]
+    assert set(hashes) == {"Kalshi|fed", "Kalshi|btc"}
+
+    hashes["Kalshi|btc"][1] = time.time() - 2 * 86400
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"hashes": hashes}, f)
+    detector = ChangeDetector(path, max_age_days=1)
+    detector.save()
+    with open(path, encoding="utf-8") as f:
+        assert set(json.load(f)["hashes"]) == {"Kalshi|fed"}
+    assert ChangeDetector(path).check("Kalshi", "btc", "20%") == "new"
+
+
+def test_write_changes_writes_one_row_per_entry(tmp_path):
+    unified = [
+        {"product": "Fed cut?", "cluster_id": 3, "entries": [
+            dict(record("Fed cut?", "40%", url="https://kalshi.com/fed"), change="changed"),
+            record("Fed cut", "42%", site="Polymarket"),
+        ]},
+        {"product": "BTC 100k?", "cluster_id": 4, "entries": [dict(record("BTC 100k?", None), change="new")]},
+    ]
+    filename = str(tmp_path / "changes.csv")
+    assert write_changes(filename, unified) == 3
+    with open(filename, newline="", encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+    assert [(row["Change"], row["Cluster_ID"], row["Site"]) for row in rows] == [
+        ("changed", "3", "Kalshi"), ("new", "3", "Polymarket"), ("new", "4", "Kalshi")]
+    assert rows[0]["URL"] == "https://kalshi.com/fed"
+    assert rows[0]["Probability"] == "0.4"
+    assert rows[2]["Price"] == "N/A"
+
+
+def test_unchanged_mock_run_stops_before_unifying(tmp_path, monkeypatch, capsys):
+    monkeypatch.chdir(tmp_path)
+    main.run_pipeline(use_mock=True, state_path="state.json", changes_path="hashes.json")
+    assert "Changes since the last run written to" in capsys.readouterr().out
+    assert len(list(tmp_path.glob("changes_*.csv"))) == 1
+
+    main.run_pipeline(use_mock=True, state_path="state.json", changes_path="hashes.json")
+    out = capsys.readouterr().out
+    assert "No changes since the last run" in out
+    assert "Starting semantic product unification" not in out
+    assert len(list(tmp_path.glob("changes_*.csv"))) == 1
+    assert not list(tmp_path.glob("unified_products_*"))
@@ -0,0 +1,93 @@
+import threading
+import time
+
+import scrapers.browser_pool as browser_pool
+from scrapers.crawler import NEXT_JS, SCROLL_JS, MarketCrawler
+from scrapers.dom_extract import EXTRACT_JS, stage
+from scrapers.page_readiness import PROBE_JS, PageReadiness
+
+
+def make_site(host, pages=7, per_page=20):
+    """Listing pages that each link the next two, so several pages are loading at once"""
+    site = {}
+    for page in range(1, pages + 1):
+        rows = [{"text": f"Will {host} market {i} resolve?", "href": f"http://{host}/event/{i}"}
+                for i in range((page - 1) * per_page, page * per_page)]
+        site[f"http://{host}/markets/{page}"] = (rows, [f"http://{host}/markets/{q}" for q in (2 * page, 2 * page + 1)
+                                                        if q <= pages])
+    return site
+
+
+class FakeDriver:
+    """Answers the crawler's, readiness probe's and pool reset's scripts from a dict of pages"""
+
+    window_handles = ["main"]
+
+    def __init__(self, site):
+        self.site = site
+        self.url = None
+        self.switch_to = self
+
+    def get(self, url):
+        self.url = url
+        # Slow enough that every worker is busy while the first pages load
+        time.sleep(0.01)
+
+    def window(self, handle):
+        pass
+
+    def execute_script(self, script, *args):
+        if self.url not in self.site:
+            return None
+        rows, links = self.site[self.url]
+        if script is PROBE_JS:
+            return {"state": "complete", "count": len(rows), "quiet": 10, "resources": 0}
+        if script is EXTRACT_JS:
+            return {"stage": 0, "selector": "a", "found": len(rows), "items": [dict(row) for row in rows]}
+        if script is SCROLL_JS:
+            return {"height": 100, "count": len(rows)}
+        if script is NEXT_JS:
+            return links
+
+    def execute_cdp_cmd(self, *args):
+        pass
+
+    def quit(self):
+        pass
+
+
+def crawler(pool=None, concurrency=3):
+    return MarketCrawler([stage(["a"])], pool=pool, concurrency=concurrency,
+                         readiness=PageReadiness(["a"], quiet=0, poll=0))
+
+
+def test_crawl_order_does_not_depend_on_concurrency(monkeypatch):
+    site = make_site("a")
+    monkeypatch.setattr(browser_pool, "new_driver", lambda options=None: FakeDriver(site))
+    orders = []
+    for concurrency in (1, 3, 5):
+        pool = browser_pool.BrowserPool(size=concurrency)
+        orders.append([market["href"] for market in crawler(pool, concurrency).crawl(["http://a/markets/1"])])
+    assert len(orders[0]) == 7 * 20
+    assert orders[1] == orders[0] and orders[2] == orders[0]
+
+
+def test_crawlers_sharing_a_small_pool_all_finish(monkeypatch):
+    site = {**make_site("a"), **make_site("b")}
+    monkeypatch.setattr(browser_pool, "new_driver", lambda options=None: FakeDriver(site))
+    pool = browser_pool.BrowserPool(size=2)
+    found = {}
+
+    def crawl(host):
+        crawl_run = crawler(pool, concurrency=2)
+        found[host] = len(crawl_run.crawl([f"http://{host}/markets/1"]))
+        found[f"{host} phases"] = set(crawl_run.timings.phases)
+
+    threads = [threading.Thread(target=crawl, args=(host,), daemon=True) for host in ("a", "b")]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=30)
+    assert not any(thread.is_alive() for thread in threads)
+    assert found["a"] == found["b"] == 7 * 20
+    assert found["a phases"] == {"driver_start", "navigation", "readiness", "extraction"}
@@ -0,0 +1,98 @@
+import sqlite3
+
+from utils.history_store import HistoryStore
+
+RUN = [
+    {"product": "Will Bitcoin hit $100k in 2025?", "cluster_id": 1, "confidence": 0.9, "entries": [
+        {"site": "Polymarket", "product": "Will Bitcoin hit $100k in 2025?", "price": "40% Yes, 120 bps increase"},
+        {"site": "Polymarket", "product": "Will Bitcoin hit $100k in 2025", "price": "44% Yes, 80 bps decrease"},
+        {"site": "Kalshi", "product": "Will Bitcoin hit $100k in 2025", "price": "N/A", "probability": 0.5,
+         "volume": 1000.0, "change_bps": 30},
+    ]},
+]
+
+
+def test_change_bps_is_recorded_with_the_csv_rollup(tmp_path):
+    store = HistoryStore(str(tmp_path / "history.db"))
+    store.record(RUN, taken_at=1000.0)
+    rows = {row["site"]: row for row in store.price_history("will bitcoin hit $100k in 2025?")}
+    assert rows["Polymarket"]["change_bps"] == 20
+    assert rows["Kalshi"]["change_bps"] == 30
+    assert {row["site"]: row["change_bps"] for row in store.latest()} == {"Polymarket": 20, "Kalshi": 30}
+
+
+def test_stores_without_change_bps_gain_the_column(tmp_path):
+    path = str(tmp_path / "history.db")
+    old = sqlite3.connect(path)
+    old.executescript(
+        "CREATE TABLE snapshots (id INTEGER PRIMARY KEY, taken_at REAL NOT NULL, source TEXT, markets INTEGER NOT NULL);"
+        "INSERT INTO snapshots VALUES (1, 500.0, NULL, 1);"
+        "CREATE TABLE observations (snapshot_id INTEGER NOT NULL, taken_at REAL NOT NULL, product_key TEXT NOT NULL, "
+        "product TEXT NOT NULL, cluster_id INTEGER, confidence REAL, site TEXT NOT NULL, price TEXT, "
+        "probability REAL, volume REAL);"
+        "INSERT INTO observations VALUES (1, 500.0, 'old market', 'Old market', 1, 1.0, 'Kalshi', '10%', 0.1, NULL);"
+    )
+    old.commit()
+    old.close()
+
+    store = HistoryStore(path)
+    store.record(RUN, taken_at=1000.0)
+    assert store.price_history("Old market")[0]["change_bps"] is None
+    assert store.latest(site="Kalshi")[0]["change_bps"] == 30
+
+
+def run(probability, title="Will the Fed cut rates in March?"):
+    return [{"product": title, "cluster_id": 7, "confidence": 1.0, "entries": [
+        {"site": "Kalshi", "product": title, "price": f"{probability}%"},
+        {"site": "Polymarket", "product": title, "price": f"{probability + 2}¢", "volume": None},
+    ]}]
+
+
+def test_record_writes_one_row_per_site_and_snapshot(tmp_path):
+    store = HistoryStore(str(tmp_path / "history.db"))
+    assert store.record(RUN, taken_at=1000.0, source="unified_products_1000.csv") == 2
+    rows = {row["site"]: row for row in store.latest()}
+    assert rows["Polymarket"]["price"] == "40% Yes, 120 bps increase | 44% Yes, 80 bps decrease"
+    assert abs(rows["Polymarket"]["probability"] - 0.42) < 1e-9
+    assert rows["Kalshi"]["volume"] == 1000.0
+    assert (rows["Kalshi"]["cluster_id"], rows["Kalshi"]["confidence"]) == (1, 0.9)
+    stats = store.stats()
+    assert (stats["snapshots"], stats["observations"], stats["first"], stats["last"]) == (1, 2, 1000.0, 1000.0)
+
+
+def test_price_history_filters_by_time_and_site(tmp_path):
+    store = HistoryStore(str(tmp_path / "history.db"))
+    for n, probability in enumerate([10, 20, 30]):
+        store.record(run(probability), taken_at=1000.0 + n * 60)
+
+    history = store.price_history("  will the FED cut rates in march? ")
+    assert [(row["taken_at"], row["site"]) for row in history] == [
+        (1000.0, "Kalshi"), (1000.0, "Polymarket"), (1060.0, "Kalshi"), (1060.0, "Polymarket"),
+        (1120.0, "Kalshi"), (1120.0, "Polymarket")]
+    kalshi = store.price_history("Will the Fed cut rates in March?", since=1030.0, until=1120.0, site="Kalshi")
+    assert [row["probability"] for row in kalshi] == [0.2, 0.3]
+    assert store.price_history("Will it snow in Miami?") == []
+
+
+def test_latest_is_the_newest_snapshot(tmp_path):
+    store = HistoryStore(str(tmp_path / "history.db"))
+    assert store.latest() == []
+    store.record(run(50), taken_at=2000.0)
+    store.record(run(10, title="Older market"), taken_at=1000.0)
+    assert [row["product"] for row in store.latest()] == ["Will the Fed cut rates in March?"] * 2
+    assert [row["probability"] for row in store.latest(site="Polymarket")] == [0.52]
+
+
+def test_readers_see_committed_snapshots_while_a_write_is_open(tmp_path):
+    path = str(tmp_path / "history.db")
+    writer = HistoryStore(path)
+    writer.record(run(10), taken_at=1000.0)
+    reader = HistoryStore(path)
+    assert reader.conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+    # A write transaction in progress neither blocks the reader nor shows through
+    writer.conn.execute("BEGIN IMMEDIATE")
+    writer.conn.execute("UPDATE observations SET probability = 0.99")
+    assert [row["probability"] for row in reader.latest(site="Kalshi")] == [0.1]
+    writer.conn.commit()
+    assert [row["probability"] for row in reader.latest(site="Kalshi")] == [0.99]
@@ -0,0 +1,45 @@
+from utils.semantic_matcher import SemanticMatcher
+
+FIRST_RUN = [
+    [{"site": "Polymarket", "product": "Will Bitcoin hit $100k in 2025?"},
+     {"site": "Polymarket", "product": "Will the Fed cut rates in March?"}],
+    [{"site": "Kalshi", "product": "Will Bitcoin hit $100k in 2025"},
+     {"site": "Kalshi", "product": "Who will win the 2028 election?"}],
+]
+
+SECOND_RUN = FIRST_RUN + [
+    [{"site": "PredictionMarket", "product": "Will the Fed cut rates in March"},
+     {"site": "PredictionMarket", "product": "Will Ethereum flip Bitcoin by 2030?"}],
+]
+
+
+def groups(unified):
+    return {u["cluster_id"]: sorted(entry["product"] for entry in u["entries"]) for u in unified}
+
+
+def test_reloaded_state_gives_the_same_clusters(tmp_path):
+    path = str(tmp_path / "state.json")
+    first = SemanticMatcher()
+    unified = first.unify(FIRST_RUN)
+    first.save_state(path)
+
+    reloaded = SemanticMatcher()
+    assert reloaded.load_state(path)
+    assert groups(reloaded.unify(FIRST_RUN)) == groups(unified)
+
+
+def test_incremental_run_matches_a_fresh_run_and_keeps_ids(tmp_path):
+    path = str(tmp_path / "state.json")
+    first = SemanticMatcher()
+    first_ids = groups(first.unify(FIRST_RUN))
+    first.save_state(path)
+
+    incremental = SemanticMatcher()
+    incremental.load_state(path)
+    second = groups(incremental.unify(SECOND_RUN))
+
+    # Clusters from the first run keep their ids; the new site's items join them or open new ones
+    for cluster_id, members in first_ids.items():
+        assert set(members) <= set(second[cluster_id])
+    fresh = groups(SemanticMatcher().unify(SECOND_RUN))
+    assert sorted(second.values()) == sorted(fresh.values())
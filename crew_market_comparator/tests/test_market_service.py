@@ -0,0 +1,80 @@
+import threading
+
+from utils.market_service import MarketService
+from utils.semantic_matcher import SemanticMatcher
+from utils.similarity_cache import SimilarityCache
+
+
+class ListScraper:
+    """Returns the next of its prepared listings on every fetch"""
+
+    def __init__(self, site_name, listings):
+        self.site_name = site_name
+        self.listings = list(listings)
+
+    def fetch_data(self):
+        titles = self.listings.pop(0) if len(self.listings) > 1 else self.listings[0]
+        return [{"site": self.site_name, "product": title, "price": "50¢"} for title in titles]
+
+
+def make_service(scrapers, matcher):
+    return MarketService(scrapers, [60], matcher=matcher, port=0)
+
+
+def refresh_in_thread(service, scraper):
+    thread = threading.Thread(target=service.refresh, args=(scraper,))
+    thread.start()
+    thread.join()
+
+
+def test_refresh_threads_share_an_on_disk_similarity_cache(tmp_path):
+    cache = SimilarityCache(path=str(tmp_path / "sim.sqlite"), batch_size=1)
+    polymarket = ListScraper("Polymarket", [["Will Bitcoin hit $100k in 2025?", "Will the Fed cut rates in March?"]])
+    kalshi = ListScraper("Kalshi", [["Will Bitcoin hit $100k in 2025", "Who will win the 2028 election?"]])
+    service = make_service([polymarket, kalshi], SemanticMatcher(cache=cache))
+    try:
+        refresh_in_thread(service, polymarket)
+        refresh_in_thread(service, kalshi)
+    finally:
+        service.httpd.server_close()
+        cache.close()
+
+    assert all(site["errors"] == 0 for site in service.sites.values())
+    assert len(service.snapshot.markets) == 3
+    assert cache.stats()["misses"] > 0
+
+
+def test_delisted_markets_are_pruned_and_survivors_keep_their_ids():
+    polymarket = ListScraper("Polymarket", [
+        ["Will Bitcoin hit $100k in 2025?", "Will the Fed cut rates in March?"],
+        ["Will Bitcoin hit $100k in 2025?", "Who will win the 2028 election?"],
+    ])
+    matcher = SemanticMatcher()
+    service = make_service([polymarket], matcher)
+    try:
+        service.refresh(polymarket)
+        bitcoin_id = service.snapshot.markets[0]["cluster_id"]
+        service.refresh(polymarket)
+    finally:
+        service.httpd.server_close()
+
+    assert sorted(c["product"] for c in matcher.clusters) == [
+        "Who will win the 2028 election?", "Will Bitcoin hit $100k in 2025?"]
+    assert service.snapshot.by_id[bitcoin_id]["product"] == "Will Bitcoin hit $100k in 2025?"
+
+
+def test_a_failed_rebuild_is_logged_and_counted():
+    class BrokenMatcher(SemanticMatcher):
+        def unify(self, all_data):
+            raise ValueError("boom")
+
+    polymarket = ListScraper("Polymarket", [["Will Bitcoin hit $100k in 2025?"]])
+    service = make_service([polymarket], BrokenMatcher())
+    try:
+        service.refresh(polymarket)
+    finally:
+        service.httpd.server_close()
+
+    site = service.sites["ListScraper(Polymarket)"]
+    assert site["errors"] == 1
+    assert site["last_success"] is None
@@ -0,0 +1,42 @@
+import re
+
+from utils.match_scorer import BatchScorer, top_matches
+
+PRODUCTS = [
+    "Will Bitcoin hit $100k in 2025?",
+    "Will Bitcoin close above $90k in March?",
+    "Will the Fed cut rates in March?",
+    "Bitcoin",
+    "Who will win the 2028 election?",
+    "",
+    "Will  the FED cut rates in March 2025?",
+]
+
+
+def calculate_match_score(query, product_text):
+    """The original per-row score BatchScorer replaced"""
+    query_words = set(re.findall(r'\w+', query.lower()))
+    product_words = set(re.findall(r'\w+', product_text.lower()))
+    exact_matches = query_words.intersection(product_words)
+    partial_matches = sum(1 for qw in query_words
+                          for pw in product_words
+                          if qw in pw or pw in qw)
+    length_bonus = len(query_words) * 0.1
+    return len(exact_matches) * 2 + partial_matches * 0.5 + length_bonus
+
+
+def test_batch_scores_match_the_per_row_score():
+    scorer = BatchScorer()
+    for query in ["bitcoin", "will bitcoin", "fed cut March", "2025", "in", "b", "?", ""]:
+        expected = [calculate_match_score(query, product) for product in PRODUCTS]
+        assert scorer.score(query, PRODUCTS) == expected
+        # Cached product tokens and a subset of positions give the same scores
+        assert scorer.score(query, PRODUCTS, cache_key="snapshot") == expected
+        assert scorer.score(query, PRODUCTS, cache_key="snapshot", positions=[4, 0]) == [expected[4], expected[0]]
+
+
+def test_top_matches_keeps_the_stable_sort_order():
+    results = [{"product": product, "match_score": score}
+               for product, score in zip(PRODUCTS, BatchScorer().score("will bitcoin", PRODUCTS))]
+    expected = sorted(results, key=lambda x: x["match_score"], reverse=True)[:3]
+    assert top_matches(results, 3) == expected
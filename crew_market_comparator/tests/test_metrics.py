@@ -0,0 +1,74 @@
+import json
+import re
+
+from utils.metrics import PhaseTimer, RunMetrics
+
+# One sample line of the text format: name, optional labels, value
+SAMPLE = re.compile(r'^[a-zA-Z_:][a-zA-Z0-9_:]*(\{[a-zA-Z_][a-zA-Z0-9_]*="(?:[^"\\\n]|\\["\\n])*"\})? \S+$')
+
+
+def recorded():
+    metrics = RunMetrics()
+    with metrics.span("scrape"):
+        pass
+    metrics.begin('odd "stage"\\name\n')
+    metrics.end('odd "stage"\\name\n')
+    metrics.count("items", 40)
+    metrics.count("items", 2)
+    metrics.count("pairs-scored")
+    metrics.set("peak_rss_mb", 104.9)
+    return metrics
+
+
+def test_prometheus_text_has_help_and_type_for_every_metric():
+    text = recorded().to_prometheus()
+    assert text.endswith("\n")
+    lines = text.splitlines()
+
+    samples = [line for line in lines if not line.startswith("#")]
+    assert all(SAMPLE.match(line) for line in samples), samples
+    for sample in samples:
+        name = re.split(r"[{ ]", sample)[0]
+        assert f"# HELP {name} " in text
+        assert f"# TYPE {name} " in text
+
+    assert "market_pipeline_items_total 42" in lines
+    assert "# TYPE market_pipeline_items_total counter" in lines
+    assert "market_pipeline_pairs_scored_total 1" in lines
+    assert "market_pipeline_peak_rss_mb 104.9" in lines
+    # Label values escape backslash, double quote and newline
+    assert any(line.startswith('market_pipeline_stage_seconds{stage="odd \\"stage\\"\\\\name\\n"} ') for line in lines)
+    # Each HELP and TYPE appears once per metric family
+    assert lines.count("# TYPE market_pipeline_stage_seconds gauge") == 1
+
+
+def test_json_export_keys(tmp_path):
+    metrics = recorded()
+    path = str(tmp_path / "metrics.json")
+    metrics.export(path)
+    with open(path, encoding="utf-8") as f:
+        exported = json.load(f)
+
+    assert set(exported) == {"started_at", "spans", "counters", "gauges"}
+    assert set(exported["spans"]) == {"scrape", 'odd "stage"\\name\n'}
+    assert exported["counters"] == {"items": 42, "pairs-scored": 1}
+    assert exported["gauges"] == {"peak_rss_mb": 104.9}
+
+    prometheus = str(tmp_path / "metrics.prom")
+    metrics.export(prometheus)
+    with open(prometheus, encoding="utf-8") as f:
+        assert f.read() == metrics.to_prometheus()
+
+
+def test_phase_timer_skips_and_merges():
+    timer = PhaseTimer()
+    timer.phases = {"navigation": 1.0}
+    worker = PhaseTimer()
+    worker.phases = {"navigation": 0.5, "extraction": 0.25}
+    timer.merge(worker)
+    assert timer.as_dict() == {"navigation": 1.5, "extraction": 0.25}
+    assert timer.total() == 1.75
+
+    timer.skip()
+    timer.lap("readiness")
+    assert 0 <= timer.phases["readiness"] < 0.5
@@ -0,0 +1,77 @@
+import csv
+
+from test_semantic_matcher import market_titles, unify_groups
+from utils.csv_writer import CSVWriter, StreamingCSVWriter
+from utils.online_matcher import OnlineMatcher
+from utils.semantic_matcher import SemanticMatcher
+
+SITES = ["Polymarket", "Kalshi"]
+
+
+def records(titles):
+    return [{"site": SITES[n % 2], "product": title, "price": f"{n % 90 + 5}%"} for n, title in enumerate(titles)]
+
+
+def streamed_groups(matcher, items):
+    groups = {}
+    for item in items:
+        cluster_id, _, _ = matcher.assign(item)
+        groups.setdefault(cluster_id, []).append(item["product"])
+    return [groups[cluster_id] for cluster_id in sorted(groups)]
+
+
+def test_streamed_groups_match_batch_unify():
+    titles = market_titles()
+    # A record joins the oldest cluster it matches, exactly as the greedy batch pass absorbs it
+    assert streamed_groups(OnlineMatcher(), records(titles)) == unify_groups(SemanticMatcher(), titles)
+
+
+def test_cold_clusters_are_evicted_and_the_index_rebuilt():
+    matcher = OnlineMatcher(max_clusters=3)
+    titles = ["Will Bitcoin close above $150k this year?", "Who wins the 2028 presidential election?",
+              "Fed rate cut at the March FOMC meeting", "Tesla deliveries beat analyst estimates",
+              "Gold trades under two thousand dollars", "Oscars: best picture goes to a comedy",
+              "Nvidia becomes the largest company on earth", "Snowfall in Miami before January ends"]
+    for title in titles:
+        matcher.assign({"site": "Kalshi", "product": title})
+
+    stats = matcher.stats()
+    assert (stats["clusters"], stats["live_clusters"], stats["evicted"]) == (8, 3, 5)
+    # Seven positions passed 2 * max_clusters, so the index was rebuilt from the live clusters
+    assert len(matcher.positions) <= 2 * matcher.max_clusters
+    assert set(matcher.representatives.values()) == set(titles[-3:])
+
+    # A live representative still matches; an evicted one opens a new cluster
+    assert matcher.assign({"site": "Polymarket", "product": titles[-1]})[0] == 8
+    assert matcher.assign({"site": "Polymarket", "product": titles[0]})[0] == 9
+
+
+def test_streamed_rows_roll_up_to_the_batch_csv(tmp_path):
+    items = records(market_titles(count=60))
+    streamed_path = str(tmp_path / "streamed.csv")
+    writer = StreamingCSVWriter(streamed_path)
+    for match in OnlineMatcher().stream(items):
+        writer.write(match)
+    writer.close()
+
+    batch_path = str(tmp_path / "unified.csv")
+    CSVWriter(batch_path).write(SemanticMatcher().unify([items]))
+
+    streamed = {}
+    with open(streamed_path, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            group = streamed.setdefault(row["Cluster_ID"], {"product": row["Product"], "prices": {}})
+            group["prices"].setdefault(row["Site"], []).append(row["Price"])
+    with open(batch_path, newline="", encoding="utf-8") as f:
+        batch = list(csv.DictReader(f))
+
+    assert len(streamed) == len(batch)
+    for row in batch:
+        group = streamed[row["Cluster_ID"]]
+        assert group["product"] == row["Product"]
+        assert sum(len(prices) for prices in group["prices"].values()) == int(row["Total_Entries"])
+        for site in SITES:
+            prices = group["prices"].get(site, [])
+            assert " | ".join(prices) == row[f"{site}_Price"]
+            # pandas writes the counts as floats, and leaves them empty for sites not in the group
+            assert len(prices) == int(float(row[f"{site}_Count"] or 0))
@@ -0,0 +1,15 @@
+from utils.semantic_matcher import SemanticMatcher
+
+from test_semantic_matcher import market_titles, scattered_edit_pairs
+
+
+def signature(unified):
+    return [(u["product"], [entry["product"] for entry in u["entries"]], u["confidence"]) for u in unified]
+
+
+def test_parallel_unify_merges_to_the_single_process_groups():
+    titles = market_titles(120) + scattered_edit_pairs(5)
+    data = [[{"site": "Test", "product": title} for title in titles]]
+    single = SemanticMatcher().unify(data)
+    parallel = SemanticMatcher(workers=2, chunk_size=8, min_parallel_items=1).unify(data)
+    assert signature(parallel) == signature(single)
@@ -0,0 +1,43 @@
+import csv
+
+from utils.csv_writer import CSVWriter
+from utils.price_parser import parse_price, parse_prices, price_text
+
+
+def test_card_fields_are_parsed():
+    fields = parse_price("Will Bitcoin hit $100k in 2025?\n28%\nchance\n$48m Vol.\n150 bps decrease")
+    assert fields == {"probability": 0.28, "volume": 48e6, "change_bps": -150}
+    assert parse_price("Fed decision in March\nYes 27¢\nNo 74¢\nVol: 1.5k")["probability"] == 0.27
+    assert parse_price("27¢ 45%") == {"probability": 0.45, "volume": None, "change_bps": None}
+    assert parse_price("N/A") == {"probability": None, "volume": None, "change_bps": None}
+    assert parse_price(None) == {"probability": None, "volume": None, "change_bps": None}
+
+
+def test_numbers_in_the_question_are_not_prices():
+    assert parse_price("Will CPI exceed 3% in May?\n28%")["probability"] == 0.28
+    assert parse_price("Will CPI exceed 3% in May? 28%")["probability"] == 0.28
+    assert parse_price("Will CPI exceed 3% in May?")["probability"] is None
+    assert parse_price("Rates above 4.5% by June\n$2m Vol.")["probability"] is None
+    assert price_text("Will CPI exceed 3%?\n28%\nchance") == "28%\nchance"
+
+
+def test_batch_scan_matches_one_text_at_a_time():
+    texts = ["Will CPI exceed 3%?\n28%", "61%", None, "Will X?\nYes 27¢\n$3m Vol.", "12 bps increase"]
+    assert parse_prices(texts) == [parse_price(text) for text in texts]
+
+
+def test_change_bps_is_written_to_the_csv(tmp_path):
+    path = str(tmp_path / "unified_products_1.csv")
+    CSVWriter(path).write([{
+        "product": "Will Bitcoin hit $100k in 2025?", "confidence": 0.9,
+        "entries": [
+            {"site": "Kalshi", "price": "28¢", "probability": 0.28, "volume": None, "change_bps": -150},
+            {"site": "Kalshi", "price": "30¢", "probability": 0.30, "volume": None, "change_bps": -50},
+            {"site": "Polymarket", "price": "Will X?\n31%"},
+        ],
+    }])
+    with open(path, newline="", encoding="utf-8") as f:
+        row = next(csv.DictReader(f))
+    assert float(row["Kalshi_Change_Bps"]) == -100
+    assert row["Polymarket_Change_Bps"] == ""
+    assert float(row["Polymarket_Probability"]) == 0.31
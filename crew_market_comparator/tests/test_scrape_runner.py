@@ -0,0 +1,102 @@
+import threading
+
+import scrapers.browser_pool as browser_pool
+from scrapers.mock_scraper import MockScraper
+from scrapers.polymarket_scraper import PolymarketScraper
+from utils.scrape_runner import run_scrapers, stream_scrapers
+
+from test_crawler import FakeDriver, make_site
+
+
+class StuckDriver(FakeDriver):
+    """A session whose page load never returns until the session is quit"""
+
+    def __init__(self, site):
+        super().__init__(site)
+        self.quit_called = threading.Event()
+
+    def get(self, url):
+        self.quit_called.wait(30)
+        raise RuntimeError("session was quit")
+
+    def execute_script(self, script, *args):
+        if self.quit_called.is_set():
+            raise RuntimeError("session was quit")
+        return super().execute_script(script, *args)
+
+    def quit(self):
+        self.quit_called.set()
+
+
+def test_abandoned_scraper_gives_its_pooled_session_back(monkeypatch):
+    site = make_site("a")
+    stuck = StuckDriver(site)
+    drivers = iter([stuck])
+    monkeypatch.setattr(browser_pool, "new_driver", lambda options=None: next(drivers, None) or FakeDriver(site))
+    pool = browser_pool.BrowserPool(size=1)
+    scraper = PolymarketScraper(pool=pool, page_url="http://a/markets/1", concurrency=1)
+
+    _, outcomes = run_scrapers([scraper], timeout=0.2)
+    assert outcomes == ["timeout"]
+    assert stuck.quit_called.is_set()
+    # The pool's only slot is free again for the next scraper
+    assert pool.acquire(timeout=5) is not stuck
+
+
+class HungDriver(StuckDriver):
+    """A session whose page load stays stuck even after the session is quit"""
+
+    def get(self, url):
+        threading.Event().wait(10)
+
+
+def test_session_of_a_hung_scraper_is_freed_before_its_thread_returns(monkeypatch):
+    site = make_site("a")
+    hung = HungDriver(site)
+    drivers = iter([hung])
+    monkeypatch.setattr(browser_pool, "new_driver", lambda options=None: next(drivers, None) or FakeDriver(site))
+    pool = browser_pool.BrowserPool(size=1)
+    scraper = PolymarketScraper(pool=pool, page_url="http://a/markets/1", concurrency=1)
+
+    _, outcomes = run_scrapers([scraper], timeout=0.2)
+    assert outcomes == ["timeout"]
+    assert hung.quit_called.is_set()
+    driver = pool.acquire(timeout=1)
+    assert driver is not hung
+    assert pool.stats()["discarded"] == 1
+
+
+def test_closing_the_pool_quits_sessions_still_leased(monkeypatch):
+    site = make_site("a")
+    monkeypatch.setattr(browser_pool, "new_driver", lambda options=None: StuckDriver(site))
+    pool = browser_pool.BrowserPool(size=2)
+    pool.warm()
+    leased = pool.acquire(timeout=1)
+    [idle] = pool.idle
+
+    pool.close()
+    assert leased.quit_called.is_set() and idle.quit_called.is_set()
+    # The late holder hands back a session that is already gone, and it is not reused
+    pool.release(leased)
+    assert pool.idle == []
+    try:
+        pool.acquire(timeout=1)
+    except RuntimeError:
+        pass
+    else:
+        raise AssertionError("a closed pool handed out a session")
+
+
+class KeepFirst:
+    """Stands in for a ChangeDetector that has seen every record but the first product before"""
+
+    def keep(self, record):
+        return record["product"].startswith("Mock Product 1 ")
+
+
+def test_streamed_mock_records_honour_the_scraper_state():
+    scraper = MockScraper("Kalshi")
+    scraper.changes = KeepFirst()
+    streamed = list(stream_scrapers([scraper]))
+    assert streamed == scraper.fetch_data()
+    assert [record["product"] for record in streamed] == ["Mock Product 1 from Kalshi"]
@@ -0,0 +1,135 @@
+import csv
+import os
+
+from test_semantic_matcher import market_titles
+from utils.history_store import product_key
+from utils.match_scorer import BatchScorer, top_matches
+from utils.search_index import SearchIndex, tokenize, trigrams
+from utils.snapshot_reader import collapse_latest, scan_snapshots
+
+TITLES = [
+    "Will Bitcoin hit $100k in 2025?",
+    "Will Bitcoin close above $90k in March?",
+    "Will the Fed cut rates in March?",
+    "Will Ethereum flip Bitcoin by 2030?",
+    "Who will win the 2028 election?",
+    "Will  the FED cut rates in March?",
+]
+
+
+def write_snapshot(directory, timestamp, titles, price):
+    path = os.path.join(directory, f"unified_products_{timestamp}.csv")
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["Cluster_ID", "Product", "Confidence", "Total_Entries", "Kalshi_Price", "Polymarket_Price"])
+        for n, title in enumerate(titles):
+            writer.writerow([n + 1, title, 0.9, 2, f"{price + n}%", f"{price + n + 1}%"])
+    return path
+
+
+def build(tmp_path):
+    paths = [
+        write_snapshot(str(tmp_path), 1790000000, TITLES[:4], 10),
+        write_snapshot(str(tmp_path), 1790003600, TITLES[1:], 20),
+        write_snapshot(str(tmp_path), 1790007200, TITLES[::2], 30),
+    ]
+    index = SearchIndex(str(tmp_path / "search_index.db"))
+    index.update(str(tmp_path / "unified_products_*.csv"))
+    return index, paths
+
+
+def scanned(query, paths, k=10):
+    """The CSV path of search_markets: every matching row, collapsed, scored, best k"""
+    rows, _ = scan_snapshots(query, paths, workers=1, cache_dir=None)
+    results = collapse_latest(rows)
+    for result, score in zip(results, BatchScorer().score(query, [r["product"] for r in results])):
+        result["match_score"] = score
+    return top_matches(results, k), len(results), len(rows)
+
+
+def test_index_search_matches_the_snapshot_scan(tmp_path):
+    index, paths = build(tmp_path)
+    for query in ["will", "bitcoin", "in march", "fed cut", "itc", "20", "?", "nothing here"]:
+        results, total, rows = index.search(query, k=3, history=True)
+        expected, expected_total, expected_rows = scanned(query, paths, k=3)
+        assert (total, rows) == (expected_total, expected_rows), query
+        assert [r["match_score"] for r in results] == [r["match_score"] for r in expected], query
+        for result in results:
+            reference = next(r for r in collapse_latest(scan_snapshots(query, paths, workers=1, cache_dir=None)[0])
+                             if r["product"].lower().split() == result["product"].lower().split())
+            assert result["file"] == reference["file"]
+            assert result["kalshi_price"] == reference["kalshi_price"]
+            assert result["snapshots"] == len(reference["history"])
+            assert [seen["file"] for seen in result["history"]] == [seen["file"] for seen in reference["history"]]
+
+
+def test_update_adds_new_snapshots_and_forgets_deleted_ones(tmp_path):
+    index, paths = build(tmp_path)
+    assert index.search("gold")[1] == 0
+
+    newest = write_snapshot(str(tmp_path), 1790010800, ["Will gold top $3000?", TITLES[4]], 50)
+    index.update(str(tmp_path / "unified_products_*.csv"))
+    results, total, _ = index.search("gold")
+    assert total == 1 and results[0]["file"] == newest and results[0]["snapshots"] == 1
+    assert index.search("election")[0][0]["snapshots"] == 3
+
+    os.remove(paths[1])
+    os.remove(newest)
+    index.update(str(tmp_path / "unified_products_*.csv"))
+    assert index.search("gold")[1] == 0
+    results, _, _ = index.search("fed cut")
+    assert results[0]["snapshots"] == 2 and results[0]["file"] == paths[2]
+
+
+def brute_force_fuzzy(query, titles, cutoff):
+    """Every market compared word by word: trigram Jaccard of each query word to its closest product word"""
+    words = list(dict.fromkeys(tokenize(query)))
+    scores = {}
+    for title in titles:
+        product_words = tokenize(title)
+        best = [max(len(trigrams(w) & trigrams(p)) / len(trigrams(w) | trigrams(p)) for p in product_words)
+                for w in words]
+        if words and all(similarity >= cutoff for similarity in best):
+            scores[product_key(title)] = sum(best) / len(words)
+    return scores
+
+
+def test_fuzzy_search_matches_a_brute_force_trigram_scan(tmp_path):
+    titles = market_titles(count=300) + TITLES
+    write_snapshot(str(tmp_path), 1790000000, titles[:200], 10)
+    write_snapshot(str(tmp_path), 1790003600, titles[150:], 20)
+    index = SearchIndex(str(tmp_path / "search_index.db"))
+    index.update(str(tmp_path / "unified_products_*.csv"))
+
+    queries = ["bitcon", "etherium hit", "fed rat", "tesal clse abve", "electon 2028", "inflaton 2027", "qqqq", "?"]
+    for cutoff in (0.3, 0.5):
+        for query in queries:
+            expected = brute_force_fuzzy(query, titles, cutoff)
+            results, total = index.fuzzy_search(query, cutoff=cutoff, k=len(titles))
+            assert total == len(expected), (query, cutoff)
+            found = {product_key(r["product"]): r["similarity"] for r in results}
+            assert found == {key: round(score, 3) for key, score in expected.items()}, (query, cutoff)
+
+            top, _ = index.fuzzy_search(query, cutoff=cutoff, k=5)
+            best = sorted(expected.values(), reverse=True)[:5]
+            assert [r["similarity"] for r in top] == [round(score, 3) for score in best], (query, cutoff)
+    assert index.fuzzy_search("bitcon", cutoff=0.3)[1] > 0
+
+
+def test_searches_skip_the_stat_of_indexed_snapshots(tmp_path):
+    index, paths = build(tmp_path)
+    pattern = str(tmp_path / "unified_products_*.csv")
+    assert index.update(pattern) == 0
+
+    # Rewritten in place: only a verifying update stats it again
+    write_snapshot(str(tmp_path), 1790007200, ["Will gold top $3000?"] * 3, 50)
+    assert index.update(pattern, verify=False) == 0
+    assert index.update(pattern) == 3
+    assert index.search("gold")[1] == 1
+
+    # New and deleted snapshots are found from the glob alone
+    os.remove(paths[0])
+    write_snapshot(str(tmp_path), 1790010800, ["Will silver top $40?"], 50)
+    assert index.update(pattern, verify=False) == 1
+    assert index.search("silver")[1] == 1
+    assert index.search("2025")[1] == 0
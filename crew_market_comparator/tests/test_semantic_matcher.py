@@ -0,0 +1,100 @@
+import difflib
+import random
+import string
+
+from utils.semantic_matcher import SemanticMatcher, ShingleIndex
+
+
+def greedy_groups(titles, threshold=0.7):
+    """The original unification: every unassigned title absorbs each later one above the threshold"""
+    remaining = list(range(len(titles)))
+    groups = []
+    while remaining:
+        base = remaining.pop(0)
+        group = [base]
+        for other in list(remaining):
+            if difflib.SequenceMatcher(None, titles[base], titles[other]).ratio() > threshold:
+                group.append(other)
+                remaining.remove(other)
+        groups.append([titles[i] for i in group])
+    return groups
+
+
+def market_titles(count=150, seed=7):
+    """Market-like titles, each listed a few times with small edits as on different sites"""
+    rng = random.Random(seed)
+    subjects = ["Bitcoin", "Ethereum", "the Fed", "Trump", "Apple", "Tesla", "Inflation", "the S&P 500"]
+    verbs = ["be above", "hit", "cut rates to", "drop below", "close above"]
+    titles = []
+    while len(titles) < count:
+        base = f"Will {rng.choice(subjects)} {rng.choice(verbs)} {rng.randint(1, 500)} by {rng.randint(2025, 2030)}?"
+        for _ in range(rng.randint(1, 3)):
+            title = list(base)
+            for _ in range(rng.randint(0, 2)):
+                title[rng.randrange(len(title))] = rng.choice(string.ascii_lowercase)
+            titles.append("".join(title))
+    return titles[:count]
+
+
+def scattered_edit_pairs(count=15, seed=3):
+    """Pairs whose matching blocks alternate between 2 and 3 characters: ratio 0.71, almost no shared trigrams"""
+    rng = random.Random(seed)
+    titles = []
+    for _ in range(count):
+        base = "".join(rng.choice(string.ascii_lowercase) for _ in range(42))
+        edited = list(base)
+        position, step = 0, 0
+        while position < len(edited):
+            position += 2 if step % 2 == 0 else 3
+            if position < len(edited):
+                edited[position] = chr((ord(edited[position]) - 97 + 13) % 26 + 97)
+            position += 1
+            step += 1
+        titles += [base, "".join(edited)]
+    return titles
+
+
+def unify_groups(matcher, titles):
+    unified = matcher.unify([[{"site": "Test", "product": title} for title in titles]])
+    return [[entry["product"] for entry in u["entries"]] for u in unified]
+
+
+def test_exhaustive_scan_is_the_default():
+    assert SemanticMatcher().blocking is False
+
+
+def test_exhaustive_groups_match_the_original_greedy_clustering():
+    titles = market_titles() + scattered_edit_pairs()
+    assert unify_groups(SemanticMatcher(), titles) == greedy_groups(titles)
+
+
+def test_blocking_groups_match_exhaustive_on_market_titles():
+    titles = market_titles()
+    assert unify_groups(SemanticMatcher(blocking=True), titles) == unify_groups(SemanticMatcher(), titles)
+
+
+def test_exhaustive_pairs_titles_sharing_few_shingles():
+    titles = scattered_edit_pairs()
+    pairs = [(titles[i], titles[i + 1]) for i in range(0, len(titles), 2)
+             if difflib.SequenceMatcher(None, titles[i], titles[i + 1]).ratio() > 0.7]
+    assert pairs
+    group_of = {title: n for n, group in enumerate(unify_groups(SemanticMatcher(), titles)) for title in group}
+    assert all(group_of[base] == group_of[edited] for base, edited in pairs)
+
+
+def test_blocking_matches_short_titles_by_length():
+    titles = ["Fed cut?", "Fed cuts?", "BTC 100k", "BTC 100k?", "Will the Fed cut rates?", "Will the Fed cut rate?"]
+    index = ShingleIndex(titles)
+    # Short titles only meet titles of a length that could clear the threshold
+    assert index.candidates(0) == [1, 2, 3]
+    assert unify_groups(SemanticMatcher(blocking=True), titles) == greedy_groups(titles)
+
+
+def test_stop_shingles_are_not_probed():
+    titles = [f"Will the price be above {n} on the day?" for n in range(30)]
+    index = ShingleIndex(titles, max_postings=5)
+    keys, required = index.probe_keys(index.shingles[0])
+    assert keys and all(len(index.postings[s]) <= 5 for s in keys)
+    assert required == 3
+    # Sharing only the template's shingles is not enough to be a candidate
+    assert len(index.candidates(0)) < len(titles) - 1
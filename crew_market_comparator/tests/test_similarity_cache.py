@@ -0,0 +1,88 @@
+import difflib
+import threading
+
+from utils.similarity_cache import SimilarityCache
+
+
+def ratio(base, other):
+    return difflib.SequenceMatcher(None, base, other).ratio()
+
+
+def test_memory_evicts_the_least_recently_used_pair():
+    cache = SimilarityCache(max_entries=2)
+    cache.lookup("a", "b", ratio)
+    cache.lookup("c", "d", ratio)
+    cache.lookup("a", "b", ratio)
+    cache.lookup("e", "f", ratio)
+
+    assert list(cache.memory) == [cache.key("a", "b"), cache.key("e", "f")]
+    assert cache.stats()["memory_hits"] == 1
+    assert cache.stats()["misses"] == 3
+
+
+def test_ratios_persist_across_reopen(tmp_path):
+    path = str(tmp_path / "sim.sqlite")
+    first = SimilarityCache(path=path)
+    expected = first.lookup("Will Bitcoin hit $100k?", "Will Bitcoin hit 100k", ratio)
+    first.close()
+
+    def fail(base, other):
+        raise AssertionError("ratio should come from disk")
+
+    reopened = SimilarityCache(path=path)
+    assert reopened.lookup("Will Bitcoin hit $100k?", "Will Bitcoin hit 100k", fail) == expected
+    # The reversed pair is a different key: SequenceMatcher ratios are not symmetric
+    reopened.lookup("Will Bitcoin hit 100k", "Will Bitcoin hit $100k?", ratio)
+    stats = reopened.stats()
+    assert (stats["memory_hits"], stats["disk_hits"], stats["misses"]) == (0, 1, 1)
+    assert stats["hit_rate"] == 0.5
+    reopened.close()
+
+
+def test_disk_keeps_the_most_recently_used_rows(tmp_path):
+    path = str(tmp_path / "sim.sqlite")
+    cache = SimilarityCache(path=path, max_disk_entries=3, batch_size=100)
+    for n in range(3):
+        cache.lookup(f"old {n}", "x", ratio)
+    cache.flush()
+    cache.conn.execute("UPDATE similarity SET used = 0")
+    cache.conn.commit()
+    for n in range(2):
+        cache.lookup(f"new {n}", "x", ratio)
+    cache.close()
+
+    cache = SimilarityCache(path=path)
+    keys = {row[0] for row in cache.conn.execute("SELECT key FROM similarity")}
+    assert len(keys) == 3
+    assert {cache.key("new 0", "x"), cache.key("new 1", "x")} <= keys
+    cache.close()
+
+
+def test_threads_share_one_on_disk_cache(tmp_path):
+    path = str(tmp_path / "sim.sqlite")
+    cache = SimilarityCache(path=path, max_entries=50, batch_size=7)
+    pairs = [(f"market {n}", f"market {n + 1}") for n in range(40)]
+    errors = []
+
+    def work(offset):
+        try:
+            for i in range(200):
+                base, other = pairs[(i + offset) % len(pairs)]
+                assert cache.lookup(base, other, ratio) == ratio(base, other)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=work, args=(n * 5,)) for n in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    cache.close()
+
+    assert errors == []
+    stats = cache.stats()
+    assert stats["lookups"] == 800
+    assert stats["memory_entries"] <= 50
+    reopened = SimilarityCache(path=path)
+    assert reopened.conn.execute("SELECT COUNT(*) FROM similarity").fetchone()[0] == len(pairs)
+    reopened.close()
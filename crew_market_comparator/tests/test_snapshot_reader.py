@@ -0,0 +1,71 @@
+import concurrent.futures
+import os
+
+import utils.snapshot_reader
+from utils.snapshot_reader import collapse_latest, read_columns, scan_snapshots
+
+from test_search_index import TITLES, write_snapshot
+
+
+def snapshots(tmp_path):
+    return [
+        write_snapshot(str(tmp_path), 1790000000, TITLES[:4], 10),
+        write_snapshot(str(tmp_path), 1790003600, TITLES[1:], 20),
+        write_snapshot(str(tmp_path), 1790007200, TITLES[::2], 30),
+    ]
+
+
+def test_collapse_keeps_the_newest_row_of_each_market(tmp_path):
+    paths = snapshots(tmp_path)
+    rows, count = scan_snapshots("fed", paths, workers=1, cache_dir=None)
+    assert count == 4 + 5 + 3 and len(rows) == 4
+
+    # "Will the Fed..." and "Will  the FED..." are one market, listed in every snapshot
+    [market] = collapse_latest(rows)
+    assert market["file"] == paths[2] and market["kalshi_price"] == "31%"
+    assert market["snapshots"] == 4
+    assert [seen["file"] for seen in market["history"]] == [paths[2], paths[1], paths[1], paths[0]]
+
+
+def test_collapse_merges_results_collapsed_before(tmp_path):
+    paths = snapshots(tmp_path)
+    rows, _ = scan_snapshots("bitcoin", paths, workers=1, cache_dir=None)
+    older = collapse_latest([row for row in rows if row["file"] != paths[2]])
+    newer = collapse_latest([dict(row) for row in rows if row["file"] == paths[2]])
+    merged = {market["product"]: market for market in collapse_latest(older + newer)}
+    expected = {market["product"]: market for market in collapse_latest(rows)}
+    assert merged.keys() == expected.keys()
+    for product, market in merged.items():
+        assert market["file"] == expected[product]["file"]
+        assert market["snapshots"] == expected[product]["snapshots"]
+        assert [seen["file"] for seen in market["history"]] == [seen["file"] for seen in expected[product]["history"]]
+
+
+def test_parallel_scan_matches_the_serial_scan(tmp_path, monkeypatch):
+    monkeypatch.setattr(utils.snapshot_reader, "PARALLEL_SCAN_FILES", 2)
+    paths = snapshots(tmp_path)
+    cache_dir = str(tmp_path / "cache")
+    for query in ["will", "march", "2028", "nothing"]:
+        assert scan_snapshots(query, paths, workers=3, cache_dir=cache_dir) == \
+            scan_snapshots(query, paths, workers=1, cache_dir=None)
+
+
+def test_few_snapshots_are_scanned_without_worker_processes(tmp_path, monkeypatch):
+    def no_pool(*args, **kwargs):
+        raise AssertionError("a process pool was started")
+    monkeypatch.setattr(concurrent.futures, "ProcessPoolExecutor", no_pool)
+    paths = snapshots(tmp_path)
+    rows, count = scan_snapshots("fed", paths, workers=8, cache_dir=None)
+    assert count == 12 and len(rows) == 4
+
+
+def test_cached_columns_follow_the_file(tmp_path):
+    path = snapshots(tmp_path)[0]
+    cache_dir = str(tmp_path / "cache")
+    first = read_columns(path, cache_dir)
+    assert len(os.listdir(cache_dir)) == 1
+    assert read_columns(path, cache_dir) == first
+
+    # A rewritten snapshot has a new size, so its stale cache entry is not used
+    write_snapshot(str(tmp_path), 1790000000, TITLES[:2], 10)
+    assert read_columns(path, cache_dir)["products"] == TITLES[:2]
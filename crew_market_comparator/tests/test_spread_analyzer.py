@@ -0,0 +1,87 @@
+import math
+import random
+
+from utils.price_parser import parse_price
+from utils.spread_analyzer import SpreadAnalyzer
+
+SITES = ["Kalshi", "Polymarket", "PredictionMarket"]
+
+
+def make_groups(size=300, seed=5):
+    """Groups on zero to three venues; coarse probabilities make ties, some prices do not parse"""
+    rng = random.Random(seed)
+    unified = []
+    for g in range(size):
+        entries = []
+        for site in rng.sample(SITES, rng.randint(1, 3)):
+            for _ in range(rng.randint(1, 2)):
+                roll = rng.random()
+                if roll < 0.15:
+                    entries.append({"site": site, "product": f"Market {g}", "price": f"{rng.randint(1, 9) * 10}¢"})
+                elif roll < 0.25:
+                    entries.append({"site": site, "product": f"Market {g}", "price": "N/A"})
+                else:
+                    entries.append({"site": site, "product": f"Market {g}", "price": "N/A",
+                                    "probability": rng.randint(1, 9) / 10})
+        unified.append({"product": f"Market {g}", "cluster_id": g + 1, "entries": entries, "confidence": 1.0})
+    return unified
+
+
+def reference(unified, fee):
+    """Group by group: venue means, cheapest venue (first on ties), dearest venue (last on ties)"""
+    expected = []
+    for u in unified:
+        values = {}
+        for entry in u["entries"]:
+            probability = entry["probability"] if "probability" in entry else parse_price(entry["price"])["probability"]
+            if probability is not None:
+                values.setdefault(entry["site"], []).append(probability)
+        means = [(site, sum(v) / len(v)) for site, v in sorted(values.items())]
+        if not means:
+            expected.append(None)
+            continue
+        ask = min(means, key=lambda m: m[1])
+        bid = max(reversed(means), key=lambda m: m[1])
+        spread = bid[1] - ask[1] if len(means) >= 2 else math.nan
+        expected.append((len(means), ask, bid, spread, spread > fee))
+    return expected
+
+
+def test_vectorized_analysis_matches_a_per_group_loop():
+    unified = make_groups()
+    analyzer = SpreadAnalyzer()
+    table = analyzer.analyze(unified)
+    venues = table["venues"]
+    expected = reference(unified, analyzer.fee)
+
+    assert any(e is None for e in expected) and any(e and math.isnan(e[3]) for e in expected)
+    assert any(e and e[1][1] == e[2][1] and e[0] >= 2 for e in expected)
+    for i, e in enumerate(expected):
+        if e is None:
+            assert table["venue_count"][i] == 0
+            assert math.isnan(table["spread"][i]) and not table["arbitrage"][i]
+            continue
+        venue_count, (ask_venue, best_ask), (bid_venue, best_bid), spread, arbitrage = e
+        assert table["venue_count"][i] == venue_count
+        assert venues[table["ask_venue"][i]] == ask_venue
+        assert venues[table["bid_venue"][i]] == bid_venue
+        assert math.isclose(table["best_ask"][i], best_ask)
+        assert math.isclose(table["best_bid"][i], best_bid)
+        if math.isnan(spread):
+            assert math.isnan(table["spread"][i])
+        else:
+            assert math.isclose(table["spread"][i], spread, abs_tol=1e-12)
+        assert bool(table["arbitrage"][i]) == arbitrage
+
+
+def test_rank_keeps_spreads_above_the_minimum_widest_first():
+    # Means are multiples of 0.05, so no spread sits on the 0.33 cut
+    unified = make_groups()
+    analyzer = SpreadAnalyzer(min_spread=0.33)
+    table = analyzer.analyze(unified)
+    rows = analyzer.rows(unified, table, analyzer.rank(table))
+
+    spreads = [e[3] for e in reference(unified, analyzer.fee) if e and not math.isnan(e[3])]
+    assert len(rows) == sum(spread >= 0.33 for spread in spreads)
+    assert [row["Spread"] for row in rows] == sorted((row["Spread"] for row in rows), reverse=True)
+    assert [row["Rank"] for row in rows] == list(range(1, len(rows) + 1))
@@ -0,0 +1,49 @@
+import random
+
+import numpy as np
+
+from utils.tfidf_matcher import TfidfMatcher
+
+
+def price_titles(count=600, seed=1):
+    """Templated titles that share most of their n-grams, the worst case for the products"""
+    rng = random.Random(seed)
+    assets = ["Bitcoin", "Ethereum", "Solana", "Gold", "Oil"]
+    return [
+        f"Will the {rng.choice(assets)} price be above ${rng.randint(1, 40) * 50:,} "
+        f"on {rng.choice(['January', 'March', 'June'])} {rng.randint(1, 5)}, {rng.randint(2025, 2026)}?"
+        for _ in range(count)
+    ]
+
+
+def full_product_neighbours(matcher, matrix):
+    """Every later row above the threshold, from the complete similarity matrix"""
+    scores = (matrix @ matrix.T).toarray()
+    neighbours = []
+    for row in range(matrix.shape[0]):
+        cols = [j for j in np.flatnonzero(scores[row] > matcher.threshold) if j > row]
+        neighbours.append({int(j): float(scores[row, j]) for j in cols})
+    return neighbours
+
+
+def test_prefix_filtered_neighbours_match_the_full_product():
+    matcher = TfidfMatcher(top_k=1000, chunk_size=64)
+    matrix = matcher.vectorize(price_titles())
+    expected = full_product_neighbours(matcher, matrix)
+    found = matcher.top_neighbours(matrix)
+
+    assert sum(len(row) for row in expected) > 0
+    assert [set(dict(row)) for row in found] == [set(row) for row in expected]
+    for row, reference in zip(found, expected):
+        for j, score in row:
+            assert abs(score - reference[j]) < 1e-5
+    # The filter must actually prune: far fewer exact scores than pairs
+    assert matcher.pairs_scored < len(expected) * (len(expected) - 1) / 2 / 4
+
+
+def test_top_k_keeps_the_best_neighbours():
+    matcher = TfidfMatcher(top_k=2)
+    matrix = matcher.vectorize(["Will Bitcoin hit 100k in 2025?"] * 5)
+    neighbours = matcher.top_neighbours(matrix)
+    assert [len(row) for row in neighbours] == [2, 2, 2, 1, 0]
+    assert [j for j, _ in neighbours[0]] == sorted(j for j, _ in neighbours[0])
@@ -0,0 +1,114 @@
+import csv
+import hashlib
+import json
+import os
+import threading
+import time
+
+from utils.price_parser import entry_fields
+
+DEFAULT_CHANGES_PATH = "change_hashes.json"
+
+COLUMNS = ["Change", "Cluster_ID", "Cluster_Product", "Site", "Product", "Price", "Probability", "Volume", "URL"]
+
+# Fields of a built record that make up its content; anything else is bookkeeping
+RECORD_FIELDS = ("product", "price", "url", "probability", "volume", "change_bps")
+
+
+def content_hash(*parts):
+    text = "\x00".join("" if part is None else str(part) for part in parts)
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=12).hexdigest()
+
+
+class ChangeDetector:
+    """
+    Content hashes of scraped records across runs, so records that look exactly as they
+    did last time are dropped at the scraper, before cleaning, matching or writing.
+
+    Hashes are kept per site and record key (the market link where there is one) and
+    forgotten once a record has not been seen for `max_age_days`.
+    """
+
+    def __init__(self, path=DEFAULT_CHANGES_PATH, max_age_days=7):
+        self.path = path
+        self.max_age = max_age_days * 86400
+        # Earlier runs' hashes as key -> [hash, last seen], and this run's as key -> hash
+        self.previous = {}
+        self.seen = {}
+        self.skipped = 0
+        self.new = 0
+        self.changed = 0
+        # Concurrent scrapers share one detector
+        self.lock = threading.Lock()
+        if path and os.path.exists(path):
+            self.load(path)
+
+    @property
+    def processed(self):
+        return self.new + self.changed
+
+    def check(self, site, key, *content):
+        """Return "unchanged", "new" or "changed" for one raw record, remembering its hash for the next run"""
+        record_key = f"{site}|{key}"
+        digest = content_hash(*content)
+        with self.lock:
+            previous = self.previous.get(record_key)
+            self.seen[record_key] = digest
+            if previous is None:
+                self.new += 1
+                return "new"
+            if previous[0] == digest:
+                self.skipped += 1
+                return "unchanged"
+            self.changed += 1
+            return "changed"
+
+    def keep(self, record):
+        """For records built without a cleaning step: tag the record and say whether it changed"""
+        status = self.check(record["site"], record.get("url") or record["product"],
+                            *(record.get(field) for field in RECORD_FIELDS))
+        record["change"] = status
+        return status != "unchanged"
+
+    def load(self, path):
+        with open(path, encoding="utf-8") as f:
+            state = json.load(f)
+        self.previous = state.get("hashes", {})
+
+    def save(self, path=None):
+        """Persist this run's hashes, keeping earlier ones until they age out"""
+        path = path or self.path
+        now = time.time()
+        state = {key: value for key, value in self.previous.items() if now - value[1] <= self.max_age}
+        for key, digest in self.seen.items():
+            state[key] = [digest, now]
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"saved_at": now, "hashes": state}, f)
+        os.replace(tmp_path, path)
+
+    def report(self):
+        print(f"Change detection: {self.processed} records processed ({self.new} new, {self.changed} changed), "
+              f"{self.skipped} unchanged skipped")
+
+
+def write_changes(filename, unified_products):
+    """One row per new or changed record with the cluster it joined: the compact delta of a run"""
+    entries = [(u, entry) for u in unified_products for entry in u["entries"]]
+    fields = entry_fields([entry for _, entry in entries])
+    with open(filename, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=COLUMNS)
+        writer.writeheader()
+        for (u, entry), typed in zip(entries, fields):
+            writer.writerow({
+                "Change": entry.get("change", "new"),
+                "Cluster_ID": u.get("cluster_id", ""),
+                "Cluster_Product": u["product"],
+                "Site": entry["site"],
+                "Product": entry["product"],
+                "Price": entry.get("price") or "N/A",
+                "Probability": typed["probability"],
+                "Volume": typed["volume"],
+                "URL": entry.get("url") or "",
+            })
+    return len(entries)
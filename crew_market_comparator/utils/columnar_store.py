@@ -0,0 +1,115 @@
+import os
+import time
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from pyarrow import fs
+
+from utils.price_parser import entry_fields, mean, total
+
+DEFAULT_STORE_DIR = "snapshots"
+
+# Fixed schema, so readers never have to infer columns from whichever sites returned data
+VENUES = ["Polymarket", "Kalshi", "Other"]
+SCHEMA = pa.schema(
+    [
+        ("snapshot_ts", pa.int64()),
+        ("cluster_id", pa.int64()),
+        ("product", pa.string()),
+        ("confidence", pa.float64()),
+        ("total_entries", pa.int32()),
+    ]
+    + [field for venue in VENUES for field in (
+        (f"{venue.lower()}_price", pa.string()),
+        (f"{venue.lower()}_count", pa.int32()),
+        (f"{venue.lower()}_probability", pa.float64()),
+        (f"{venue.lower()}_volume", pa.float64()),
+        (f"{venue.lower()}_change_bps", pa.float64()),
+    )]
+)
+
+
+def venue_for(site):
+    """Map a scraped site name onto one of the fixed venue columns"""
+    clean_site = site.replace("Scraper", "").replace("PredictionMarket", "Other")
+    return clean_site if clean_site in VENUES else "Other"
+
+
+class ParquetWriter:
+    """Writes each run as a Parquet file under a date partition of the snapshot store"""
+
+    def __init__(self, root=DEFAULT_STORE_DIR, timestamp=None):
+        self.root = root
+        self.timestamp = int(timestamp or time.time())
+        date = time.strftime("%Y-%m-%d", time.gmtime(self.timestamp))
+        self.filename = os.path.join(root, f"date={date}", f"unified_products_{self.timestamp}.parquet")
+
+    def write(self, unified_products):
+        columns = {name: [] for name in SCHEMA.names}
+        fields = iter(entry_fields([entry for u in unified_products for entry in u["entries"]]))
+
+        for u in unified_products:
+            prices = {venue: [] for venue in VENUES}
+            venue_fields = {venue: [] for venue in VENUES}
+            for entry in u["entries"]:
+                prices[venue_for(entry["site"])].append(entry.get("price", "N/A"))
+                venue_fields[venue_for(entry["site"])].append(next(fields))
+
+            columns["snapshot_ts"].append(self.timestamp)
+            columns["cluster_id"].append(u.get("cluster_id"))
+            columns["product"].append(u["product"])
+            columns["confidence"].append(u["confidence"])
+            columns["total_entries"].append(len(u["entries"]))
+            for venue in VENUES:
+                venue_prices = prices[venue]
+                columns[f"{venue.lower()}_price"].append(" | ".join(filter(None, venue_prices)) if venue_prices else None)
+                columns[f"{venue.lower()}_count"].append(len(venue_prices) if venue_prices else None)
+                columns[f"{venue.lower()}_probability"].append(mean(f["probability"] for f in venue_fields[venue]))
+                columns[f"{venue.lower()}_volume"].append(total(f["volume"] for f in venue_fields[venue]))
+                columns[f"{venue.lower()}_change_bps"].append(mean(f["change_bps"] for f in venue_fields[venue]))
+
+        table = pa.Table.from_pydict(columns, schema=SCHEMA)
+        os.makedirs(os.path.dirname(self.filename), exist_ok=True)
+        pq.write_table(table, self.filename, compression="zstd")
+        print(f"Parquet written with {table.num_rows} rows to {self.filename}")
+
+
+def open_store(root=DEFAULT_STORE_DIR):
+    """Open the snapshot store as a memory-mapped dataset partitioned by date"""
+    return ds.dataset(
+        root,
+        schema=SCHEMA.append(pa.field("date", pa.string())),
+        format="parquet",
+        partitioning="hive",
+        filesystem=fs.LocalFileSystem(use_mmap=True),
+    )
+
+
+def read_snapshots(root=DEFAULT_STORE_DIR, columns=None, filter=None):
+    """Read only the requested columns, pushing the filter down into the scan"""
+    return open_store(root).to_table(columns=columns, filter=filter)
+
+
+def search_snapshots(query, root=DEFAULT_STORE_DIR):
+    """Return rows whose product contains the query, newest snapshot first"""
+    if not os.path.isdir(root):
+        return []
+
+    columns = ["snapshot_ts", "product", "confidence", "total_entries", "kalshi_price", "polymarket_price", "date"]
+    matches = pc.match_substring(pc.utf8_lower(ds.field("product")), query.lower())
+    table = read_snapshots(root, columns=columns, filter=matches)
+    table = table.sort_by([("snapshot_ts", "descending")])
+
+    results = []
+    for row in table.to_pylist():
+        results.append({
+            'file': os.path.join(root, f"date={row['date']}", f"unified_products_{row['snapshot_ts']}.parquet"),
+            'product': row['product'],
+            'confidence': row['confidence'],
+            'total_entries': row['total_entries'],
+            'kalshi_price': row['kalshi_price'] or 'N/A',
+            'polymarket_price': row['polymarket_price'] or 'N/A',
+        })
+    return results
@@ -1,26 +1,43 @@
+import csv
+import time
 import pandas as pd
+from utils.search_index import SearchIndex
+from utils.history_store import HistoryStore
+from utils.price_parser import entry_fields, mean, total
 
 class CSVWriter:
-    def __init__(self, filename):
+    def __init__(self, filename, index_path=None, history_path=None):
         self.filename = filename
+        # When set, every written snapshot is also added to the search index
+        self.index_path = index_path
+        # When set, every written snapshot is also appended to the price history store
+        self.history_path = history_path
 
     def write(self, unified_products):
         rows = []
         
+        # Typed price fields for every entry up front, in one pass over any unparsed prices
+        fields = iter(entry_fields([entry for u in unified_products for entry in u["entries"]]))
+        
         for u in unified_products:
             row = {
                 "Product": u["product"], 
                 "Confidence": u["confidence"],
                 "Total_Entries": len(u["entries"])
             }
+            if "cluster_id" in u:
+                row["Cluster_ID"] = u["cluster_id"]
             
             # Group entries by site and extract prices
             site_data = {}
+            site_fields = {}
             for entry in u["entries"]:
                 site = entry['site']
                 if site not in site_data:
                     site_data[site] = []
+                    site_fields[site] = []
                 site_data[site].append(entry.get("price", "N/A"))
+                site_fields[site].append(next(fields))
             
             # Add site-specific columns
             for site, prices in site_data.items():
@@ -28,6 +45,10 @@ class CSVWriter:
                 clean_site = site.replace("Scraper", "").replace("PredictionMarket", "Other")
                 row[f"{clean_site}_Price"] = " | ".join(filter(None, prices)) if prices else "N/A"
                 row[f"{clean_site}_Count"] = len(prices)
+                # Numeric columns: mean implied probability, total volume and mean price change across the site's entries
+                row[f"{clean_site}_Probability"] = mean(f["probability"] for f in site_fields[site])
+                row[f"{clean_site}_Volume"] = total(f["volume"] for f in site_fields[site])
+                row[f"{clean_site}_Change_Bps"] = mean(f["change_bps"] for f in site_fields[site])
             
             rows.append(row)
 
@@ -35,9 +56,73 @@ class CSVWriter:
         
         # Reorder columns for better readability
         priority_cols = ["Product", "Confidence", "Total_Entries"]
+        if "Cluster_ID" in df.columns:
+            priority_cols.insert(0, "Cluster_ID")
         other_cols = [col for col in df.columns if col not in priority_cols]
         df = df[priority_cols + sorted(other_cols)]
         
         df.to_csv(self.filename, index=False)
         print(f"CSV written with {len(rows)} rows and {len(df.columns)} columns")
         print(f"Columns: {', '.join(df.columns)}")
+
+        if self.index_path:
+            index = SearchIndex(self.index_path)
+            if index.is_empty():
+                # A brand new index picks up the snapshots written before it existed
+                indexed = index.update()
+            else:
+                indexed = index.index_file(self.filename)
+            index.close()
+            print(f"Indexed {indexed} rows into {self.index_path}")
+
+        if self.history_path:
+            history = HistoryStore(self.history_path)
+            recorded = history.record(unified_products, source=self.filename)
+            history.close()
+            print(f"Recorded {recorded} price observations in {self.history_path}")
+
+
+class StreamingCSVWriter:
+    """Appends one row per matched record as it arrives, flushing every few rows instead of at the end"""
+
+    COLUMNS = ["Cluster_ID", "Product", "Similarity", "Site", "Title", "Price", "Probability", "Volume", "URL"]
+
+    def __init__(self, filename, flush_every=50, flush_interval=1.0):
+        self.filename = filename
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+        self.rows = 0
+        self.first_row_at = None
+
+        self.file = open(filename, "w", newline="", encoding="utf-8")
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(self.COLUMNS)
+        self.pending = 0
+        self.last_flush = time.perf_counter()
+
+    def write(self, match):
+        entry = match["entry"]
+        self.writer.writerow([
+            match["cluster_id"],
+            match["product"],
+            match["similarity"],
+            entry.get("site"),
+            entry.get("product"),
+            entry.get("price", "N/A"),
+            entry.get("probability"),
+            entry.get("volume"),
+            entry.get("url"),
+        ])
+        self.rows += 1
+        self.pending += 1
+        now = time.perf_counter()
+        if self.pending >= self.flush_every or now - self.last_flush >= self.flush_interval or self.rows == 1:
+            self.file.flush()
+            self.pending = 0
+            self.last_flush = now
+        if self.first_row_at is None:
+            self.first_row_at = now
+
+    def close(self):
+        self.file.close()
+        print(f"Streamed {self.rows} rows to {self.filename}")
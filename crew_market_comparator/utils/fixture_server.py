@@ -0,0 +1,70 @@
+import json
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qsl
+
+from scrapers.api_client import request_key
+
+
+class FixtureServer:
+    """Local HTTP server that replays recorded payloads, so fetch modes can be exercised offline"""
+
+    def __init__(self, fixtures, host="127.0.0.1", port=0):
+        if isinstance(fixtures, str):
+            with open(fixtures, encoding="utf-8") as f:
+                fixtures = json.load(f)
+        self.fixtures = fixtures
+        self.requests = 0
+
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive, like the real APIs
+
+            def do_GET(self):
+                server.requests += 1
+                parts = urlsplit(self.path)
+                key = request_key(parts.path, dict(parse_qsl(parts.query)))
+                payload = server.fixtures.get(key)
+                if payload is None:
+                    # Recorded pages are keyed by path alone, so cache busters still match
+                    payload = server.fixtures.get(parts.path)
+                if payload is None:
+                    self.send_response(404)
+                    body = b"{}"
+                    content_type = "application/json"
+                elif isinstance(payload, str):
+                    self.send_response(200)
+                    body = payload.encode("utf-8")
+                    content_type = "text/html; charset=utf-8"
+                else:
+                    self.send_response(200)
+                    body = json.dumps(payload).encode("utf-8")
+                    content_type = "application/json"
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self.httpd.daemon_threads = True
+        self.url = f"http://{host}:{self.httpd.server_address[1]}"
+        self.thread = None
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
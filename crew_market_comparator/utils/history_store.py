@@ -0,0 +1,135 @@
+import os
+import re
+import sqlite3
+import time
+
+from utils.price_parser import entry_fields, mean, total
+
+DEFAULT_HISTORY_PATH = "market_history.db"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS snapshots (
+    id INTEGER PRIMARY KEY,
+    taken_at REAL NOT NULL,
+    source TEXT,
+    markets INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS snapshots_taken ON snapshots (taken_at);
+CREATE TABLE IF NOT EXISTS observations (
+    snapshot_id INTEGER NOT NULL,
+    taken_at REAL NOT NULL,
+    product_key TEXT NOT NULL,
+    product TEXT NOT NULL,
+    cluster_id INTEGER,
+    confidence REAL,
+    site TEXT NOT NULL,
+    price TEXT,
+    probability REAL,
+    volume REAL,
+    change_bps REAL
+);
+CREATE INDEX IF NOT EXISTS observations_product ON observations (product_key, taken_at);
+CREATE INDEX IF NOT EXISTS observations_snapshot ON observations (snapshot_id);
+"""
+
+COLUMNS = ["taken_at", "product", "cluster_id", "confidence", "site", "price", "probability", "volume", "change_bps"]
+
+
+def product_key(product):
+    """Lookup key for a product title: case and spacing do not matter"""
+    return re.sub(r"\s+", " ", (product or "").strip().lower())
+
+
+class HistoryStore:
+    """
+    Append-only SQLite time series of unified snapshots, one row per product per site per run.
+
+    Rows are indexed by product key and time, so one product's history is a range scan
+    instead of a pass over every unified_products CSV.
+    """
+
+    def __init__(self, path=DEFAULT_HISTORY_PATH):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        # WAL keeps a committed snapshot durable without a sync per transaction
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        # Stores written before change_bps was tracked gain the column; their old rows stay NULL
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(observations)")}
+        if "change_bps" not in columns:
+            with self.conn:
+                self.conn.execute("ALTER TABLE observations ADD COLUMN change_bps REAL")
+
+    def close(self):
+        self.conn.close()
+
+    def record(self, unified_products, taken_at=None, source=None):
+        """Append one run's unified products in a single transaction; returns the rows written"""
+        taken_at = time.time() if taken_at is None else taken_at
+        fields = iter(entry_fields([entry for u in unified_products for entry in u["entries"]]))
+
+        rows = []
+        for u in unified_products:
+            # Same per-site rollup as the CSV columns: joined prices, mean probability and change, total volume
+            sites = {}
+            for entry in u["entries"]:
+                sites.setdefault(entry["site"], []).append((entry.get("price"), next(fields)))
+            key = product_key(u["product"])
+            for site, values in sites.items():
+                rows.append((
+                    taken_at, key, u["product"], u.get("cluster_id"), u.get("confidence"), site,
+                    " | ".join(filter(None, (price for price, _ in values))) or None,
+                    mean(f["probability"] for _, f in values),
+                    total(f["volume"] for _, f in values),
+                    mean(f["change_bps"] for _, f in values),
+                ))
+
+        with self.conn:
+            cursor = self.conn.execute(
+                "INSERT INTO snapshots (taken_at, source, markets) VALUES (?, ?, ?)",
+                (taken_at, source, len(unified_products))
+            )
+            snapshot_id = cursor.lastrowid
+            self.conn.executemany(
+                "INSERT INTO observations (snapshot_id, taken_at, product_key, product, cluster_id, confidence, "
+                "site, price, probability, volume, change_bps) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [(snapshot_id,) + row for row in rows]
+            )
+        return len(rows)
+
+    def price_history(self, product, since=None, until=None, site=None):
+        """Observations of one product, oldest first, optionally limited to a time range and a site"""
+        query = f"SELECT {', '.join(COLUMNS)} FROM observations WHERE product_key = ?"
+        params = [product_key(product)]
+        if since is not None:
+            query += " AND taken_at >= ?"
+            params.append(since)
+        if until is not None:
+            query += " AND taken_at <= ?"
+            params.append(until)
+        if site is not None:
+            query += " AND site = ?"
+            params.append(site)
+        query += " ORDER BY taken_at, site"
+        return [dict(zip(COLUMNS, row)) for row in self.conn.execute(query, params)]
+
+    def latest(self, site=None):
+        """Observations of the most recent snapshot"""
+        row = self.conn.execute("SELECT id FROM snapshots ORDER BY taken_at DESC, id DESC LIMIT 1").fetchone()
+        if row is None:
+            return []
+        query = f"SELECT {', '.join(COLUMNS)} FROM observations WHERE snapshot_id = ?"
+        params = [row[0]]
+        if site is not None:
+            query += " AND site = ?"
+            params.append(site)
+        return [dict(zip(COLUMNS, row)) for row in self.conn.execute(query + " ORDER BY rowid", params)]
+
+    def stats(self):
+        snapshots, first, last = self.conn.execute(
+            "SELECT COUNT(*), MIN(taken_at), MAX(taken_at) FROM snapshots"
+        ).fetchone()
+        observations = self.conn.execute("SELECT COUNT(*) FROM observations").fetchone()[0]
+        return {"snapshots": snapshots, "observations": observations, "first": first, "last": last,
+                "size_mb": os.path.getsize(self.path) / (1024 * 1024) if os.path.exists(self.path) else 0.0}
@@ -0,0 +1,301 @@
+import json
+import os
+import socketserver
+import statistics
+import threading
+import time
+from collections import deque
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qs
+
+from utils.match_scorer import BatchScorer, top_matches
+from utils.price_parser import entry_fields
+from utils.scrape_runner import scraper_name
+from utils.search_index import tokenize
+from utils.semantic_matcher import SemanticMatcher
+
+
+class MarketSnapshot:
+    """Read-only view of the unified markets that queries run against; replaced whole on every refresh"""
+
+    def __init__(self, unified, built_at=None):
+        self.built_at = built_at or time.time()
+        self.markets = []
+        self.by_id = {}
+        self.postings = {}
+        # Tokens are cached for this snapshot only and go away with it
+        self.scorer = BatchScorer()
+
+        fields = iter(entry_fields([entry for u in unified for entry in u["entries"]]))
+        for position, u in enumerate(unified):
+            prices = {}
+            probabilities = {}
+            entries = []
+            for entry in u["entries"]:
+                typed = next(fields)
+                prices.setdefault(entry["site"], []).append(entry.get("price", "N/A"))
+                if typed["probability"] is not None:
+                    probabilities.setdefault(entry["site"], []).append(typed["probability"])
+                entries.append({**{k: v for k, v in entry.items() if k in ("site", "product", "price", "url")}, **typed})
+            market = {
+                "cluster_id": u.get("cluster_id", position + 1),
+                "product": u["product"],
+                "confidence": u["confidence"],
+                "total_entries": len(entries),
+                "prices": {site: " | ".join(filter(None, values)) for site, values in prices.items()},
+                "probabilities": {site: sum(values) / len(values) for site, values in probabilities.items()},
+                "entries": entries,
+            }
+            self.markets.append(market)
+            self.by_id[market["cluster_id"]] = market
+            for token in set(tokenize(u["product"])):
+                self.postings.setdefault(token, []).append(position)
+        self.products = [market["product"] for market in self.markets]
+
+    def search(self, query, limit=10):
+        """Markets whose product contains the query, best match first, plus the total number of hits"""
+        query_lower = query.lower()
+        words = set(tokenize(query))
+
+        if words:
+            # Same narrowing as SearchIndex.search: every query word is inside some token of a match
+            candidates = None
+            for word in words:
+                positions = set()
+                for token, postings in self.postings.items():
+                    if word in token:
+                        positions.update(postings)
+                candidates = positions if candidates is None else candidates & positions
+                if not candidates:
+                    return [], 0
+            candidates = sorted(candidates)
+        else:
+            candidates = range(len(self.markets))
+
+        positions = [i for i in candidates if query_lower in self.products[i].lower()]
+        if not positions:
+            return [], 0
+        scores = self.scorer.score(query, self.products, cache_key="products", positions=positions)
+        results = []
+        for i, score in zip(positions, scores):
+            market = self.markets[i]
+            results.append({
+                "cluster_id": market["cluster_id"],
+                "product": market["product"],
+                "confidence": market["confidence"],
+                "total_entries": market["total_entries"],
+                "prices": market["prices"],
+                "match_score": score,
+            })
+        return top_matches(results, limit), len(results)
+
+
+class UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class MarketService:
+    """
+    Long-running service: refreshes each scraper on its own schedule, keeps the unified
+    markets in memory and answers search and lookup queries over a local HTTP API.
+
+    Endpoints (GET): /search?q=...&limit=10, /market?id=..., /stats, /health
+    """
+
+    def __init__(self, scrapers, intervals, matcher=None, host="127.0.0.1", port=8765, socket_path=None,
+                 latency_window=1000):
+        self.scrapers = list(scrapers)
+        self.intervals = [intervals[i % len(intervals)] for i in range(len(self.scrapers))]
+        # One matcher across refreshes: markets seen before go straight back to their cluster,
+        # and markets no site lists any more are pruned before every rebuild
+        self.matcher = matcher or SemanticMatcher()
+        self.site_data = {}
+        self.sites = {
+            scraper_name(scraper): {"interval": interval, "last_success": None, "last_attempt": None,
+                                    "duration": None, "items": 0, "refreshes": 0, "errors": 0}
+            for scraper, interval in zip(self.scrapers, self.intervals)
+        }
+        self.snapshot = MarketSnapshot([])
+        self.rebuild_lock = threading.Lock()
+        self.latencies = deque(maxlen=latency_window)
+        self.queries = 0
+        self.stats_lock = threading.Lock()
+        self.stopping = threading.Event()
+        self.threads = []
+        self.started_at = time.time()
+
+        service = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                start = time.perf_counter()
+                parts = urlsplit(self.path)
+                params = {key: values[-1] for key, values in parse_qs(parts.query).items()}
+                status, payload = service.handle(parts.path, params)
+                body = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+                if parts.path in ("/search", "/market"):
+                    service.record_latency(time.perf_counter() - start)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.socket_path = socket_path
+        if socket_path:
+            if os.path.exists(socket_path):
+                os.unlink(socket_path)
+            self.httpd = UnixHTTPServer(socket_path, Handler)
+            self.address = f"unix:{socket_path}"
+        else:
+            self.httpd = ThreadingHTTPServer((host, port), Handler)
+            self.httpd.daemon_threads = True
+            self.address = f"http://{host}:{self.httpd.server_address[1]}"
+
+    def handle(self, path, params):
+        """Route one query; returns (HTTP status, JSON payload)"""
+        if path == "/search":
+            query = params.get("q", "").strip()
+            if not query:
+                return 400, {"error": "missing q"}
+            try:
+                limit = max(1, int(params.get("limit", 10)))
+            except ValueError:
+                return 400, {"error": "limit must be an integer"}
+            snapshot = self.snapshot
+            results, total = snapshot.search(query, limit)
+            return 200, {"query": query, "total": total, "results": results, "built_at": snapshot.built_at}
+        if path == "/market":
+            try:
+                cluster_id = int(params.get("id", ""))
+            except ValueError:
+                return 400, {"error": "id must be an integer"}
+            market = self.snapshot.by_id.get(cluster_id)
+            if market is None:
+                return 404, {"error": f"no market {cluster_id}"}
+            return 200, market
+        if path == "/stats":
+            return 200, self.stats()
+        if path == "/health":
+            return 200, {"status": "ok", "markets": len(self.snapshot.markets)}
+        return 404, {"error": f"unknown path {path}"}
+
+    def refresh(self, scraper):
+        """Fetch one site and rebuild the in-memory markets from the latest data of every site"""
+        name = scraper_name(scraper)
+        site = self.sites[name]
+        start = time.perf_counter()
+        site["last_attempt"] = time.time()
+        # Any failure, fetching or rebuilding, is logged and the refresh thread keeps its schedule
+        try:
+            data = scraper.fetch_data() or []
+            site["duration"] = time.perf_counter() - start
+            site["refreshes"] += 1
+            if not data:
+                # Keep serving the last good data rather than dropping the site
+                site["errors"] += 1
+                print(f"[{name}] refresh returned no data; keeping {site['items']} items")
+                return
+            self.site_data[name] = data
+            self.rebuild()
+            site["last_success"] = time.time()
+            site["items"] = len(data)
+            print(f"[{name}] refreshed {len(data)} items in {site['duration']:.1f}s; "
+                  f"serving {len(self.snapshot.markets)} markets")
+        except Exception as e:
+            site["errors"] += 1
+            print(f"[{name}] refresh failed: {e}")
+
+    def rebuild(self):
+        with self.rebuild_lock:
+            all_data = [self.site_data[name] for name in self.sites if name in self.site_data]
+            self.matcher.prune(all_data)
+            unified = self.matcher.unify(all_data)
+            # Queries keep using the old snapshot until this assignment swaps it
+            self.snapshot = MarketSnapshot(unified)
+
+    def record_latency(self, seconds):
+        with self.stats_lock:
+            self.latencies.append(seconds)
+            self.queries += 1
+
+    def stats(self):
+        now = time.time()
+        sites = {}
+        for name, site in self.sites.items():
+            age = now - site["last_success"] if site["last_success"] else None
+            sites[name] = {
+                "interval_seconds": site["interval"],
+                "items": site["items"],
+                "refreshes": site["refreshes"],
+                "errors": site["errors"],
+                "last_refresh_seconds": round(site["duration"], 3) if site["duration"] is not None else None,
+                "data_age_seconds": round(age, 1) if age is not None else None,
+                # Refresh lag: how far past its schedule the site's data is
+                "lag_seconds": round(max(0.0, age - site["interval"]), 1) if age is not None else None,
+            }
+        with self.stats_lock:
+            latencies = sorted(self.latencies)
+            queries = self.queries
+        latency = {"queries": queries}
+        if latencies:
+            latency.update({
+                "p50_ms": round(statistics.median(latencies) * 1000, 3),
+                "p95_ms": round(latencies[int(0.95 * (len(latencies) - 1))] * 1000, 3),
+                "p99_ms": round(latencies[int(0.99 * (len(latencies) - 1))] * 1000, 3),
+                "max_ms": round(latencies[-1] * 1000, 3),
+            })
+        return {
+            "uptime_seconds": round(now - self.started_at, 1),
+            "markets": len(self.snapshot.markets),
+            "snapshot_age_seconds": round(now - self.snapshot.built_at, 1),
+            "sites": sites,
+            "query_latency": latency,
+        }
+
+    def report(self):
+        stats = self.stats()
+        lags = ", ".join(f"{name} {site['lag_seconds'] if site['lag_seconds'] is not None else '-'}s"
+                         for name, site in stats["sites"].items())
+        latency = stats["query_latency"]
+        p95 = f", p95 {latency['p95_ms']:.1f} ms" if "p95_ms" in latency else ""
+        print(f"Serving {stats['markets']} markets; refresh lag: {lags}; {latency['queries']} queries{p95}")
+
+    def _schedule(self, scraper, interval):
+        while not self.stopping.is_set():
+            self.refresh(scraper)
+            self.stopping.wait(interval)
+
+    def start(self):
+        for scraper, interval in zip(self.scrapers, self.intervals):
+            thread = threading.Thread(target=self._schedule, args=(scraper, interval), daemon=True)
+            thread.start()
+            self.threads.append(thread)
+        thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        thread.start()
+        self.threads.append(thread)
+        print(f"Market service listening on {self.address}")
+        return self
+
+    def serve_forever(self, report_every=60):
+        """Run until interrupted, printing refresh lag and query latency every `report_every` seconds"""
+        self.start()
+        try:
+            while not self.stopping.wait(report_every):
+                self.report()
+        except KeyboardInterrupt:
+            print("\nStopping market service...")
+        finally:
+            self.stop()
+
+    def stop(self):
+        self.stopping.set()
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self.socket_path and os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
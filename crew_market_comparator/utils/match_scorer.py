@@ -0,0 +1,53 @@
+import heapq
+import re
+
+
+def tokenize(text):
+    return set(re.findall(r'\w+', text.lower()))
+
+
+class BatchScorer:
+    """Scores a whole column of products against one query: 2 per shared word, 0.5 per query and product word where one contains the other, 0.1 per query word"""
+
+    def __init__(self):
+        # Pre-tokenized product word sets per snapshot, reused across queries
+        self.token_cache = {}
+
+    def product_tokens(self, products, cache_key=None):
+        if cache_key is not None and cache_key in self.token_cache:
+            return self.token_cache[cache_key]
+        tokens = [tokenize(product) if isinstance(product, str) else set() for product in products]
+        if cache_key is not None:
+            self.token_cache[cache_key] = tokens
+        return tokens
+
+    def score(self, query, products, cache_key=None, positions=None):
+        """Return one match score per product (or per position given), tokenizing the query only once"""
+        query_words = tokenize(query)
+        product_tokens = self.product_tokens(products, cache_key)
+        if positions is not None:
+            product_tokens = [product_tokens[i] for i in positions]
+        length_bonus = len(query_words) * 0.1
+
+        # Partial matches only depend on the product word, so each distinct word is
+        # compared against the query words once for the whole batch
+        partial_counts = {}
+        scores = []
+        for product_words in product_tokens:
+            exact_matches = 0
+            partial_matches = 0
+            for pw in product_words:
+                if pw in query_words:
+                    exact_matches += 1
+                count = partial_counts.get(pw)
+                if count is None:
+                    count = sum(1 for qw in query_words if qw in pw or pw in qw)
+                    partial_counts[pw] = count
+                partial_matches += count
+            scores.append(exact_matches * 2 + partial_matches * 0.5 + length_bonus)
+        return scores
+
+
+def top_matches(results, k=10):
+    """Best k results by match score, in the same order a full stable sort would give"""
+    return heapq.nlargest(k, results, key=lambda x: x['match_score'])
@@ -0,0 +1,180 @@
+import json
+import re
+import sys
+import time
+from contextlib import contextmanager
+
+
+class PhaseTimer:
+    """Splits one run into named phases; each lap adds the time since the previous lap to its phase"""
+
+    def __init__(self):
+        self.phases = {}
+        self.last = time.perf_counter()
+
+    def lap(self, phase):
+        now = time.perf_counter()
+        self.phases[phase] = self.phases.get(phase, 0.0) + (now - self.last)
+        self.last = now
+
+    def skip(self):
+        """Start the next lap now, leaving the time since the previous lap out of every phase"""
+        self.last = time.perf_counter()
+
+    def merge(self, other):
+        """Add the phases another timer measured, e.g. in worker threads, in place of the time since the last lap"""
+        for phase, seconds in other.phases.items():
+            self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+        self.skip()
+
+    def total(self):
+        return sum(self.phases.values())
+
+    def as_dict(self):
+        return {phase: round(seconds, 4) for phase, seconds in self.phases.items()}
+
+
+def prometheus_name(name):
+    """A metric name the text format accepts: anything but letters, digits, _ and : becomes _"""
+    name = re.sub(r"[^a-zA-Z0-9_:]", "_", name)
+    return f"_{name}" if name[:1].isdigit() else name
+
+
+def prometheus_label(value):
+    """A label value escaped for the text format: backslash, double quote and newline"""
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process so far, in MB (None where unsupported)"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+class RunMetrics:
+    """
+    Instrumentation for one pipeline run: timing spans per stage, counters and gauges,
+    with optional cProfile and tracemalloc capture, exported as JSON or Prometheus text.
+    """
+
+    def __init__(self, profile=False, trace_memory=False):
+        self.spans = {}
+        self.counters = {}
+        self.gauges = {}
+        self.open_spans = {}
+        self.profile = profile
+        self.trace_memory = trace_memory
+        self.profiler = None
+        self.started_at = time.time()
+
+    def begin(self, name):
+        self.open_spans[name] = time.perf_counter()
+
+    def end(self, name):
+        start = self.open_spans.pop(name, None)
+        if start is not None:
+            self.spans[name] = self.spans.get(name, 0.0) + (time.perf_counter() - start)
+
+    @contextmanager
+    def span(self, name):
+        self.begin(name)
+        try:
+            yield self
+        finally:
+            self.end(name)
+
+    def count(self, name, value=1):
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def set(self, name, value):
+        self.gauges[name] = value
+
+    def start(self):
+        """Begin the optional captures; cheap when neither is enabled"""
+        if self.trace_memory:
+            import tracemalloc
+            tracemalloc.start()
+        if self.profile:
+            import cProfile
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
+        self.begin("total")
+
+    def stop(self):
+        """End the captures, keeping the profile for dump_profile and the traced peak as a gauge"""
+        for name in list(self.open_spans):
+            self.end(name)
+        if self.profiler is not None:
+            self.profiler.disable()
+        if self.trace_memory:
+            import tracemalloc
+            if tracemalloc.is_tracing():
+                _, peak = tracemalloc.get_traced_memory()
+                self.set("traced_peak_mb", round(peak / (1024 * 1024), 2))
+                tracemalloc.stop()
+        peak = peak_rss_mb()
+        if peak is not None:
+            self.set("peak_rss_mb", round(peak, 1))
+
+    def dump_profile(self, filename, top=15):
+        """Write the cProfile stats for pstats/snakeviz and print the most expensive functions"""
+        if self.profiler is None:
+            return
+        import pstats
+        self.profiler.dump_stats(filename)
+        print(f"\nProfile written to {filename}; top {top} functions by cumulative time:")
+        pstats.Stats(self.profiler, stream=sys.stdout).sort_stats("cumulative").print_stats(top)
+
+    def as_dict(self):
+        return {
+            "started_at": round(self.started_at, 3),
+            "spans": {name: round(seconds, 4) for name, seconds in self.spans.items()},
+            "counters": dict(self.counters),
+            "gauges": dict(self.gauges),
+        }
+
+    def to_prometheus(self, prefix="market_pipeline"):
+        """Prometheus text exposition format, for a textfile collector or a pushgateway"""
+        prefix = prometheus_name(prefix)
+        lines = [
+            f"# HELP {prefix}_stage_seconds Wall time spent in each pipeline stage",
+            f"# TYPE {prefix}_stage_seconds gauge",
+        ]
+        for name, seconds in self.spans.items():
+            lines.append(f'{prefix}_stage_seconds{{stage="{prometheus_label(name)}"}} {seconds:.6f}')
+        for name, value in self.counters.items():
+            metric = f"{prefix}_{prometheus_name(name)}_total"
+            lines.append(f"# HELP {metric} Pipeline counter {prometheus_name(name)}")
+            lines.append(f"# TYPE {metric} counter")
+            lines.append(f"{metric} {value}")
+        for name, value in self.gauges.items():
+            metric = f"{prefix}_{prometheus_name(name)}"
+            lines.append(f"# HELP {metric} Pipeline gauge {prometheus_name(name)}")
+            lines.append(f"# TYPE {metric} gauge")
+            lines.append(f"{metric} {value}")
+        lines.append(f"# HELP {prefix}_started_at_seconds Unix time the run started")
+        lines.append(f"# TYPE {prefix}_started_at_seconds gauge")
+        lines.append(f"{prefix}_started_at_seconds {self.started_at:.3f}")
+        return "\n".join(lines) + "\n"
+
+    def export(self, filename):
+        """Write JSON for a .json path, Prometheus text otherwise"""
+        with open(filename, "w", encoding="utf-8") as f:
+            if filename.endswith(".json"):
+                json.dump(self.as_dict(), f, indent=2)
+            else:
+                f.write(self.to_prometheus())
+        print(f"Run metrics written to {filename}")
+
+    def report(self):
+        print(f"\n{'='*60}")
+        print("Run metrics:")
+        for name, seconds in self.spans.items():
+            print(f"  {name:<20} {seconds:8.3f}s")
+        for name, value in {**self.counters, **self.gauges}.items():
+            print(f"  {name:<20} {value}")
@@ -0,0 +1,97 @@
+from collections import Counter, OrderedDict
+
+from utils.semantic_matcher import SemanticMatcher, ShingleIndex
+
+
+class OnlineMatcher:
+    """
+    Assigns each record to a cluster the moment it arrives, for streaming runs.
+
+    A record joins the first live cluster whose representative it matches above the
+    threshold, as against the representatives in SemanticMatcher, or else opens a new
+    cluster. Only the `max_clusters` most recently matched representatives are kept;
+    colder ones are evicted, so memory stays bounded however long the stream runs.
+    Representatives are looked up through a ShingleIndex to keep per-record latency flat,
+    so like the eviction this is approximate: a rare match sharing few shingles is missed.
+    """
+
+    def __init__(self, threshold=0.7, max_clusters=20000, shingle_size=3, min_overlap=0.25, cache=None):
+        self.threshold = threshold
+        self.max_clusters = max_clusters
+        self.shingle_size = shingle_size
+        self.min_overlap = min_overlap
+        # Ratios and bounds come from the batch matcher, so both agree on what matches
+        self.scorer = SemanticMatcher(threshold=threshold, cache=cache)
+
+        self.representatives = OrderedDict()
+        self.char_counts = {}
+        self.positions = []
+        self.index = self._new_index()
+        self.next_id = 1
+
+        self.assigned = 0
+        self.evicted = 0
+
+    def assign(self, item):
+        """Return (cluster id, representative title, similarity) for one record"""
+        title = item["product"]
+        counts = Counter(title)
+        for position in self.index.query(title):
+            cluster_id = self.positions[position]
+            base = self.representatives.get(cluster_id)
+            if base is None:
+                continue  # evicted since it was indexed
+            if self.scorer.upper_bound(base, title, self.char_counts[cluster_id], counts) <= self.threshold:
+                continue
+            ratio = self.scorer.ratio(base, title)
+            if ratio > self.threshold:
+                self.representatives.move_to_end(cluster_id)
+                self.assigned += 1
+                return cluster_id, base, ratio
+
+        cluster_id = self.next_id
+        self.next_id += 1
+        self.representatives[cluster_id] = title
+        self.char_counts[cluster_id] = counts
+        self.positions.append(cluster_id)
+        self.index.add(title)
+        self.assigned += 1
+
+        if len(self.representatives) > self.max_clusters:
+            evicted_id, _ = self.representatives.popitem(last=False)
+            del self.char_counts[evicted_id]
+            self.evicted += 1
+            # Evicted titles linger in the index until it is rebuilt from the live ones
+            if len(self.positions) > 2 * self.max_clusters:
+                self._rebuild()
+
+        return cluster_id, title, self.scorer.ratio(title, title)
+
+    def stream(self, records):
+        """Yield each record with its cluster assignment as soon as it is matched"""
+        for item in records:
+            cluster_id, representative, ratio = self.assign(item)
+            yield {
+                "cluster_id": cluster_id,
+                "product": representative,
+                "similarity": round(ratio, 2),
+                "entry": item,
+            }
+
+    def stats(self):
+        return {
+            "records": self.assigned,
+            "clusters": self.next_id - 1,
+            "live_clusters": len(self.representatives),
+            "evicted": self.evicted,
+            "pairs_scored": self.scorer.pairs_scored,
+        }
+
+    def _rebuild(self):
+        self.positions = list(self.representatives)
+        self.index = self._new_index()
+        for cluster_id in self.positions:
+            self.index.add(self.representatives[cluster_id])
+
+    def _new_index(self):
+        return ShingleIndex(shingle_size=self.shingle_size, min_overlap=self.min_overlap, threshold=self.threshold)
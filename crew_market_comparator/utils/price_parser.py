@@ -0,0 +1,123 @@
+import bisect
+import math
+import re
+
+# Every quantity the scrapers show, as one alternation, so a batch is scanned once
+PRICE_PATTERN = re.compile(
+    r"(?P<percent>\d+(?:\.\d+)?)\s?%"
+    r"|(?P<cents>\d+(?:\.\d+)?)\s?¢"
+    r"|\$(?P<volume>\d[\d,]*(?:\.\d+)?)\s?(?P<volume_unit>[kmb])?\s+vol\b\.?"
+    r"|\bvol:\s*(?P<display_volume>\d[\d,]*(?:\.\d+)?)(?P<display_unit>[kmb])?"
+    r"|(?P<bps>\d+)\s+bps\s+(?P<direction>increase|decrease)",
+    re.IGNORECASE,
+)
+
+UNITS = {None: 1.0, "k": 1e3, "m": 1e6, "b": 1e9}
+
+# Texts are joined with a character none of the patterns can span
+SEPARATOR = "\x00"
+
+FIELDS = ("probability", "volume", "change_bps")
+
+
+def empty_fields():
+    return {"probability": None, "volume": None, "change_bps": None}
+
+
+def _amount(number, unit):
+    return float(number.replace(",", "")) * UNITS[unit.lower() if unit else None]
+
+
+def price_text(text):
+    """
+    The part of a market's text that shows its prices, leaving out the question: the title
+    line of a multi-line card, and anything up to a question mark. "Will CPI exceed 3%?"
+    must not read as a 3% market.
+    """
+    lines = text.split("\n")
+    if len(lines) > 1:
+        lines = lines[1:]
+    return "\n".join(line[line.rfind("?") + 1:] for line in lines)
+
+
+def parse_prices(texts):
+    """
+    Typed price fields for a batch of market texts, from a single scan over all of them.
+
+    Each text gets the implied probability (0-1, from "28%" or "27¢"), the volume in dollars
+    (from "$48m Vol." or "Vol: 48m") and the change in basis points (signed), taking the first
+    occurrence of each in its price_text like the display-string extractors do; fields not
+    present are None.
+    """
+    texts = [price_text(text) if isinstance(text, str) else "" for text in texts]
+    results = [empty_fields() for _ in texts]
+    if not texts:
+        return results
+
+    # Offsets where each text starts in the joined string, to map matches back to texts
+    starts = []
+    offset = 0
+    for text in texts:
+        starts.append(offset)
+        offset += len(text) + len(SEPARATOR)
+    joined = SEPARATOR.join(texts)
+
+    percents = [None] * len(texts)
+    cents = [None] * len(texts)
+    for match in PRICE_PATTERN.finditer(joined):
+        i = bisect.bisect_right(starts, match.start()) - 1
+        fields = results[i]
+        group = match.lastgroup
+        if group == "percent":
+            if percents[i] is None:
+                percents[i] = float(match.group("percent")) / 100
+        elif group == "cents":
+            if cents[i] is None:
+                cents[i] = float(match.group("cents")) / 100
+        elif group in ("volume", "volume_unit"):
+            if fields["volume"] is None:
+                fields["volume"] = _amount(match.group("volume"), match.group("volume_unit"))
+        elif group in ("display_volume", "display_unit"):
+            if fields["volume"] is None:
+                fields["volume"] = _amount(match.group("display_volume"), match.group("display_unit"))
+        elif group == "direction":
+            if fields["change_bps"] is None:
+                sign = -1 if match.group("direction").lower() == "decrease" else 1
+                fields["change_bps"] = sign * int(match.group("bps"))
+
+    # A percentage wins over a cent price when a text shows both, as in extract_price
+    for fields, percent, cent in zip(results, percents, cents):
+        fields["probability"] = percent if percent is not None else cent
+    return results
+
+
+def parse_price(text):
+    """Typed price fields for one market text"""
+    return parse_prices([text])[0]
+
+
+def attach_prices(records, texts):
+    """Add the typed fields parsed from `texts` to the matching scraped records"""
+    for record, fields in zip(records, parse_prices(texts)):
+        record.update(fields)
+    return records
+
+
+def entry_fields(entries):
+    """Typed fields for unified entries, parsing the display price of any entry scraped without them"""
+    missing = [entry for entry in entries if "probability" not in entry]
+    parsed = iter(parse_prices([entry.get("price") for entry in missing]))
+    return [
+        {field: entry.get(field) for field in FIELDS} if "probability" in entry else next(parsed)
+        for entry in entries
+    ]
+
+
+def mean(values):
+    values = [v for v in values if v is not None and not (isinstance(v, float) and math.isnan(v))]
+    return sum(values) / len(values) if values else None
+
+
+def total(values):
+    values = [v for v in values if v is not None and not (isinstance(v, float) and math.isnan(v))]
+    return sum(values) if values else None
@@ -0,0 +1,130 @@
+import queue
+import threading
+import time
+
+
+def scraper_name(scraper):
+    site = getattr(scraper, "site_name", None)
+    return f"{scraper.__class__.__name__}({site})" if site else scraper.__class__.__name__
+
+
+def _fetch(i, scraper, started, results):
+    started[i] = time.perf_counter()
+    try:
+        results.put((i, scraper.fetch_data() or [], None))
+    except Exception as e:
+        results.put((i, [], e))
+
+
+def _abandon(scraper):
+    """Best effort: have a dropped scraper give up its browser sessions so its thread unblocks instead of idling"""
+    close = getattr(scraper, "close", None)
+    if close is not None:
+        try:
+            close()
+        except Exception as e:
+            print(f"Error closing {scraper_name(scraper)}: {e}")
+
+
+def run_scrapers(scrapers, timeout=None, deadline=None):
+    """
+    Run scrapers concurrently and collect results as they finish.
+
+    Each scraper gets `timeout` seconds from when it starts, and the whole run ends
+    `deadline` seconds after it began; whatever has arrived by then is returned.
+    Returns one data list per scraper, in scraper order (empty for failures and timeouts),
+    and the outcome of each scraper.
+    """
+    all_data = [[] for _ in scrapers]
+    outcomes = ["pending"] * len(scrapers)
+    started = {}
+    results = queue.Queue()
+    start = time.perf_counter()
+    stop_at = start + deadline if deadline else None
+
+    # Scrapers spend their time waiting on browsers and the network, so threads are enough.
+    # Daemon threads, so a scraper that ignores its timeout never holds up the exit.
+    for i, scraper in enumerate(scrapers):
+        threading.Thread(target=_fetch, args=(i, scraper, started, results), daemon=True).start()
+
+    pending = set(range(len(scrapers)))
+    while pending:
+        now = time.perf_counter()
+        limits = [stop_at] if stop_at else []
+        if timeout:
+            limits += [started.get(i, now) + timeout for i in pending]
+        try:
+            i, site_data, error = results.get(timeout=max(0.0, min(limits) - now) if limits else None)
+        except queue.Empty:
+            pass
+        else:
+            if i in pending:
+                pending.discard(i)
+                elapsed = time.perf_counter() - started[i]
+                if error is not None:
+                    outcomes[i] = "error"
+                    print(f"Error fetching from {scraper_name(scrapers[i])}: {error}")
+                else:
+                    all_data[i] = site_data
+                    outcomes[i] = "ok" if site_data else "empty"
+                    print(f"{scraper_name(scrapers[i])} finished in {elapsed:.1f}s with {len(site_data)} items")
+
+        now = time.perf_counter()
+        for i in sorted(pending):
+            if stop_at and now >= stop_at:
+                outcomes[i] = "deadline"
+                print(f"Pipeline deadline reached, dropping {scraper_name(scrapers[i])}")
+            elif timeout and i in started and now - started[i] >= timeout:
+                outcomes[i] = "timeout"
+                print(f"{scraper_name(scrapers[i])} timed out after {timeout:.1f}s")
+            else:
+                continue
+            pending.discard(i)
+            _abandon(scrapers[i])
+
+    print(f"Concurrent scraping finished in {time.perf_counter() - start:.1f}s")
+    return all_data, outcomes
+
+
+_DONE = object()
+
+
+def _stream(i, scraper, records):
+    try:
+        iterate = getattr(scraper, "iter_data", None)
+        for record in (iterate() if iterate else scraper.fetch_data() or []):
+            records.put((i, record))
+    except Exception as e:
+        print(f"Error fetching from {scraper_name(scraper)}: {e}")
+    finally:
+        records.put((i, _DONE))
+
+
+def stream_scrapers(scrapers, deadline=None, buffer_size=1000):
+    """
+    Run scrapers concurrently and yield their records one at a time as they arrive.
+
+    Scrapers with an iter_data generator stream record by record; the buffer is bounded,
+    so a slow consumer holds the scrapers back instead of letting records pile up.
+    After `deadline` seconds, records still to come are dropped.
+    """
+    records = queue.Queue(maxsize=buffer_size)
+    start = time.perf_counter()
+    stop_at = start + deadline if deadline else None
+
+    for i, scraper in enumerate(scrapers):
+        threading.Thread(target=_stream, args=(i, scraper, records), daemon=True).start()
+
+    running = set(range(len(scrapers)))
+    while running:
+        wait_for = max(0.0, stop_at - time.perf_counter()) if stop_at else None
+        try:
+            i, record = records.get(timeout=wait_for)
+        except queue.Empty:
+            for i in sorted(running):
+                print(f"Pipeline deadline reached, dropping the rest of {scraper_name(scrapers[i])}")
+            break
+        if record is _DONE:
+            running.discard(i)
+            continue
+        yield record
@@ -0,0 +1,436 @@
+import csv
+import glob
+import heapq
+import math
+import os
+import re
+import sqlite3
+from contextlib import contextmanager
+
+from utils.history_store import product_key
+from utils.snapshot_reader import snapshot_time
+
+DEFAULT_INDEX_PATH = "search_index.db"
+
+# Bumped whenever the layout changes; older indexes are dropped and rebuilt from the snapshots
+SCHEMA_VERSION = 2
+
+TABLES = ["files", "products", "markets", "tokens", "postings", "trigrams"]
+
+# Postings point at products (a title, case and spacing ignored) rather than snapshot rows,
+# so a market listed in every snapshot is matched and scored once
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    path TEXT UNIQUE NOT NULL,
+    mtime REAL NOT NULL,
+    size INTEGER NOT NULL,
+    taken_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS products (
+    id INTEGER PRIMARY KEY,
+    product_key TEXT UNIQUE NOT NULL,
+    seen INTEGER NOT NULL DEFAULT 0,
+    latest REAL
+);
+CREATE TABLE IF NOT EXISTS markets (
+    id INTEGER PRIMARY KEY,
+    file_id INTEGER NOT NULL,
+    product_id INTEGER NOT NULL,
+    taken_at REAL NOT NULL,
+    row INTEGER NOT NULL,
+    product TEXT NOT NULL,
+    confidence TEXT,
+    total_entries TEXT,
+    kalshi_price TEXT,
+    polymarket_price TEXT
+);
+CREATE INDEX IF NOT EXISTS markets_file ON markets (file_id);
+CREATE INDEX IF NOT EXISTS markets_product ON markets (product_id, taken_at);
+CREATE TABLE IF NOT EXISTS tokens (
+    id INTEGER PRIMARY KEY,
+    token TEXT UNIQUE NOT NULL
+);
+CREATE TABLE IF NOT EXISTS postings (
+    token_id INTEGER NOT NULL,
+    product_id INTEGER NOT NULL,
+    PRIMARY KEY (token_id, product_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS postings_product ON postings (product_id);
+CREATE TABLE IF NOT EXISTS trigrams (
+    trigram TEXT NOT NULL,
+    token_id INTEGER NOT NULL,
+    PRIMARY KEY (trigram, token_id)
+) WITHOUT ROWID;
+"""
+
+MARKET_COLUMNS = "f.path, m.product, m.confidence, m.total_entries, m.kalshi_price, m.polymarket_price"
+
+# Newest snapshot first; rows of one product in the same snapshot keep their CSV order
+NEWEST_FIRST = "ORDER BY m.taken_at DESC, f.path DESC, m.row"
+
+
+def tokenize(text):
+    """Lowercase word tokens, the same split BatchScorer uses"""
+    return re.findall(r'\w+', (text or "").lower())
+
+
+def trigrams(word):
+    """Character trigrams of a word padded like pg_trgm, so short words and word starts weigh in"""
+    padded = f"  {word} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class SearchIndex:
+    """On-disk token index over unified_products_*.csv snapshots, so searches never reopen the CSVs"""
+
+    def __init__(self, path=DEFAULT_INDEX_PATH):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        if self.conn.execute("PRAGMA user_version").fetchone()[0] < SCHEMA_VERSION:
+            # The index only caches the snapshots, so an old layout is simply rebuilt by update()
+            with self.conn:
+                for table in TABLES:
+                    self.conn.execute(f"DROP TABLE IF EXISTS {table}")
+            self.conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        self.conn.executescript(SCHEMA)
+        self.token_ids = {}
+        self.product_ids = {}
+
+    def close(self):
+        self.conn.close()
+
+    def is_empty(self):
+        return self.conn.execute("SELECT 1 FROM files LIMIT 1").fetchone() is None
+
+    def index_file(self, csv_path):
+        """Add one snapshot to the index, replacing it if the file changed since it was indexed"""
+        stat = os.stat(csv_path)
+        row = self.conn.execute("SELECT id, mtime, size FROM files WHERE path = ?", (csv_path,)).fetchone()
+        if row and row[1] == stat.st_mtime and row[2] == stat.st_size:
+            return 0
+        with self._transaction():
+            if row:
+                self._drop_file(row[0])
+            return self._index_file(csv_path, stat)
+
+    @contextmanager
+    def _transaction(self):
+        try:
+            with self.conn:
+                yield
+        except Exception:
+            # Token ids handed out inside a rolled-back transaction are no longer valid
+            self.token_ids.clear()
+            self.product_ids.clear()
+            raise
+
+    def _index_file(self, csv_path, stat):
+        """Insert one snapshot's rows; the caller holds the transaction and dropped any older copy"""
+        taken_at = snapshot_time(csv_path)
+        cursor = self.conn.execute(
+            "INSERT INTO files (path, mtime, size, taken_at) VALUES (?, ?, ?, ?)",
+            (csv_path, stat.st_mtime, stat.st_size, taken_at)
+        )
+        file_id = cursor.lastrowid
+
+        rows = []
+        seen = {}
+        with open(csv_path, newline="", encoding="utf-8") as f:
+            for position, record in enumerate(csv.DictReader(f)):
+                product = record.get("Product")
+                if not product:
+                    continue
+                product_id = self._product_id(product)
+                seen[product_id] = seen.get(product_id, 0) + 1
+                rows.append((file_id, product_id, taken_at, position, product,
+                             record.get("Confidence"), record.get("Total_Entries"),
+                             record.get("Kalshi_Price") or None, record.get("Polymarket_Price") or None))
+        self.conn.executemany(
+            "INSERT INTO markets (file_id, product_id, taken_at, row, product, confidence, total_entries, "
+            "kalshi_price, polymarket_price) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            rows
+        )
+        self.conn.executemany(
+            "UPDATE products SET seen = seen + ?, latest = MAX(COALESCE(latest, ?), ?) WHERE id = ?",
+            [(count, taken_at, taken_at, product_id) for product_id, count in seen.items()]
+        )
+        return len(rows)
+
+    def update(self, pattern="unified_products_*.csv", verify=True):
+        """
+        Index new or changed snapshots and forget ones that were deleted, all in one transaction.
+        The indexed files are read in one query and diffed against the glob. With `verify`, every
+        indexed file is also stat'ed to catch one rewritten in place; searches skip that, since
+        snapshots are written once under a new timestamped name.
+        """
+        indexed = {row[0]: row for row in self.conn.execute("SELECT path, id, mtime, size FROM files")}
+        paths = set(glob.glob(pattern))
+        deleted = [row[1] for path, row in indexed.items() if path not in paths]
+        changed = []
+        for path in paths:
+            known = indexed.get(path)
+            if known is not None and not verify:
+                continue
+            stat = os.stat(path)
+            if known is None or known[2] != stat.st_mtime or known[3] != stat.st_size:
+                changed.append((path, stat, known))
+        changed.sort(key=lambda change: change[0])
+        if not deleted and not changed:
+            return 0
+
+        total = 0
+        with self._transaction():
+            for file_id in deleted:
+                self._drop_file(file_id)
+            for path, stat, known in changed:
+                if known is not None:
+                    self._drop_file(known[1])
+                total += self._index_file(path, stat)
+        return total
+
+    def search(self, query, k=10, history=False):
+        """
+        Best k markets whose product contains the query, scored like BatchScorer and collapsed to
+        the newest row of each product, without opening CSVs. Also returns how many markets and
+        snapshot rows matched in all. Matching, scoring and the limit all run in SQL, so a query
+        hitting every market still only reads k rows.
+        """
+        words = set(tokenize(query))
+        self._query_weights(words)
+
+        if words:
+            # Any word run in the query is a substring of a word run in a matching product,
+            # so each word narrows the candidates to postings of tokens containing it
+            candidates = " INTERSECT ".join(
+                "SELECT p.product_id FROM postings p "
+                "WHERE p.token_id IN (SELECT id FROM tokens WHERE instr(token, ?) > 0)"
+                for _ in words
+            )
+            where = f"p.id IN ({candidates})"
+        else:
+            where = "1"
+
+        # The postings only prove each word is present; the key confirms the whole query is
+        rows = self.conn.execute(
+            "SELECT p.product_key, "
+            "(SELECT COALESCE(SUM(w.weight), 0) FROM postings s JOIN query_weights w ON w.token_id = s.token_id "
+            " WHERE s.product_id = p.id) AS score, "
+            "COUNT(*) OVER () AS total, SUM(p.seen) OVER () AS matched_rows "
+            f"FROM products p WHERE {where} AND instr(p.product_key, ?) > 0 "
+            "ORDER BY score DESC, p.latest DESC, p.id LIMIT ?",
+            list(words) + [product_key(query), k]
+        ).fetchall()
+        if not rows:
+            return [], 0, 0
+
+        found = self.lookup([key for key, _, _, _ in rows], history)
+        results = []
+        for key, score, _, _ in rows:
+            result = found[key]
+            result['match_score'] = score + len(words) * 0.1
+            results.append(result)
+        return results, rows[0][2], rows[0][3]
+
+    def lookup(self, keys, history=False):
+        """Product key -> newest indexed row of that product, with its snapshot count and optionally its history"""
+        found = {}
+        for key in keys:
+            product = self.conn.execute(
+                "SELECT id, seen FROM products WHERE product_key = ?", (product_key(key),)
+            ).fetchone()
+            if product is None:
+                continue
+            product_id, seen = product
+            rows = self.conn.execute(
+                f"SELECT {MARKET_COLUMNS} FROM markets m JOIN files f ON f.id = m.file_id "
+                f"WHERE m.product_id = ? {NEWEST_FIRST}" + ("" if history else " LIMIT 1"),
+                (product_id,)
+            ).fetchall()
+            result = self._result(rows[0])
+            result['snapshots'] = seen
+            result['history'] = [self._seen(row) for row in rows] if history else [self._seen(rows[0])]
+            found[key] = result
+        return found
+
+    def _query_weights(self, words):
+        """
+        What each product token adds to BatchScorer's score for these query words: 2 if it is a
+        query word, plus 0.5 per query word it contains or is contained in. Only tokens that
+        contain a query word or are a substring of one can score, so only those are looked up.
+        """
+        self.conn.execute("CREATE TEMP TABLE IF NOT EXISTS query_weights (token_id INTEGER PRIMARY KEY, weight REAL)")
+        self.conn.execute("DELETE FROM query_weights")
+        tokens = {}
+        for word in words:
+            tokens.update(self.conn.execute("SELECT id, token FROM tokens WHERE instr(token, ?) > 0", (word,)))
+            parts = list({word[i:j] for i in range(len(word)) for j in range(i + 1, len(word) + 1)})
+            for start in range(0, len(parts), 500):
+                batch = parts[start:start + 500]
+                tokens.update(self.conn.execute(
+                    f"SELECT id, token FROM tokens WHERE token IN ({', '.join('?' * len(batch))})", batch
+                ))
+        self.conn.executemany(
+            "INSERT INTO query_weights (token_id, weight) VALUES (?, ?)",
+            [(token_id, 2 * (token in words) + 0.5 * sum(1 for word in words if word in token or token in word))
+             for token_id, token in tokens.items()]
+        )
+
+    @staticmethod
+    def _result(row):
+        path, product, confidence, total_entries, kalshi_price, polymarket_price = row
+        return {
+            'file': path,
+            'product': product,
+            'confidence': confidence,
+            'total_entries': total_entries or 'N/A',
+            'kalshi_price': kalshi_price or 'N/A',
+            'polymarket_price': polymarket_price or 'N/A',
+        }
+
+    @classmethod
+    def _seen(cls, row):
+        seen = cls._result(row)
+        del seen['product']
+        return seen
+
+    def fuzzy_search(self, query, cutoff=0.3, k=10):
+        """
+        Typo-tolerant search: every query word must match some word of the product with trigram
+        similarity of at least `cutoff`. Returns the newest row of the best k markets by mean word
+        similarity, and how many markets matched in all.
+        """
+        words = list(dict.fromkeys(tokenize(query)))
+        if not words:
+            return [], 0
+
+        # Close vocabulary words per query word; the vocabulary is far smaller than the rows
+        matches = []
+        for word in words:
+            similar = self._similar_tokens(word, cutoff)
+            if not similar:
+                # No market can contain every word
+                return [], 0
+            matches.append((self._postings_count(similar), similar))
+
+        # Rarest word first: its postings are the candidates, and every further word is either
+        # scanned or looked up for the remaining candidates, whichever touches fewer postings
+        matches.sort(key=lambda match: match[0])
+        scores = self._word_scores(matches[0][1])
+        for count, similar in matches[1:]:
+            if not scores:
+                break
+            if count <= len(scores) * len(similar):
+                word_scores = self._word_scores(similar)
+            else:
+                word_scores = self._word_scores(similar, candidates=scores)
+            scores = {product_id: score + word_scores[product_id]
+                      for product_id, score in scores.items() if product_id in word_scores}
+
+        # A bounded heap instead of sorting every match
+        total = len(scores)
+        top = heapq.nlargest(k, scores.items(), key=lambda item: (item[1], item[0]))
+        if not top:
+            return [], 0
+
+        keys = dict(self.conn.execute(
+            f"SELECT id, product_key FROM products WHERE id IN ({', '.join('?' * len(top))})",
+            [product_id for product_id, _ in top]
+        ).fetchall())
+        found = self.lookup(keys.values())
+        results = []
+        for product_id, score in top:
+            result = found[keys[product_id]]
+            result['similarity'] = round(score / len(words), 3)
+            results.append(result)
+        return results, total
+
+    def _postings_count(self, similar):
+        return sum(
+            self.conn.execute("SELECT COUNT(*) FROM postings WHERE token_id = ?", (token_id,)).fetchone()[0]
+            for token_id in similar
+        )
+
+    def _word_scores(self, similar, candidates=None):
+        """Best similarity of one query word per product, from its close tokens' postings"""
+        query = "SELECT product_id FROM postings WHERE token_id = ?"
+        if candidates is not None:
+            self.conn.execute("CREATE TEMP TABLE IF NOT EXISTS fuzzy_candidates (product_id INTEGER PRIMARY KEY)")
+            self.conn.execute("DELETE FROM fuzzy_candidates")
+            self.conn.executemany("INSERT INTO fuzzy_candidates (product_id) VALUES (?)",
+                                  [(product_id,) for product_id in candidates])
+            query += " AND product_id IN (SELECT product_id FROM fuzzy_candidates)"
+
+        scores = {}
+        # Lowest similarity first, so a product with several close tokens keeps the best one
+        for token_id, similarity in sorted(similar.items(), key=lambda item: item[1]):
+            scores.update(dict.fromkeys((row[0] for row in self.conn.execute(query, (token_id,))), similarity))
+        return scores
+
+    def _similar_tokens(self, word, cutoff):
+        """Token id -> similarity for the vocabulary words whose trigram Jaccard similarity to `word` clears the cutoff"""
+        grams = trigrams(word)
+        # shared / (|a| + |b| - shared) >= cutoff needs at least this many shared trigrams
+        min_shared = max(1, math.ceil(cutoff * len(grams) / (1 + cutoff)))
+        rows = self.conn.execute(
+            "SELECT t.id, t.token, COUNT(*) FROM trigrams g JOIN tokens t ON t.id = g.token_id "
+            f"WHERE g.trigram IN ({', '.join('?' * len(grams))}) "
+            "GROUP BY g.token_id HAVING COUNT(*) >= ?",
+            list(grams) + [min_shared]
+        )
+        matches = {}
+        for token_id, token, shared in rows:
+            similarity = shared / (len(grams) + len(trigrams(token)) - shared)
+            if similarity >= cutoff:
+                matches[token_id] = similarity
+        return matches
+
+    def _token_id(self, token):
+        token_id = self.token_ids.get(token)
+        if token_id is None:
+            cursor = self.conn.execute("INSERT OR IGNORE INTO tokens (token) VALUES (?)", (token,))
+            token_id = self.conn.execute("SELECT id FROM tokens WHERE token = ?", (token,)).fetchone()[0]
+            if cursor.rowcount:
+                self._add_trigrams(token_id, token)
+            self.token_ids[token] = token_id
+        return token_id
+
+    def _add_trigrams(self, token_id, token):
+        self.conn.executemany(
+            "INSERT OR IGNORE INTO trigrams (trigram, token_id) VALUES (?, ?)",
+            [(gram, token_id) for gram in trigrams(token)]
+        )
+
+    def _product_id(self, product):
+        """Id of a product's key, created with its token postings the first time any snapshot lists it"""
+        key = product_key(product)
+        product_id = self.product_ids.get(key)
+        if product_id is None:
+            row = self.conn.execute("SELECT id FROM products WHERE product_key = ?", (key,)).fetchone()
+            if row:
+                product_id = row[0]
+            else:
+                product_id = self.conn.execute("INSERT INTO products (product_key) VALUES (?)", (key,)).lastrowid
+                self.conn.executemany(
+                    "INSERT OR IGNORE INTO postings (token_id, product_id) VALUES (?, ?)",
+                    [(self._token_id(token), product_id) for token in set(tokenize(key))]
+                )
+            self.product_ids[key] = product_id
+        return product_id
+
+    def _drop_file(self, file_id):
+        affected = [row[0] for row in self.conn.execute(
+            "SELECT DISTINCT product_id FROM markets WHERE file_id = ?", (file_id,)
+        )]
+        self.conn.execute("DELETE FROM markets WHERE file_id = ?", (file_id,))
+        self.conn.execute("DELETE FROM files WHERE id = ?", (file_id,))
+        self.conn.executemany(
+            "UPDATE products SET seen = (SELECT COUNT(*) FROM markets WHERE product_id = products.id), "
+            "latest = (SELECT MAX(taken_at) FROM markets WHERE product_id = products.id) WHERE id = ?",
+            [(product_id,) for product_id in affected]
+        )
+        # Products no snapshot lists any more are forgotten, postings and all
+        self.conn.execute("DELETE FROM postings WHERE product_id IN (SELECT id FROM products WHERE seen = 0)")
+        self.conn.execute("DELETE FROM products WHERE seen = 0")
+        self.product_ids.clear()
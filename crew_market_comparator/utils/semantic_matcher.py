@@ -1,25 +1,408 @@
 import difflib
+import json
+import math
+import os
+from bisect import bisect_right
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+
+
+class ShingleIndex:
+    """
+    Inverted index from character shingles to title positions, used to block candidate pairs.
+
+    Blocking is approximate: a title must share `min_overlap` of its shingles with a candidate,
+    but SequenceMatcher also counts matching blocks shorter than a shingle, so two titles can
+    clear the threshold while sharing almost no shingles (edits every two or three characters).
+    Such pairs are never compared, and the groups can differ from an exhaustive scan.
+
+    A lookup probes only the rarest shingles prefix filtering needs, and skips stop shingles
+    listed for more than `max_postings` titles, so it walks a bounded number of postings and
+    candidate generation grows about linearly with the titles. Titles too short to block are
+    compared with every title of a length that could clear the threshold.
+    """
+
+    def __init__(self, titles=(), shingle_size=3, min_overlap=0.25, min_shared=3, threshold=0.7, min_length=20,
+                 max_postings=200):
+        self.shingle_size = shingle_size
+        self.min_overlap = min_overlap
+        self.min_shared = min_shared
+        self.min_length = min_length
+        self.max_postings = max_postings
+        # 2 * min(a, b) / (a + b) bounds the ratio, so lengths further apart than this never match
+        self.length_ratio = threshold / (2 - threshold)
+        # Titles this long or longer can never clear the threshold against a short one
+        self.short_reach = min_length / self.length_ratio
+        self.lengths = []
+        self.shingles = []
+        self.postings = defaultdict(list)
+        # Positions by title length, for the titles a short title could match
+        self.by_length = defaultdict(list)
+
+        for title in titles:
+            self.add(title)
+
+    def add(self, title):
+        """Index a title at the next position; positions only grow, so posting lists stay sorted"""
+        position = len(self.shingles)
+        shingles = self.shingle(title)
+        self.lengths.append(len(title or ""))
+        self.shingles.append(shingles)
+        if self.lengths[position] < self.short_reach:
+            self.by_length[self.lengths[position]].append(position)
+        for s in shingles:
+            self.postings[s].append(position)
+        return position
+
+    def shingle(self, title):
+        """Return the set of lowercase character shingles of a title"""
+        text = (title or "").lower()
+        size = self.shingle_size
+        if len(text) <= size:
+            return {text}
+        return {text[i:i + size] for i in range(len(text) - size + 1)}
+
+    def probe_keys(self, shingles):
+        """Return the shingles of a title to probe and how many of them a candidate must share"""
+        # A candidate shares at least `overlap` of the title's shingles, so it shares `required`
+        # of the rarest len - overlap + required of them (prefix filtering); the rest are never probed
+        overlap = math.ceil(len(shingles) * self.min_overlap)
+        required = max(1, min(self.min_shared, overlap))
+        prefix = sorted(shingles, key=lambda s: (len(self.postings.get(s, ())), s))[:len(shingles) - overlap + required]
+        # Stop shingles, in more than max_postings titles, are skipped like stop words: they tell
+        # titles apart the least, so a candidate must still share `required` of the rarer ones
+        keys = [s for s in prefix if len(self.postings.get(s, ())) <= self.max_postings] or prefix[:1]
+        return keys, min(required, len(keys))
+
+    def candidates(self, position):
+        """Return the positions after `position` that share enough probed shingles, in order"""
+        return self._lookup(self.shingles[position], self.lengths[position], position)
+
+    def query(self, title):
+        """Return every indexed position that could match an outside title, in order"""
+        return self._lookup(self.shingle(title), len(title or ""), -1)
+
+    def _lookup(self, shingles, length, after):
+        # Short titles share too few shingles to block safely, so they are compared with every
+        # title of a length that could clear the threshold, and long titles with those short ones
+        low = math.floor(length * self.length_ratio)
+        if length < self.min_length:
+            return sorted(self._lengths(low, math.ceil(length / self.length_ratio), after))
+
+        keys, required = self.probe_keys(shingles)
+        counts = Counter()
+        for s in keys:
+            posting = self.postings.get(s, [])
+            counts.update(posting[bisect_right(posting, after):])
+        # Then the full overlap is checked once per candidate with a set intersection
+        overlap = math.ceil(len(shingles) * self.min_overlap)
+        found = {other for other, count in counts.items()
+                 if count >= required and len(self.shingles[other] & shingles) >= overlap}
+        found.update(self._lengths(low, self.min_length - 1, after))
+        return sorted(found)
+
+    def _lengths(self, low, high, after):
+        """Indexed positions after `after` whose titles are between low and high characters long"""
+        found = []
+        for length in range(low, high + 1):
+            positions = self.by_length.get(length, [])
+            found.extend(positions[bisect_right(positions, after):])
+        return found
+
 
 class SemanticMatcher:
+    # blocking=False compares every remaining pair, pruned only by the provable length and
+    # character-count bound; blocking=True is faster but approximate (see ShingleIndex)
+    def __init__(self, threshold=0.7, blocking=False, shingle_size=3, min_overlap=0.25, cache=None,
+                 workers=1, chunk_size=64, min_parallel_items=2000):
+        self.threshold = threshold
+        self.blocking = blocking
+        self.shingle_size = shingle_size
+        self.min_overlap = min_overlap
+        # The cache lives in this process only, so worker processes score without it
+        self.cache = cache
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.min_parallel_items = min_parallel_items
+        # Similarity evaluations requested, cache hits included, for run metrics
+        self.pairs_scored = 0
+
+        # Cluster state, kept across runs with load_state/save_state
+        self.clusters = []
+        self.member_index = {}
+        self.next_id = 1
+        self.representatives = self._new_index()
+
     def unify(self, all_data):
         flat = [item for sublist in all_data for item in sublist]
-        unified = []
+        groups = defaultdict(list)
 
-        while flat:
-            base = flat.pop(0)
-            group = [base]
+        # Items seen in an earlier run go straight back to their cluster
+        fresh = []
+        for item in flat:
+            key = self.item_key(item)
+            if key in self.member_index:
+                position = self.member_index[key]
+                groups[position].append((item, self.clusters[position]["members"][key]))
+            else:
+                fresh.append(item)
 
-            flat_copy = flat[:]
-            for other in flat_copy:
-                ratio = difflib.SequenceMatcher(None, base["product"], other["product"]).ratio()
-                if ratio > 0.7:
-                    group.append(other)
-                    flat.remove(other)
+        # New items are matched against the cluster representatives first
+        leftovers = []
+        for item in fresh:
+            match = self._match_representative(item["product"])
+            if match is None:
+                leftovers.append(item)
+                continue
+            position, ratio = match
+            self._add_member(position, item, ratio)
+            groups[position].append((item, ratio))
 
+        # Whatever is left is clustered among itself and opens new clusters
+        for members in self._cluster(leftovers):
+            position = self._new_cluster(members)
+            groups[position] = members
+
+        unified = []
+        for position in sorted(groups):
+            members = groups[position]
             unified.append({
-                "product": base["product"],
-                "entries": group,
-                "confidence": round(sum(difflib.SequenceMatcher(None, base["product"], g["product"]).ratio() for g in group) / len(group), 2)
+                "product": self.clusters[position]["product"],
+                "cluster_id": self.clusters[position]["id"],
+                "entries": [item for item, _ in members],
+                "confidence": round(sum(ratio for _, ratio in members) / len(members), 2)
             })
 
         return unified
+
+    def prune(self, all_data):
+        """
+        Forget members that are no longer listed and the clusters left without any, so a
+        matcher kept across refreshes only holds live markets. Surviving clusters keep their ids.
+        """
+        live = {self.item_key(item) for sublist in all_data for item in sublist}
+        kept = []
+        for cluster in self.clusters:
+            members = {key: ratio for key, ratio in cluster["members"].items() if key in live}
+            if members:
+                kept.append({**cluster, "members": members})
+
+        dropped = len(self.clusters) - len(kept)
+        self.clusters = []
+        self.member_index = {}
+        self.representatives = self._new_index()
+        for cluster in kept:
+            self._register(cluster)
+        return dropped
+
+    def item_key(self, item):
+        """Stable identity of a scraped item across runs"""
+        return f"{item.get('site')}|{item['product']}"
+
+    def load_state(self, path):
+        """Load the clusters persisted by a previous run, if any"""
+        if not os.path.exists(path):
+            print(f"No matcher state at {path}, starting fresh")
+            return False
+
+        with open(path, "r", encoding="utf-8") as f:
+            state = json.load(f)
+
+        self.clusters = []
+        self.member_index = {}
+        self.representatives = self._new_index()
+        for cluster in state.get("clusters", []):
+            self._register(cluster)
+        self.next_id = state.get("next_id", len(self.clusters) + 1)
+        print(f"Loaded {len(self.clusters)} clusters from {path}")
+        return True
+
+    def save_state(self, path):
+        """Persist representatives, member keys and confidences for the next run"""
+        state = {"next_id": self.next_id, "clusters": self.clusters}
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+        os.replace(tmp_path, path)
+        print(f"Saved {len(self.clusters)} clusters to {path}")
+
+    def _cluster(self, flat):
+        """Greedy clustering, returning each group as (item, ratio) pairs with the base first"""
+        titles = [item["product"] for item in flat]
+        if self.workers > 1 and len(flat) >= self.min_parallel_items:
+            return self._cluster_parallel(flat, titles)
+
+        char_counts = [Counter(title) for title in titles]
+        assigned = [False] * len(flat)
+        clusters = []
+
+        index = None
+        if self.blocking:
+            index = ShingleIndex(titles, self.shingle_size, self.min_overlap, threshold=self.threshold)
+
+        # Each unassigned item becomes a base and absorbs every remaining item above
+        # the threshold. Everything before the base is already assigned, so only later
+        # positions can join its group.
+        for i, base in enumerate(flat):
+            if assigned[i]:
+                continue
+            assigned[i] = True
+            group = [(base, self.ratio(titles[i], titles[i]))]
+            for j, ratio in self._above_threshold(i, titles, char_counts, index, assigned):
+                group.append((flat[j], ratio))
+                assigned[j] = True
+            clusters.append(group)
+
+        return clusters
+
+    def _cluster_parallel(self, flat, titles):
+        """Same greedy clustering, with candidate scoring spread over a process pool"""
+        assigned = [False] * len(flat)
+        clusters = []
+        options = {
+            "threshold": self.threshold,
+            "blocking": self.blocking,
+            "shingle_size": self.shingle_size,
+            "min_overlap": self.min_overlap,
+        }
+        block_size = self.workers * self.chunk_size * 4
+
+        # Workers get the titles once and build their own index. The parent hands out
+        # blocks of unassigned positions with a snapshot of the assigned flags, then
+        # replays the block in order, so groups match the single-process result.
+        with ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                 initargs=(titles, options)) as pool:
+            position = 0
+            while position < len(flat):
+                block = []
+                while position < len(flat) and len(block) < block_size:
+                    if not assigned[position]:
+                        block.append(position)
+                    position += 1
+
+                snapshot = bytes(assigned)
+                chunks = [block[k:k + self.chunk_size] for k in range(0, len(block), self.chunk_size)]
+                scored = {}
+                for results, pairs in pool.map(_score_chunk, chunks, [snapshot] * len(chunks)):
+                    self.pairs_scored += pairs
+                    for i, self_ratio, matches in results:
+                        scored[i] = (self_ratio, matches)
+
+                for i in block:
+                    if assigned[i]:
+                        continue
+                    assigned[i] = True
+                    self_ratio, matches = scored[i]
+                    group = [(flat[i], self_ratio)]
+                    for j, ratio in matches:
+                        if not assigned[j]:
+                            group.append((flat[j], ratio))
+                            assigned[j] = True
+                    clusters.append(group)
+
+        return clusters
+
+    def _above_threshold(self, i, titles, char_counts, index, assigned):
+        """Return (position, ratio) for every unassigned later item that clears the threshold against item i"""
+        matches = []
+        candidates = index.candidates(i) if index else range(i + 1, len(titles))
+        for j in candidates:
+            if assigned[j]:
+                continue
+            if self.upper_bound(titles[i], titles[j], char_counts[i], char_counts[j]) <= self.threshold:
+                continue
+            ratio = self.ratio(titles[i], titles[j])
+            if ratio > self.threshold:
+                matches.append((j, ratio))
+        return matches
+
+    def _match_representative(self, title):
+        """Return (cluster position, ratio) of the first representative above the threshold"""
+        if not self.clusters:
+            return None
+
+        if self.blocking:
+            candidates = self.representatives.query(title)
+        else:
+            candidates = range(len(self.clusters))
+
+        counts = Counter(title)
+        for position in candidates:
+            base = self.clusters[position]["product"]
+            if self.upper_bound(base, title, Counter(base), counts) <= self.threshold:
+                continue
+            ratio = self.ratio(base, title)
+            if ratio > self.threshold:
+                return position, ratio
+        return None
+
+    def _new_cluster(self, members):
+        base, _ = members[0]
+        cluster = {
+            "id": self.next_id,
+            "product": base["product"],
+            "members": {self.item_key(item): ratio for item, ratio in members}
+        }
+        self.next_id += 1
+        return self._register(cluster)
+
+    def _add_member(self, position, item, ratio):
+        key = self.item_key(item)
+        self.clusters[position]["members"][key] = ratio
+        self.member_index[key] = position
+
+    def _register(self, cluster):
+        position = len(self.clusters)
+        self.clusters.append(cluster)
+        for key in cluster["members"]:
+            self.member_index[key] = position
+        self.representatives.add(cluster["product"])
+        return position
+
+    def _new_index(self):
+        return ShingleIndex(shingle_size=self.shingle_size, min_overlap=self.min_overlap, threshold=self.threshold)
+
+    def ratio(self, base, other):
+        """difflib similarity of two titles, through the cache when there is one"""
+        self.pairs_scored += 1
+        if self.cache is not None:
+            return self.cache.lookup(base, other, self._sequence_ratio)
+        return self._sequence_ratio(base, other)
+
+    def _sequence_ratio(self, base, other):
+        return difflib.SequenceMatcher(None, base, other).ratio()
+
+    def upper_bound(self, base, other, base_counts, other_counts):
+        """Cheap upper bound on the ratio, the same ones SequenceMatcher's quick ratios use"""
+        total = len(base) + len(other)
+        if not total:
+            return 1.0
+        if 2.0 * min(len(base), len(other)) / total <= self.threshold:
+            return 0.0
+        return 2.0 * sum((base_counts & other_counts).values()) / total
+
+
+# Per-process state for parallel unification, set up once by the pool initializer
+_worker = {}
+
+
+def _init_worker(titles, options):
+    matcher = SemanticMatcher(**options)
+    _worker["matcher"] = matcher
+    _worker["titles"] = titles
+    _worker["char_counts"] = [Counter(title) for title in titles]
+    _worker["index"] = None
+    if matcher.blocking:
+        _worker["index"] = ShingleIndex(titles, matcher.shingle_size, matcher.min_overlap, threshold=matcher.threshold)
+
+
+def _score_chunk(positions, assigned):
+    """Score one chunk of base positions against the assigned-flag snapshot sent by the parent"""
+    matcher = _worker["matcher"]
+    titles = _worker["titles"]
+    before = matcher.pairs_scored
+    results = []
+    for i in positions:
+        matches = matcher._above_threshold(i, titles, _worker["char_counts"], _worker["index"], assigned)
+        results.append((i, matcher.ratio(titles[i], titles[i]), matches))
+    return results, matcher.pairs_scored - before
@@ -0,0 +1,139 @@
+import hashlib
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+class SimilarityCache:
+    """
+    Memo of pairwise similarity ratios with an in-process LRU and an optional SQLite layer.
+
+    Safe to share between threads: the service opens it in the main thread and refreshes
+    from one thread per site, so every call holds one lock around the LRU and the connection.
+    """
+
+    def __init__(self, path=None, max_entries=200000, max_disk_entries=5000000, batch_size=5000):
+        self.max_entries = max_entries
+        self.max_disk_entries = max_disk_entries
+        self.batch_size = batch_size
+        self.memory = OrderedDict()
+        self.pending = {}
+        self.touched = set()
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.lock = threading.RLock()
+
+        self.conn = None
+        if path:
+            self.conn = sqlite3.connect(path, check_same_thread=False)
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS similarity (key BLOB PRIMARY KEY, ratio REAL NOT NULL, used INTEGER NOT NULL)"
+            )
+            self.conn.execute("CREATE INDEX IF NOT EXISTS similarity_used ON similarity (used)")
+            self.conn.commit()
+
+    def key(self, base, other):
+        """Hash of the ordered title pair; SequenceMatcher ratios are not symmetric"""
+        pair = f"{self.normalize(base)}\x00{self.normalize(other)}".encode("utf-8")
+        return hashlib.blake2b(pair, digest_size=16).digest()
+
+    def normalize(self, title):
+        # Only normalization that cannot change the ratio: None becomes empty
+        return title or ""
+
+    def lookup(self, base, other, compute):
+        """Return the cached ratio for a pair, computing and storing it on a miss"""
+        key = self.key(base, other)
+
+        with self.lock:
+            ratio = self.memory.get(key)
+            if ratio is not None:
+                self.memory.move_to_end(key)
+                self.hits += 1
+                return ratio
+
+            ratio = self._disk_get(key)
+            if ratio is not None:
+                self.disk_hits += 1
+                self._remember(key, ratio)
+                return ratio
+
+        # Computed outside the lock; two threads missing the same pair store the same ratio
+        ratio = compute(base, other)
+        with self.lock:
+            self.misses += 1
+            self._remember(key, ratio)
+            if self.conn is not None:
+                self.pending[key] = ratio
+                if len(self.pending) >= self.batch_size:
+                    self.flush()
+        return ratio
+
+    def flush(self):
+        """Write pending ratios and access times to disk, then evict the least recently used rows"""
+        with self.lock:
+            if self.conn is None:
+                return
+
+            now = int(time.time())
+            with self.conn:
+                self.conn.executemany(
+                    "INSERT OR REPLACE INTO similarity (key, ratio, used) VALUES (?, ?, ?)",
+                    [(key, ratio, now) for key, ratio in self.pending.items()]
+                )
+                self.conn.executemany(
+                    "UPDATE similarity SET used = ? WHERE key = ?",
+                    [(now, key) for key in self.touched]
+                )
+                count = self.conn.execute("SELECT COUNT(*) FROM similarity").fetchone()[0]
+                if count > self.max_disk_entries:
+                    self.conn.execute(
+                        "DELETE FROM similarity WHERE key IN (SELECT key FROM similarity ORDER BY used LIMIT ?)",
+                        (count - self.max_disk_entries,)
+                    )
+            self.pending.clear()
+            self.touched.clear()
+
+    def close(self):
+        with self.lock:
+            if self.conn is not None:
+                self.flush()
+                self.conn.close()
+                self.conn = None
+
+    def stats(self):
+        lookups = self.hits + self.disk_hits + self.misses
+        return {
+            "lookups": lookups,
+            "memory_hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": round((self.hits + self.disk_hits) / lookups, 4) if lookups else 0.0,
+            "memory_entries": len(self.memory),
+        }
+
+    def report(self):
+        stats = self.stats()
+        print(f"Similarity cache: {stats['lookups']} lookups, {stats['memory_hits']} memory hits, "
+              f"{stats['disk_hits']} disk hits, {stats['misses']} misses ({stats['hit_rate']:.1%} hit rate)")
+
+    def _disk_get(self, key):
+        if self.conn is None:
+            return None
+        if key in self.pending:
+            return self.pending[key]
+        row = self.conn.execute("SELECT ratio FROM similarity WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        self.touched.add(key)
+        return row[0]
+
+    def _remember(self, key, ratio):
+        self.memory[key] = ratio
+        self.memory.move_to_end(key)
+        if len(self.memory) > self.max_entries:
+            self.memory.popitem(last=False)
@@ -0,0 +1,141 @@
+import csv
+import hashlib
+import os
+import pickle
+import re
+from itertools import repeat
+
+from utils.history_store import product_key
+
+DEFAULT_CACHE_DIR = ".snapshot_cache"
+
+# Below this many snapshots, starting worker processes costs more than parsing them in this one
+PARALLEL_SCAN_FILES = 8
+
+SNAPSHOT_TIME = re.compile(r"unified_products_(\d+)")
+
+# Columns a search result shows, with the keys search_markets prints them under
+RESULT_COLUMNS = {
+    "confidence": "Confidence",
+    "total_entries": "Total_Entries",
+    "kalshi_price": "Kalshi_Price",
+    "polymarket_price": "Polymarket_Price",
+}
+
+
+def read_snapshot(csv_file):
+    """Rows of one unified_products CSV as dicts, read with the csv module so searches never load pandas"""
+    with open(csv_file, newline="", encoding="utf-8") as f:
+        return list(csv.DictReader(f))
+
+
+def snapshot_time(path):
+    """Timestamp in a snapshot's file name, 0 when it has none"""
+    match = SNAPSHOT_TIME.search(os.path.basename(path))
+    return int(match.group(1)) if match else 0
+
+
+def read_columns(csv_file, cache_dir=DEFAULT_CACHE_DIR):
+    """
+    The columns a search needs from one snapshot, parsed once and cached on disk under
+    the file's mtime and size, so an unchanged snapshot is never parsed again.
+    """
+    stat = os.stat(csv_file)
+    signature = (stat.st_mtime, stat.st_size)
+    cache_path = None
+    if cache_dir:
+        digest = hashlib.blake2b(os.path.abspath(csv_file).encode("utf-8"), digest_size=6).hexdigest()
+        cache_path = os.path.join(cache_dir, f"{os.path.basename(csv_file)}.{digest}.pickle")
+        try:
+            with open(cache_path, "rb") as f:
+                cached = pickle.load(f)
+            if cached["signature"] == signature:
+                return cached["columns"]
+        except (OSError, EOFError, KeyError, pickle.UnpicklingError):
+            pass  # missing or unreadable caches are rebuilt
+
+    rows = read_snapshot(csv_file)
+    products = [row.get("Product") or "" for row in rows]
+    columns = {"products": products, "lowered": [product.lower() for product in products]}
+    for key, column in RESULT_COLUMNS.items():
+        columns[key] = [row.get(column) or "N/A" for row in rows]
+
+    if cache_path:
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump({"signature": signature, "columns": columns}, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, cache_path)
+    return columns
+
+
+def _scan(csv_file, query_lower, cache_dir):
+    """Matching rows of one snapshot as unscored results, plus its row count or the error reading it"""
+    try:
+        columns = read_columns(csv_file, cache_dir)
+    except Exception as e:
+        return [], 0, str(e)
+    results = []
+    for i, lowered in enumerate(columns["lowered"]):
+        if query_lower in lowered:
+            result = {"file": csv_file, "product": columns["products"][i]}
+            for key in RESULT_COLUMNS:
+                result[key] = columns[key][i]
+            results.append(result)
+    return results, len(columns["products"]), None
+
+
+def scan_snapshots(query, csv_files, workers=None, cache_dir=DEFAULT_CACHE_DIR):
+    """
+    Unscored results for the query from many snapshots, read in parallel worker processes
+    once there are enough of them. Each worker returns only its matches, so little
+    crosses process boundaries.
+    """
+    query_lower = query.lower()
+    workers = min(workers or os.cpu_count() or 1, len(csv_files))
+    if workers <= 1 or len(csv_files) < PARALLEL_SCAN_FILES:
+        scanned = [_scan(csv_file, query_lower, cache_dir) for csv_file in csv_files]
+    else:
+        # Imported here so single-file and index searches start without it
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            scanned = list(pool.map(_scan, csv_files, repeat(query_lower), repeat(cache_dir)))
+
+    results = []
+    rows = 0
+    for csv_file, (matches, count, error) in zip(csv_files, scanned):
+        if error:
+            print(f"Error reading {csv_file}: {error}")
+            continue
+        results.extend(matches)
+        rows += count
+    return results, rows
+
+
+def collapse_latest(results):
+    """
+    One result per product (case and spacing ignored) from its newest snapshot. Each kept
+    result lists every snapshot the product was found in, newest first, under "history",
+    and counts them under "snapshots". Results collapsed before, like the search index's,
+    are merged with the rows and results of other sources.
+    """
+    latest = {}
+    for result in sorted(results, key=lambda r: snapshot_time(r["file"]), reverse=True):
+        history = result.get("history")
+        if history is None:
+            seen = {"file": result["file"]}
+            for key in RESULT_COLUMNS:
+                seen[key] = result[key]
+            history = [seen]
+        snapshots = result.get("snapshots", len(history))
+        kept = latest.get(product_key(result["product"]))
+        if kept is None:
+            result["history"] = list(history)
+            result["snapshots"] = snapshots
+            latest[product_key(result["product"])] = result
+        else:
+            kept["history"].extend(history)
+            kept["snapshots"] += snapshots
+    for result in latest.values():
+        result["history"].sort(key=lambda seen: snapshot_time(seen["file"]), reverse=True)
+    return list(latest.values())
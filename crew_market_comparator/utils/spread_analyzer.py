@@ -0,0 +1,109 @@
+import csv
+
+import numpy as np
+
+from utils.price_parser import parse_prices
+
+COLUMNS = ["Rank", "Cluster_ID", "Product", "Venues", "Best_Ask_Venue", "Best_Ask", "Best_Bid_Venue", "Best_Bid",
+           "Spread", "Arbitrage"]
+
+
+class SpreadAnalyzer:
+    """
+    Cross-venue comparison of unified groups, computed over all groups at once.
+
+    Each venue's implied probability for a group is the mean over its entries. The best ask
+    is the venue where YES is cheapest, the best bid the one where it is dearest, and the
+    spread is the gap between them. Buying YES at the ask and NO at the bid costs
+    1 - spread, so a group is flagged as arbitrage when the spread exceeds `fee`.
+    Groups quoted on fewer than two venues have no spread (NaN).
+    """
+
+    def __init__(self, min_spread=0.0, fee=0.02):
+        self.min_spread = min_spread
+        self.fee = fee
+
+    def analyze(self, unified):
+        """Arrays with one value per group: venues quoted, best ask/bid venue and probability, spread, arbitrage"""
+        entries = [entry for u in unified for entry in u["entries"]]
+        venues = sorted({entry["site"] for entry in entries})
+        venue_index = {venue: i for i, venue in enumerate(venues)}
+        groups, width = len(unified), max(1, len(venues))
+
+        # Flatten every entry to (group, venue, probability) and reduce per cell with bincount
+        sizes = np.fromiter((len(u["entries"]) for u in unified), dtype=np.int64, count=groups)
+        group_of = np.repeat(np.arange(groups), sizes)
+        venue_of = np.fromiter((venue_index[entry["site"]] for entry in entries), dtype=np.int64, count=len(entries))
+        # Scraped probabilities as-is; only entries scraped without one have their price parsed
+        values = [entry.get("probability") for entry in entries]
+        missing = [i for i, entry in enumerate(entries) if "probability" not in entry]
+        for i, fields in zip(missing, parse_prices([entries[i].get("price") for i in missing])):
+            values[i] = fields["probability"]
+        probability = np.array(values, dtype=float)
+        valid = ~np.isnan(probability)
+
+        cells = group_of[valid] * width + venue_of[valid]
+        cell_count = groups * width
+        sums = np.bincount(cells, weights=probability[valid], minlength=cell_count).astype(float)
+        counts = np.bincount(cells, minlength=cell_count).astype(float)
+        sums, counts = sums.reshape(groups, width), counts.reshape(groups, width)
+        quoted = counts > 0
+        means = np.divide(sums, counts, out=np.zeros_like(sums), where=quoted)
+
+        ask = np.where(quoted, means, np.inf).argmin(axis=1)
+        # Ties resolve to the first venue for the ask and the last for the bid, so they differ
+        bid = width - 1 - np.where(quoted, means, -np.inf)[:, ::-1].argmax(axis=1)
+        rows = np.arange(groups)
+        best_ask = np.where(quoted.any(axis=1), means[rows, ask], np.nan)
+        best_bid = np.where(quoted.any(axis=1), means[rows, bid], np.nan)
+        venue_count = quoted.sum(axis=1)
+        spread = np.where(venue_count >= 2, best_bid - best_ask, np.nan)
+
+        return {
+            "venues": venues,
+            "venue_count": venue_count,
+            "ask_venue": ask,
+            "best_ask": best_ask,
+            "bid_venue": bid,
+            "best_bid": best_bid,
+            "spread": spread,
+            "arbitrage": np.nan_to_num(spread, nan=-1.0) > self.fee,
+        }
+
+    def rank(self, table):
+        """Positions of the groups with a spread of at least min_spread, widest first"""
+        spread = table["spread"]
+        keep = np.flatnonzero(np.nan_to_num(spread, nan=-1.0) >= self.min_spread)
+        return keep[np.argsort(-spread[keep], kind="stable")]
+
+    def rows(self, unified, table, order):
+        venues = table["venues"]
+        rows = []
+        for rank, i in enumerate(order.tolist(), 1):
+            rows.append({
+                "Rank": rank,
+                "Cluster_ID": unified[i].get("cluster_id", ""),
+                "Product": unified[i]["product"],
+                "Venues": int(table["venue_count"][i]),
+                "Best_Ask_Venue": venues[table["ask_venue"][i]],
+                "Best_Ask": round(float(table["best_ask"][i]), 4),
+                "Best_Bid_Venue": venues[table["bid_venue"][i]],
+                "Best_Bid": round(float(table["best_bid"][i]), 4),
+                "Spread": round(float(table["spread"][i]), 4),
+                "Arbitrage": bool(table["arbitrage"][i]),
+            })
+        return rows
+
+    def write(self, filename, rows):
+        with open(filename, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=COLUMNS)
+            writer.writeheader()
+            writer.writerows(rows)
+
+    def report(self, rows, top=10):
+        for row in rows[:top]:
+            flag = " ARBITRAGE" if row["Arbitrage"] else ""
+            print(f"  {row['Spread']:.3f}  buy {row['Best_Ask_Venue']} {row['Best_Ask']:.3f} / "
+                  f"sell {row['Best_Bid_Venue']} {row['Best_Bid']:.3f}  {row['Product'][:60]}{flag}")
+        if len(rows) > top:
+            print(f"  ... and {len(rows) - top} more")
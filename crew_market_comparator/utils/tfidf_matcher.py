@@ -0,0 +1,157 @@
+import numpy as np
+from scipy import sparse
+
+
+class TfidfMatcher:
+    """Vectorized alternative to SemanticMatcher using character n-gram TF-IDF and cosine similarity"""
+
+    def __init__(self, threshold=0.7, ngram_size=3, top_k=20, chunk_size=250, pair_batch=20000, rest_weight=0.5):
+        self.threshold = threshold
+        self.ngram_size = ngram_size
+        self.top_k = top_k
+        self.chunk_size = chunk_size
+        self.pair_batch = pair_batch
+        # Squared norm of the common n-grams left out of each row's prefix. Any value up to the
+        # threshold is exact; lower means larger prefixes but fewer pairs to score exactly
+        self.rest_weight = min(rest_weight, threshold)
+        # Exact cosines computed, the counterpart of SemanticMatcher.pairs_scored
+        self.pairs_scored = 0
+
+    def unify(self, all_data):
+        flat = [item for sublist in all_data for item in sublist]
+        if not flat:
+            return []
+
+        matrix = self.vectorize([item["product"] for item in flat])
+        neighbours = self.top_neighbours(matrix)
+        assigned = np.zeros(len(flat), dtype=bool)
+        unified = []
+
+        # Same greedy clustering as SemanticMatcher: each unassigned item becomes a
+        # base and absorbs its unassigned neighbours above the threshold
+        for i, base in enumerate(flat):
+            if assigned[i]:
+                continue
+            assigned[i] = True
+            members = [(i, 1.0)]
+            for j, score in neighbours[i]:
+                if not assigned[j]:
+                    members.append((j, score))
+                    assigned[j] = True
+            members.sort()
+
+            unified.append({
+                "product": base["product"],
+                "entries": [flat[j] for j, _ in members],
+                "confidence": round(sum(score for _, score in members) / len(members), 2)
+            })
+
+        return unified
+
+    def ngrams(self, title):
+        """Return the lowercase character n-grams of a title, padded so short words still count"""
+        text = f" {(title or '').lower()} "
+        size = self.ngram_size
+        if len(text) <= size:
+            return [text]
+        return [text[i:i + size] for i in range(len(text) - size + 1)]
+
+    def vectorize(self, titles):
+        """Build an L2-normalized sparse TF-IDF matrix with one row per title"""
+        vocabulary = {}
+        indices = []
+        indptr = [0]
+        for title in titles:
+            for gram in self.ngrams(title):
+                indices.append(vocabulary.setdefault(gram, len(vocabulary)))
+            indptr.append(len(indices))
+
+        data = np.ones(len(indices), dtype=np.float32)
+        matrix = sparse.csr_matrix(
+            (data, np.array(indices, dtype=np.int64), np.array(indptr, dtype=np.int64)),
+            shape=(len(titles), len(vocabulary))
+        )
+        matrix.sum_duplicates()
+
+        # Smoothed idf, the same weighting scikit-learn uses by default
+        document_frequency = np.bincount(matrix.indices, minlength=len(vocabulary))
+        idf = np.log((1 + len(titles)) / (1 + document_frequency)) + 1
+        matrix = matrix.multiply(idf.astype(np.float32)).tocsr()
+
+        norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+        norms[norms == 0] = 1
+        return sparse.diags(1 / norms).dot(matrix).tocsr()
+
+    def top_neighbours(self, matrix):
+        """
+        Return, for every row, its top-k later rows whose cosine similarity clears the threshold.
+
+        Only the top k are kept, so a title with more than top_k near-duplicates can leave
+        some of them to open groups of their own.
+        """
+        prefix, rest_norms = self.prefixes(matrix)
+        transposed = matrix.T.tocsc()
+        prefix_transposed = prefix.T.tocsc()
+        neighbours = []
+
+        for start in range(0, matrix.shape[0], self.chunk_size):
+            stop = min(start + self.chunk_size, matrix.shape[0])
+            # Products that involve a prefix on at least one side, so n-grams common to every
+            # title never fill them. With x = xp + xr and y = yp + yr (prefix + rest),
+            # x.y = xp.y + x.yp - xp.yp + xr.yr, and xr.yr is at most |xr||yr|
+            chunk, chunk_prefix = matrix[start:stop], prefix[start:stop]
+            bound = (chunk_prefix @ transposed + chunk @ prefix_transposed
+                     - chunk_prefix @ prefix_transposed).tocoo()
+            rows = bound.row + start
+            keep = (bound.col > rows) & (bound.data + rest_norms[rows] * rest_norms[bound.col] > self.threshold)
+            rows, cols = rows[keep], bound.col[keep]
+
+            # Exact cosines for the pairs the bound cannot rule out, a bounded batch at a time
+            scores = np.concatenate([
+                np.asarray(matrix[rows[k:k + self.pair_batch]].multiply(matrix[cols[k:k + self.pair_batch]])
+                           .sum(axis=1)).ravel()
+                for k in range(0, len(rows), self.pair_batch)
+            ] or [np.zeros(0)])
+            self.pairs_scored += len(scores)
+            keep = scores > self.threshold
+            rows, cols, scores = rows[keep], cols[keep], scores[keep]
+
+            # Split the surviving pairs into per-row neighbour lists
+            order = np.lexsort((cols, rows))
+            rows, cols, scores = rows[order], cols[order], scores[order]
+            bounds = np.searchsorted(rows, np.arange(start, stop + 1))
+            for offset in range(stop - start):
+                lo, hi = bounds[offset], bounds[offset + 1]
+                c, v = cols[lo:hi], scores[lo:hi]
+                if len(c) > self.top_k:
+                    best = np.sort(np.argpartition(-v, self.top_k)[:self.top_k])
+                    c, v = c[best], v[best]
+                neighbours.append([(int(j), float(score)) for j, score in zip(c, v)])
+
+        return neighbours
+
+    def prefixes(self, matrix):
+        """
+        Split every row into its rarest n-grams (the prefix) and the common rest, with the rest
+        as long as its squared norm stays within rest_weight. Rows are unit length, so two titles
+        sharing no n-gram in either prefix have cosine at most rest_weight (prefix filtering).
+        Returns the prefix part of the matrix and the norm of each row's rest.
+        """
+        rows = np.repeat(np.arange(matrix.shape[0]), np.diff(matrix.indptr))
+        frequency = np.bincount(matrix.indices, minlength=matrix.shape[1])
+        # Within each row, most common n-grams first
+        order = np.lexsort((-frequency[matrix.indices], rows))
+        squares = matrix.data.astype(np.float64) ** 2
+        running = np.cumsum(squares[order])
+        before = np.concatenate(([0.0], running))[matrix.indptr[:-1]]
+        within = running - np.repeat(before, np.diff(matrix.indptr))
+
+        # A small margin so rounding never moves a needed n-gram out of the prefix
+        in_prefix = np.empty(matrix.nnz, dtype=bool)
+        in_prefix[order] = within > self.rest_weight - 1e-6
+        rest_squares = np.bincount(rows, weights=np.where(in_prefix, 0.0, squares), minlength=matrix.shape[0])
+
+        prefix = matrix.copy()
+        prefix.data[~in_prefix] = 0
+        prefix.eliminate_zeros()
+        return prefix, np.sqrt(rest_squares)